@@ -6,20 +6,38 @@ de análisis de contratos a través de una interfaz web.
 """
 
 import os
+import re
 import sys
+import select
+import socket
 import webbrowser
 import threading
 import time
 import json
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import uuid
+import atexit
+import shutil
+import zipfile
+import importlib
+import multiprocessing
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, stream_with_context
 from flask_cors import CORS
 
 # Añadir el directorio actual al path para poder importar inspector_functions
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-# Importar la función para crear reportes
-from inspector_functions.create_report import create_report, get_report_html
+# Las funciones de reporte (pdfminer, tabulate y analizadores) no se importan aquí:
+# se cargan en los trabajadores de análisis para que el servidor arranque cuanto antes
+
+# Módulos pesados cuyo tiempo de importación se mide en --diagnose
+HEAVY_MODULES = [
+    "pdfminer.pdfinterp",
+    "pdfminer.converter",
+    "pdfminer.layout",
+    "tabulate",
+    "inspector_functions.create_report",
+]
 
 # Configurar aplicación Flask
 app = Flask(__name__, static_url_path='', static_folder='./')
@@ -33,6 +51,85 @@ CORS(app)
 # Variable global para almacenar el puerto en uso
 PORT = 5050
 
+# Pool de trabajadores de análisis (se arranca en start_server)
+analysis_pool = None
+
+# Último trabajo de cada sesión del navegador (una carga nueva cancela la anterior) y eventos
+# de cancelación de los análisis que se ejecutan en este proceso cuando no hay pool
+session_jobs = {}
+inline_cancel_events = {}
+jobs_lock = threading.Lock()
+
+# Identificadores de trabajo que puede proponer el cliente
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{8,32}$')
+
+# Lotes de /batch: tamaño máximo de cada contrato, de la petición completa y número máximo
+# de contratos (configurable con INSPECTOR_MAX_BATCH_FILES)
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+BATCH_MAX_CONTENT_LENGTH = 512 * 1024 * 1024  # 512MB
+DEFAULT_MAX_BATCH_FILES = 500
+
+def get_base_dir():
+    """Directorio donde se guardan los archivos de trabajo (junto al ejecutable o al script)"""
+    if getattr(sys, 'frozen', False):
+        # Si es ejecutable, usar el directorio donde está el ejecutable
+        return os.path.dirname(sys.executable)
+    return current_dir
+
+def start_analysis_pool():
+    """Arranca y precalienta los trabajadores de análisis en segundo plano"""
+    global analysis_pool
+    from inspector_functions.analysis_pool import AnalysisPool
+    analysis_pool = AnalysisPool(warmup_pdf=os.environ.get('INSPECTOR_WARMUP_PDF'))
+    analysis_pool.start()
+    atexit.register(analysis_pool.shutdown)
+
+def cancel_job(job_id):
+    """Cancela un trabajo del pool o un análisis en este proceso; devuelve True si existía"""
+    if analysis_pool is not None and analysis_pool.cancel(job_id):
+        return True
+    with jobs_lock:
+        event = inline_cancel_events.get(job_id)
+    if event is not None:
+        event.set()
+        return True
+    return False
+
+def active_job_ids():
+    """Trabajos encolados o en curso (sus directorios no se eliminan al limpiar jobs/)"""
+    active = analysis_pool.pending_job_ids() if analysis_pool is not None else set()
+    with jobs_lock:
+        active.update(inline_cancel_events)
+    return active
+
+def client_disconnected():
+    """Indica si el cliente de la petición actual cerró la conexión"""
+    sock = request.environ.get('werkzeug.socket')
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        # Una conexión cerrada es legible y no devuelve datos
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+def profile_requested():
+    """Indica si la petición pide perfilar el análisis (cabecera X-Inspector-Profile)"""
+    from inspector_functions.profiling import PROFILE_HEADER
+    return request.headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes')
+
+def wait_for_job(job, poll_interval=0.5):
+    """Espera el resultado de un trabajo del pool, cancelándolo si el cliente se desconecta"""
+    from concurrent.futures import TimeoutError as FutureTimeout
+    while True:
+        try:
+            return job.future.result(timeout=poll_interval)
+        except FutureTimeout:
+            if client_disconnected():
+                print(f"[INFO] Cliente desconectado; cancelando el trabajo {job.id}")
+                analysis_pool.cancel(job.id)
+
 @app.route('/', methods=['GET'])
 def index():
     """Ruta principal para servir la interfaz web"""
@@ -41,10 +138,15 @@ def index():
 @app.route('/status', methods=['GET'])
 def status():
     """Ruta para verificar el estado del servidor"""
+    # El servidor solo está listo cuando los trabajadores han terminado el calentamiento
+    pool_status = analysis_pool.status() if analysis_pool is not None else None
+    ready = pool_status is None or pool_status['ready']
     return jsonify({
-        'status': 'ok',
-        'message': 'Server is running',
-        'version': '1.0.0'
+        'status': 'ok' if ready else 'warming_up',
+        'ready': ready,
+        'message': 'Server is running' if ready else 'Server is warming up',
+        'version': '1.0.0',
+        'workers': pool_status
     })
 
 @app.route('/upload', methods=['POST'])
@@ -58,46 +160,118 @@ def upload_file():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'Nombre de archivo vacío'}), 400
         
-        # Verificar si estamos en modo ejecutable (PyInstaller)
-        if getattr(sys, 'frozen', False):
-            # Si es ejecutable, usar el directorio donde está el ejecutable
-            base_dir = os.path.dirname(sys.executable)
-            print(f"[DEBUG] Ejecutando como ejecutable. Base dir: {base_dir}")
-        else:
-            base_dir = current_dir
-            print(f"[DEBUG] Ejecutando como script. Base dir: {base_dir}")
-            
-        # Guardar como input.pdf en el directorio adecuado
-        file_path = os.path.join(base_dir, 'input.pdf')
+        base_dir = get_base_dir()
+        print(f"[DEBUG] Base dir: {base_dir}")
+        
+        # Cada análisis usa su propio directorio de trabajo para que los trabajos
+        # concurrentes no se pisen input.pdf, output.txt ni las secciones
+        from inspector_functions.analysis_pool import (
+            create_job_directory, prune_job_directories, run_report_job, JobCancelled, WorkerCrashed)
+        from concurrent.futures import CancelledError
+        
+        # El cliente puede proponer el identificador del trabajo para poder cancelarlo
+        job_id = request.form.get('job_id', '')
+        if not JOB_ID_PATTERN.match(job_id):
+            job_id = uuid.uuid4().hex
+        
+        # Una carga nueva de la misma sesión cancela el análisis anterior
+        session_id = request.form.get('session')
+        if session_id:
+            with jobs_lock:
+                previous_job_id = session_jobs.get(session_id)
+                session_jobs[session_id] = job_id
+            if previous_job_id and previous_job_id != job_id and cancel_job(previous_job_id):
+                print(f"[INFO] Trabajo {previous_job_id} sustituido por {job_id}")
+        job_dir = create_job_directory(base_dir, job_id)
+        file_path = os.path.join(job_dir, 'input.pdf')
         file.save(file_path)
         print(f"[DEBUG] PDF guardado en: {file_path}")
         
         # Analizar el contrato y generar el reporte HTML
         try:
-            # Definir directorio de salida - siempre en el mismo directorio que el ejecutable o script
-            output_dir = os.path.join(base_dir, 'output_split')
-            
-            # Crear directorio si no existe
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = os.path.join(job_dir, 'output_split')
             print(f"[DEBUG] Directorio de salida: {output_dir}")
             
-            # Analizar el contrato utilizando la función existente
-            report_data = create_report(file_path, output_dir)
+            # Perfil de extracción opcional ("accurate", "fast", "raw" o "auto")
+            extraction_profile = request.form.get('profile') or None
+            # Conjunto de plantillas opcional (por defecto se elige automáticamente)
+            template_set = request.form.get('template_set') or None
+            # Perfilado opcional del análisis (cabecera X-Inspector-Profile o INSPECTOR_PROFILE)
+            profile = profile_requested()
+            
+            # Analizar el contrato en un trabajador precalentado (o en este proceso si no hay pool)
+            try:
+                if analysis_pool is not None:
+                    job = analysis_pool.submit('report', job_id=job_id, input_pdf=file_path, output_dir=output_dir,
+                                               work_dir=job_dir, extraction_profile=extraction_profile,
+                                               template_set=template_set, profile=profile)
+                    result = wait_for_job(job)
+                else:
+                    cancel_event = threading.Event()
+                    with jobs_lock:
+                        inline_cancel_events[job_id] = cancel_event
+                    try:
+                        result = run_report_job(file_path, output_dir, job_dir, extraction_profile, template_set,
+                                                cancel_event=cancel_event, profile=profile)
+                    finally:
+                        with jobs_lock:
+                            inline_cancel_events.pop(job_id, None)
+            except (JobCancelled, CancelledError):
+                result = None
+            except WorkerCrashed as e:
+                # El trabajador murió (por ejemplo, por el límite de memoria); el servidor sigue en pie
+                return jsonify({
+                    'success': False,
+                    'error': f'El análisis terminó de forma inesperada: {str(e)}',
+                    'failure': {'code': 'worker_crashed', 'message': str(e), **e.details}
+                }), 500
+            finally:
+                if session_id:
+                    with jobs_lock:
+                        if session_jobs.get(session_id) == job_id:
+                            del session_jobs[session_id]
+            
+            if result is None or result['report'].get('status') == 'cancelled':
+                return jsonify({'success': False, 'cancelled': True, 'job_id': job_id,
+                                'error': 'Análisis cancelado'}), 409
+            report_data = result['report']
+            profile_info = result.get('profile')
+            prune_job_directories(base_dir, active=active_job_ids())
+            
+            # PDF rechazado por las comprobaciones previas o por superar los límites
+            if report_data.get('failure'):
+                return jsonify({
+                    'success': False,
+                    'error': 'El contrato no se puede analizar: ' + report_data['failure']['message'],
+                    'failure': report_data['failure'],
+                    'profile': profile_info
+                }), 422
             
             if 'errors' in report_data and report_data['errors']:
                 return jsonify({
                     'success': False,
-                    'error': 'Error al analizar el contrato: ' + ', '.join(report_data['errors'])
+                    'error': 'Error al analizar el contrato: ' + ', '.join(report_data['errors']),
+                    'profile': profile_info
                 }), 500
             
-            # Generar HTML a partir de los resultados
-            report_html = get_report_html(report_data)
+            # Añadir el contrato a la línea base del corpus (solo escribe el proceso principal)
+            try:
+                from inspector_functions import baseline_store
+                baseline_store.record_report(report_data)
+            except Exception as e:
+                print(f"[WARNING] No se pudo actualizar la línea base: {str(e)}")
+            
+            # HTML generado a partir de los resultados
+            report_html = result['html']
             
             # Devolver HTML como parte de la respuesta
             return jsonify({
                 'success': True,
                 'message': 'Archivo procesado correctamente',
-                'html': report_html
+                'html': report_html,
+                'report': report_data,
+                'job_id': job_id,
+                'profile': profile_info
             })
             
         except Exception as e:
@@ -114,22 +288,389 @@ def upload_file():
             'error': f'Error en la solicitud: {str(e)}'
         }), 400
 
-def open_browser():
-    """Abre el navegador automáticamente apuntando a la aplicación"""
-    # Esperar un momento para asegurar que el servidor esté funcionando
-    time.sleep(1.5)
-    url = f"http://localhost:{PORT}"
+def max_batch_files():
+    """Número máximo de contratos por lote (variable de entorno INSPECTOR_MAX_BATCH_FILES)"""
+    try:
+        return max(1, int(os.environ.get('INSPECTOR_MAX_BATCH_FILES', DEFAULT_MAX_BATCH_FILES)))
+    except ValueError:
+        return DEFAULT_MAX_BATCH_FILES
+
+def save_batch_files(uploads, base_dir, limit):
+    """
+    Guarda los contratos de un lote, cada uno en su propio directorio de trabajo. De los
+    archivos ZIP se extraen los PDF que contienen.
+    
+    Args:
+        uploads (list): Archivos recibidos (FileStorage)
+        base_dir (str): Directorio base de la aplicación
+        limit (int): Número máximo de contratos
+    
+    Returns:
+        tuple: (contratos guardados [{'index', 'filename', 'job_id', 'job_dir', 'input_pdf'}],
+                archivos rechazados [{'index', 'filename', 'error'}])
+    """
+    from inspector_functions.analysis_pool import create_job_directory
+    
+    entries = []
+    rejected = []
+    
+    def reject(filename, error):
+        rejected.append({'index': len(entries) + len(rejected), 'filename': filename, 'error': error})
+    
+    def add(filename, source):
+        if len(entries) >= limit:
+            reject(filename, f'El lote supera el máximo de {limit} contratos')
+            return
+        job_id = uuid.uuid4().hex
+        job_dir = create_job_directory(base_dir, job_id)
+        input_pdf = os.path.join(job_dir, 'input.pdf')
+        with open(input_pdf, 'wb') as f:
+            shutil.copyfileobj(source, f)
+        if os.path.getsize(input_pdf) > MAX_FILE_SIZE:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            reject(filename, 'El archivo supera el tamaño máximo de 16MB')
+            return
+        entries.append({'index': len(entries) + len(rejected), 'filename': filename, 'job_id': job_id,
+                        'job_dir': job_dir, 'input_pdf': input_pdf})
+    
+    for upload in uploads:
+        filename = upload.filename or ''
+        if filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(upload.stream) as archive:
+                    for info in archive.infolist():
+                        name = os.path.basename(info.filename)
+                        # Directorios y metadatos de macOS
+                        if info.is_dir() or info.filename.startswith('__MACOSX/') or name.startswith('.'):
+                            continue
+                        label = f"{filename}/{info.filename}"
+                        if not name.lower().endswith('.pdf'):
+                            reject(label, 'No es un archivo PDF')
+                        elif info.file_size > MAX_FILE_SIZE:
+                            reject(label, 'El archivo supera el tamaño máximo de 16MB')
+                        else:
+                            with archive.open(info) as source:
+                                add(label, source)
+            except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError) as e:
+                reject(filename, f'No se pudo leer el archivo ZIP: {str(e)}')
+        elif filename.lower().endswith('.pdf'):
+            add(filename, upload.stream)
+        else:
+            reject(filename or '(sin nombre)', 'No es un archivo PDF ni ZIP')
+    
+    return entries, rejected
+
+def batch_result_line(entry, result=None, error=None, include_html=False):
+    """
+    Línea NDJSON con el resultado de un contrato del lote.
+    
+    Args:
+        entry (dict): Contrato (de save_batch_files)
+        result (dict, optional): Resultado de run_report_job
+        error (Exception, optional): Error del trabajo, si falló
+        include_html (bool): Incluir el HTML del reporte
+    
+    Returns:
+        dict: {'type': 'result', 'index', 'filename', 'job_id', 'success', 'status', ...}
+    """
+    from inspector_functions.analysis_pool import JobCancelled, WorkerCrashed
+    from concurrent.futures import CancelledError
+    
+    line = {'type': 'result', 'index': entry['index'], 'filename': entry['filename'], 'job_id': entry['job_id']}
+    report_data = result['report'] if result is not None else None
+    if result is not None and result.get('profile'):
+        line['profile'] = result['profile']
+    
+    if isinstance(error, (JobCancelled, CancelledError)) or (report_data or {}).get('status') == 'cancelled':
+        line.update(success=False, status='cancelled', error='Análisis cancelado')
+    elif isinstance(error, WorkerCrashed):
+        line.update(success=False, status='failed', error=f'El análisis terminó de forma inesperada: {str(error)}',
+                    failure={'code': 'worker_crashed', 'message': str(error), **error.details})
+    elif error is not None:
+        line.update(success=False, status='failed', error=f'Error al procesar el archivo: {str(error)}')
+    elif report_data.get('failure'):
+        line.update(success=False, status='rejected', failure=report_data['failure'],
+                    error='El contrato no se puede analizar: ' + report_data['failure']['message'])
+    elif report_data.get('errors'):
+        line.update(success=False, status='failed',
+                    error='Error al analizar el contrato: ' + ', '.join(report_data['errors']))
+    else:
+        # Añadir el contrato a la línea base del corpus (solo escribe el proceso principal)
+        try:
+            from inspector_functions import baseline_store
+            baseline_store.record_report(report_data)
+        except Exception as e:
+            print(f"[WARNING] No se pudo actualizar la línea base: {str(e)}")
+        line.update(success=True, status='complete', report=report_data)
+        if include_html:
+            line['html'] = result['html']
+    return line
+
+def ndjson(data):
+    """Serializa una línea NDJSON"""
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+@app.route('/batch', methods=['POST'])
+def batch_upload():
+    """
+    Analiza varios contratos a la vez: varios archivos en el campo "files" (o "file") y/o
+    archivos ZIP con PDF. Los contratos se reparten entre los trabajadores y la respuesta es
+    NDJSON: una línea "batch" inicial, una línea "result" por contrato en el orden en que
+    terminan (los errores de cada archivo van en su línea) y una línea "summary" final.
+    """
+    # Un lote puede superar el límite de una carga individual (Flask >= 3.1)
+    try:
+        request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+    except AttributeError:
+        pass
+    
+    try:
+        uploads = request.files.getlist('files') + request.files.getlist('file')
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error en la solicitud: {str(e)}'}), 400
+    if not uploads:
+        return jsonify({'success': False, 'error': 'No se ha proporcionado ningún archivo'}), 400
+    
+    from inspector_functions.analysis_pool import prune_job_directories, run_report_job
+    from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+    
+    base_dir = get_base_dir()
+    batch_id = uuid.uuid4().hex
+    entries, rejected = save_batch_files(uploads, base_dir, max_batch_files())
+    extraction_profile = request.form.get('profile') or None
+    template_set = request.form.get('template_set') or None
+    include_html = request.form.get('html', '').lower() in ('1', 'true', 'yes')
+    profile = profile_requested()
+    print(f"[INFO] Lote {batch_id}: {len(entries)} contratos, {len(rejected)} archivos rechazados")
+    
+    def generate():
+        started = time.perf_counter()
+        counts = {'complete': 0, 'rejected': 0, 'failed': 0, 'cancelled': 0}
+        
+        def finish(line):
+            counts[line.get('status', 'failed')] += 1
+            line['elapsed'] = round(time.perf_counter() - started, 3)
+            return ndjson(line)
+        
+        yield ndjson({'type': 'batch', 'batch_id': batch_id, 'total': len(entries) + len(rejected),
+                      'accepted': len(entries), 'workers': analysis_pool.size if analysis_pool is not None else 1})
+        for item in rejected:
+            yield finish({'type': 'result', 'job_id': None, 'success': False, 'status': 'failed', **item})
+        
+        futures = {}
+        completed = True
+        try:
+            if analysis_pool is not None:
+                # Encolar todos los contratos; cada trabajador toma el siguiente en cuanto queda libre
+                for entry in entries:
+                    job = analysis_pool.submit('report', job_id=entry['job_id'], input_pdf=entry['input_pdf'],
+                                               output_dir=os.path.join(entry['job_dir'], 'output_split'),
+                                               work_dir=entry['job_dir'], extraction_profile=extraction_profile,
+                                               template_set=template_set, profile=profile)
+                    futures[job.future] = entry
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.cancelled():
+                            line = batch_result_line(futures[future], error=CancelledError())
+                        elif future.exception() is not None:
+                            line = batch_result_line(futures[future], error=future.exception())
+                        else:
+                            line = batch_result_line(futures[future], future.result(), include_html=include_html)
+                        yield finish(line)
+                    if not done and client_disconnected():
+                        print(f"[INFO] Cliente desconectado; cancelando el lote {batch_id}")
+                        completed = False
+                        break
+            else:
+                # Sin pool, los contratos se analizan uno a uno en este proceso
+                for entry in entries:
+                    cancel_event = threading.Event()
+                    with jobs_lock:
+                        inline_cancel_events[entry['job_id']] = cancel_event
+                    try:
+                        result = run_report_job(entry['input_pdf'], os.path.join(entry['job_dir'], 'output_split'),
+                                                entry['job_dir'], extraction_profile, template_set,
+                                                cancel_event=cancel_event, profile=profile)
+                        line = batch_result_line(entry, result, include_html=include_html)
+                    except Exception as e:
+                        line = batch_result_line(entry, error=e)
+                    finally:
+                        with jobs_lock:
+                            inline_cancel_events.pop(entry['job_id'], None)
+                    yield finish(line)
+        finally:
+            # Si el cliente se desconecta, cancelar los contratos que quedan
+            for future, entry in futures.items():
+                if not future.done():
+                    analysis_pool.cancel(entry['job_id'])
+            prune_job_directories(base_dir, active=active_job_ids())
+        
+        if completed:
+            total_elapsed = time.perf_counter() - started
+            print(f"[INFO] Lote {batch_id} terminado en {total_elapsed:.2f}s: {counts}")
+            yield ndjson({'type': 'summary', 'batch_id': batch_id, 'total': len(entries) + len(rejected),
+                          **counts, 'elapsed': round(total_elapsed, 3)})
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Batch-Id': batch_id, 'Cache-Control': 'no-cache'})
+
+def load_compare_version(field, base_dir):
+    """
+    Obtiene una de las dos versiones de /compare: un identificador de trabajo ya analizado
+    (campo de formulario) o un PDF (archivo). Un PDF ya analizado reutiliza las secciones de
+    su trabajo; uno nuevo se analiza en un trabajador como en /upload.
+    
+    Returns:
+        dict: Versión (ver compare_versions.load_job_version)
+    
+    Raises:
+        VersionNotFound: Si el trabajo no existe o no tiene un análisis completo
+        AnalysisError: Si el PDF no se pudo analizar
+    """
+    from inspector_functions.analysis_pool import (
+        create_job_directory, prune_job_directories, run_report_job, AnalysisError, JOBS_DIR_NAME)
+    from inspector_functions.compare_versions import VersionNotFound, find_job_for_pdf, load_job_version
+    
+    jobs_dir = os.path.join(base_dir, JOBS_DIR_NAME)
+    upload = request.files.get(field)
+    if upload is None or upload.filename == '':
+        job_id = request.form.get(field, '')
+        if not JOB_ID_PATTERN.match(job_id):
+            raise VersionNotFound(f'Trabajo no válido: {job_id}')
+        version = load_job_version(os.path.join(jobs_dir, job_id))
+        version['cached'] = True
+        return version
+    
+    job_id = uuid.uuid4().hex
+    job_dir = create_job_directory(base_dir, job_id)
+    file_path = os.path.join(job_dir, 'input.pdf')
+    upload.save(file_path)
+    
+    # Mismo PDF ya analizado: no hace falta volver a extraer el texto
+    cached_job_dir = find_job_for_pdf(file_path, jobs_dir)
+    if cached_job_dir is not None:
+        try:
+            version = load_job_version(cached_job_dir)
+            shutil.rmtree(job_dir, ignore_errors=True)
+            version.update(cached=True, filename=upload.filename)
+            return version
+        except VersionNotFound:
+            pass
+    
+    output_dir = os.path.join(job_dir, 'output_split')
+    if analysis_pool is not None:
+        job = analysis_pool.submit('report', job_id=job_id, input_pdf=file_path, output_dir=output_dir,
+                                   work_dir=job_dir)
+        result = wait_for_job(job)
+    else:
+        result = run_report_job(file_path, output_dir, job_dir)
+    prune_job_directories(base_dir, active=active_job_ids() | {job_id})
+    report_data = result['report']
+    if report_data.get('status') != 'complete':
+        reason = report_data.get('failure', {}).get('message') or ', '.join(report_data.get('errors', []))
+        raise AnalysisError(f'No se pudo analizar "{upload.filename}": {reason or report_data.get("status")}',
+                            {'failure': report_data.get('failure')})
+    try:
+        version = load_job_version(job_dir)
+    except VersionNotFound as e:
+        raise AnalysisError(f'No se pudo analizar "{upload.filename}": {str(e)}')
+    version.update(cached=False, filename=upload.filename)
+    return version
+
+@app.route('/compare', methods=['POST'])
+def compare_versions():
+    """
+    Compara dos versiones del mismo contrato sección a sección. Cada versión ("old" y "new")
+    es un PDF o el identificador (job_id) de un análisis anterior; comparar dos versiones ya
+    analizadas no vuelve a extraer el texto.
+    """
+    from inspector_functions.analysis_pool import AnalysisError, JobCancelled, WorkerCrashed
+    from inspector_functions.compare_versions import VersionNotFound, compare_versions as compare
+    
+    for field in ('old', 'new'):
+        if not request.form.get(field) and not getattr(request.files.get(field), 'filename', ''):
+            return jsonify({'success': False,
+                            'error': f'Falta la versión "{field}" (un PDF o un identificador de trabajo)'}), 400
+    
+    try:
+        base_dir = get_base_dir()
+        old = load_compare_version('old', base_dir)
+        new = load_compare_version('new', base_dir)
+        comparison = compare(old, new)
+    except VersionNotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except JobCancelled:
+        return jsonify({'success': False, 'cancelled': True, 'error': 'Análisis cancelado'}), 409
+    except WorkerCrashed as e:
+        return jsonify({
+            'success': False,
+            'error': f'El análisis terminó de forma inesperada: {str(e)}',
+            'failure': {'code': 'worker_crashed', 'message': str(e), **e.details}
+        }), 500
+    except AnalysisError as e:
+        return jsonify({'success': False, 'error': str(e), 'failure': e.details.get('failure')}), 422
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': f'Error al comparar las versiones: {str(e)}'}), 500
+    
+    print(f"[INFO] Comparadas las versiones {old['job_id']} y {new['job_id']}: {comparison['summary']}")
+    return jsonify({'success': True, 'comparison': comparison})
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancela un análisis encolado o en curso"""
+    if cancel_job(job_id):
+        return jsonify({'success': True, 'job_id': job_id, 'cancelled': True})
+    return jsonify({'success': False, 'error': 'Trabajo no encontrado o ya terminado'}), 404
+
+def wait_for_server(port, timeout=30.0, interval=0.05):
+    """Espera hasta que el servidor acepte conexiones en el puerto indicado"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
+def port_in_use(port):
+    """Comprueba si ya hay un proceso escuchando en el puerto indicado"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+def open_browser(port):
+    """Abre el navegador automáticamente en cuanto el servidor acepta conexiones"""
+    if not wait_for_server(port):
+        print(f"[WARNING] El servidor no respondió en el puerto {port}; no se abre el navegador")
+        return
+    url = f"http://localhost:{port}"
     print(f"Abriendo navegador en: {url}")
     webbrowser.open(url)
 
 def start_server(debug=False, port=5050):
     """Inicia el servidor Flask"""
     global PORT
+    
+    # Con el recargador de Flask, el proceso hijo hereda el socket ya abierto por el padre
+    is_reloader_child = os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    
+    # Si el puerto ya está ocupado, buscar el siguiente libre antes de arrancar
+    while not is_reloader_child and port_in_use(port):
+        print(f"Puerto {port} en uso. Intentando con el puerto {port + 1}...")
+        port += 1
     PORT = port
     
-    # Si no estamos en modo debug, abrir el navegador automáticamente
+    # Arrancar los trabajadores de análisis (en modo debug, solo en el proceso que sirve peticiones)
+    if not debug or is_reloader_child:
+        start_analysis_pool()
+    
+    # Si no estamos en modo debug, abrir el navegador cuando el socket esté listo
     if not debug:
-        threading.Timer(1.0, open_browser).start()
+        threading.Thread(target=open_browser, args=(port,), daemon=True).start()
     
     # Iniciar el servidor
     try:
@@ -147,6 +688,19 @@ def start_server(debug=False, port=5050):
             print(f"Puerto {port} en uso. Intentando con el puerto {new_port}...")
             start_server(debug, new_port)
 
+def measure_import_times():
+    """Mide el tiempo de importación de los módulos pesados (en orden de dependencia)"""
+    timings = []
+    for module_name in HEAVY_MODULES:
+        already_loaded = module_name in sys.modules
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+            timings.append((module_name, time.perf_counter() - start, already_loaded, None))
+        except Exception as e:
+            timings.append((module_name, time.perf_counter() - start, already_loaded, str(e)))
+    return timings
+
 def run_diagnostics():
     """Ejecuta diagnósticos del sistema y muestra información relevante"""
     print("\n=== DIAGNÓSTICO DEL CONTRACT INSPECTOR ===\n")
@@ -211,9 +765,83 @@ def run_diagnostics():
     else:
         print("  El directorio no existe o no es accesible")
     
+    # Medir el tiempo de importación de los módulos de análisis
+    print("\n== Tiempo de importación ==")
+    total = 0.0
+    for module_name, elapsed, already_loaded, error in measure_import_times():
+        total += elapsed
+        if error:
+            print(f"❌ {module_name}: Error al importar ({error})")
+        elif already_loaded:
+            print(f"  - {module_name}: ya importado")
+        else:
+            print(f"✅ {module_name}: {elapsed * 1000:.0f} ms")
+    print(f"  Total: {total * 1000:.0f} ms")
+    
+    # Medir el calentamiento de un trabajador de análisis
+    print("\n== Calentamiento de trabajadores ==")
+    try:
+        from inspector_functions.analysis_pool import warm_up
+        for phase, elapsed in warm_up(os.environ.get('INSPECTOR_WARMUP_PDF')).items():
+            print(f"  - {phase}: {elapsed * 1000:.0f} ms")
+        from inspector_functions.pdf_to_txt_pdfminer import extraction_cache_stats
+        for name, stats in extraction_cache_stats().items():
+            print(f"  - Caché de {name}: {stats['entries']}/{stats['max_size']} entradas, "
+                  f"tasa de aciertos {stats['hit_rate']:.0%}")
+    except Exception as e:
+        print(f"❌ Error en el calentamiento: {str(e)}")
+    
+    # Límites de recursos de los trabajadores
+    print("\n== Límites de recursos ==")
+    from inspector_functions.resource_limits import configured_limits, limits_supported
+    limits = configured_limits()
+    if not limits_supported():
+        print("⚠️ Este sistema no permite limitar los recursos de los trabajadores")
+    memory = f"{limits['memory_mb']:g} MB" if limits['memory_mb'] else "sin límite"
+    cpu = f"{limits['cpu_seconds']:g} s" if limits['cpu_seconds'] else "sin límite"
+    print(f"  - Memoria por trabajador: {memory}")
+    print(f"  - CPU por análisis: {cpu}")
+    
+    # Reciclado de trabajadores: umbrales, memoria tras el calentamiento y, si el servidor
+    # está en ejecución, memoria de cada trabajador y últimos reemplazos
+    print("\n== Reciclado de trabajadores ==")
+    from inspector_functions.analysis_pool import recycle_thresholds
+    from inspector_functions.resource_limits import process_rss_mb
+    thresholds = recycle_thresholds()
+    jobs = f"{thresholds['jobs']} trabajos" if thresholds['jobs'] else "sin límite"
+    rss = f"{thresholds['rss_mb']} MB" if thresholds['rss_mb'] else "sin límite"
+    print(f"  - Reciclar tras: {jobs}")
+    print(f"  - Reciclar con memoria residente de: {rss}")
+    warm_rss = process_rss_mb()
+    if warm_rss is not None:
+        print(f"  - Memoria residente tras el calentamiento: {warm_rss:.0f} MB")
+    else:
+        print("⚠️ No se puede medir la memoria residente en este sistema (instale psutil)")
+    try:
+        from urllib.request import urlopen
+        with urlopen(f"http://127.0.0.1:{PORT}/status", timeout=2) as response:
+            pool_status = json.loads(response.read().decode('utf-8')).get('workers')
+    except Exception:
+        pool_status = None
+    if not pool_status:
+        print(f"  El servidor no está en ejecución en el puerto {PORT}")
+    else:
+        print(f"  Servidor en ejecución; {pool_status['recycle']['recycled']} trabajadores reemplazados")
+        for worker in pool_status['workers']:
+            worker_rss = f"{worker['rss_mb']:.0f} MB" if worker['rss_mb'] is not None else "desconocida"
+            print(f"  - Trabajador {worker['id']} (pid {worker['pid']}): {worker['jobs_done']} trabajos, "
+                  f"memoria {worker_rss}, activo {worker['uptime']:.0f} s")
+        for event in pool_status['recycle']['events']:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['time']))
+            print(f"  - {when}: {event['old_worker']} -> {event['new_worker']} ({event['reason']}, "
+                  f"{event['jobs_done']} trabajos, {event['rss_mb']} MB)")
+    
     print("\n=== FIN DEL DIAGNÓSTICO ===\n")
 
 if __name__ == "__main__":
+    # Necesario para que los trabajadores de análisis arranquen en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+    
     # Verificar si estamos en modo diagnóstico
     if len(sys.argv) > 1 and sys.argv[1] == "--diagnose":
         run_diagnostics()
@@ -0,0 +1,458 @@
+"""
+Load Test
+
+Este script reproduce una mezcla configurable de peticiones contra una instancia local de
+app.py o server.py (/upload, /analyze, /batch, /compare, /status y la cancelación de trabajos
+con DELETE /jobs/<id>) con una concurrencia fija (cada hilo envía la siguiente petición en
+cuanto recibe la respuesta) o con una tasa de llegadas (peticiones por segundo, sin esperar a
+las respuestas). Al terminar muestra, para cada operación y en total, el rendimiento, las
+latencias p50/p95/p99 y la tasa de errores, y puede guardar el resultado en JSON para seguir
+su evolución.
+
+En el modo de tasa de llegadas la latencia se mide desde el instante en que la petición
+debía enviarse, de modo que las esperas por falta de hilos también cuentan.
+
+Las respuestas 422 (PDF rechazado por las comprobaciones previas, por ejemplo un PDF
+escaneado) se cuentan como rechazos y no como errores.
+
+Uso:
+    python app.py                      (o PORT=5000 DEBUG_MODE=False python server.py)
+    python benchmarks/load_test.py --url http://127.0.0.1:5050 --concurrency 4 --duration 60
+    python benchmarks/load_test.py --rate 2 --mix upload=8,status=2 --json carga.json
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+# Valores por defecto
+DEFAULT_URL = 'http://127.0.0.1:5050'
+DEFAULT_MIX = 'upload=1'
+DEFAULT_CONCURRENCY = 4
+DEFAULT_DURATION = 30.0
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MAX_IN_FLIGHT = 64
+
+# PDF que se envían si no se indica ninguno
+DEFAULT_PDF_PATTERN = os.path.join(os.path.dirname(current_dir), 'samples_input', '*.pdf')
+
+# Contratos por petición de /batch
+BATCH_SIZE = 2
+
+# Segundos entre el envío de un análisis y su cancelación en la operación "cancel"
+CANCEL_DELAY = 0.2
+
+# La prueba solo se ejecuta contra instancias locales
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+# Percentiles de latencia del resumen
+PERCENTILES = (50, 95, 99)
+
+
+class LoadTestError(Exception):
+    """La prueba de carga no se puede ejecutar con la configuración indicada"""
+
+
+def percentile(sorted_values, p):
+    """Percentil p (0-100) de una lista ordenada, por el método del rango más próximo"""
+    if not sorted_values:
+        return None
+    rank = max(1, min(len(sorted_values), math.ceil(p / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def multipart_body(fields=(), files=()):
+    """
+    Cuerpo multipart/form-data de una petición.
+
+    Args:
+        fields (iterable): Pares (nombre, valor)
+        files (iterable): Tripletas (nombre del campo, nombre del archivo, contenido en bytes)
+
+    Returns:
+        tuple: (cuerpo, cabecera Content-Type)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/pdf\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class LoadTest:
+    """
+    Prueba de carga contra una instancia local.
+
+    Attributes:
+        url (str): URL base de la instancia
+        mix (list): Pares (operación, peso)
+        pdfs (list): Tripletas (nombre, contenido, peso) de los PDF enviados
+        timeout (float): Tiempo máximo de cada petición, en segundos
+        samples (list): Resultados de las peticiones: {'operation', 'outcome', 'status', 'latency', 'time'}
+    """
+
+    def __init__(self, url, mix, pdfs, timeout=DEFAULT_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.mix = mix
+        self.pdfs = pdfs
+        self.timeout = timeout
+        self.samples = []
+        self._lock = threading.Lock()
+        self._operations = {
+            'upload': self.op_upload,
+            'analyze': self.op_analyze,
+            'status': self.op_status,
+            'batch': self.op_batch,
+            'compare': self.op_compare,
+            'cancel': self.op_cancel,
+        }
+        unknown = [name for name, _ in mix if name not in self._operations]
+        if unknown:
+            raise LoadTestError(f"Operaciones desconocidas: {', '.join(unknown)}")
+
+    def request(self, method, path, body=None, content_type=None):
+        """
+        Envía una petición y lee la respuesta completa.
+
+        Returns:
+            tuple: (código HTTP, cuerpo de la respuesta)
+        """
+        headers = {'Content-Type': content_type} if content_type else {}
+        try:
+            with urlopen(Request(self.url + path, data=body, method=method, headers=headers),
+                         timeout=self.timeout) as response:
+                return response.status, response.read()
+        except HTTPError as e:
+            return e.code, e.read()
+
+    def pick_pdf(self, rng):
+        """PDF elegido según los pesos de la mezcla de PDF"""
+        name, data, _ = rng.choices(self.pdfs, weights=[weight for _, _, weight in self.pdfs])[0]
+        return name, data
+
+    def _upload(self, rng, job_id=None):
+        name, data = self.pick_pdf(rng)
+        fields = [('job_id', job_id)] if job_id else []
+        body, content_type = multipart_body(fields, [('file', name, data)])
+        return self.request('POST', '/upload', body, content_type)
+
+    def op_upload(self, rng):
+        return self._upload(rng)[0]
+
+    def op_analyze(self, rng):
+        return self.request('GET', '/analyze?format=json')[0]
+
+    def op_status(self, rng):
+        return self.request('GET', '/status')[0]
+
+    def op_batch(self, rng):
+        files = [('files', *self.pick_pdf(rng)) for _ in range(BATCH_SIZE)]
+        body, content_type = multipart_body(files=files)
+        status, content = self.request('POST', '/batch', body, content_type)
+        # Un lote interrumpido no llega a la línea "summary"
+        if status == 200 and b'"type": "summary"' not in content:
+            return 0
+        return status
+
+    def op_compare(self, rng):
+        body, content_type = multipart_body(files=[('old', *self.pick_pdf(rng)), ('new', *self.pick_pdf(rng))])
+        return self.request('POST', '/compare', body, content_type)[0]
+
+    def op_cancel(self, rng):
+        """
+        Envía un análisis y lo cancela al cabo de CANCEL_DELAY segundos. La latencia incluye esa
+        espera y el tiempo hasta que responde el análisis cancelado. 404 (el análisis ya había
+        terminado) no es un error.
+        """
+        job_id = uuid.uuid4().hex
+        upload = threading.Thread(target=self._upload, args=(random.Random(rng.random()), job_id), daemon=True)
+        upload.start()
+        time.sleep(CANCEL_DELAY)
+        status = self.request('DELETE', f'/jobs/{job_id}')[0]
+        upload.join(self.timeout)
+        return 200 if status == 404 else status
+
+    def run_operation(self, rng, scheduled=None):
+        """
+        Ejecuta una operación de la mezcla y guarda su resultado.
+
+        Args:
+            rng (Random): Generador aleatorio del hilo
+            scheduled (float, optional): Instante (perf_counter) en que debía enviarse; por
+                                         defecto, ahora
+        """
+        operation = rng.choices([name for name, _ in self.mix], weights=[weight for _, weight in self.mix])[0]
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            status = self._operations[operation](rng)
+            error = None
+        except (URLError, OSError) as e:
+            status, error = None, type(getattr(e, 'reason', e)).__name__
+        latency = time.perf_counter() - start
+        if status is not None and 200 <= status < 300:
+            outcome = 'ok'
+        elif status == 422:
+            outcome = 'rejected'
+        else:
+            outcome = 'error'
+        with self._lock:
+            self.samples.append({'operation': operation, 'outcome': outcome, 'latency': latency,
+                                 'status': status if error is None else error, 'time': time.perf_counter()})
+
+    def run_closed(self, concurrency, duration=None, requests=None, seed=0):
+        """Concurrencia fija: cada hilo envía la siguiente petición en cuanto recibe la respuesta"""
+        deadline = time.perf_counter() + duration if duration else None
+        remaining = [requests]
+
+        def take():
+            with self._lock:
+                if remaining[0] is None:
+                    return True
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def worker(index):
+            rng = random.Random(seed + index)
+            while (deadline is None or time.perf_counter() < deadline) and take():
+                self.run_operation(rng)
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate, duration=None, requests=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, poisson=False,
+                 seed=0):
+        """Tasa de llegadas: las peticiones se envían a `rate` por segundo sin esperar a las respuestas"""
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        scheduled = start
+        sent = 0
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            while (requests is None or sent < requests) and (not duration or scheduled < start + duration):
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.run_operation, random.Random(rng.random()), scheduled)
+                sent += 1
+                scheduled += rng.expovariate(rate) if poisson else 1 / rate
+
+    def summary(self, elapsed):
+        """
+        Resume los resultados.
+
+        Returns:
+            dict: {'total': resumen global, 'operations': operación -> resumen}, donde cada
+                  resumen tiene requests, ok, rejected, errors, error_rate, throughput,
+                  latencias (p50, p95, p99, mean, max, en segundos) y códigos de estado
+        """
+        def summarize(samples):
+            latencies = sorted(sample['latency'] for sample in samples)
+            counts = {'ok': 0, 'rejected': 0, 'error': 0}
+            statuses = {}
+            for sample in samples:
+                counts[sample['outcome']] += 1
+                statuses[str(sample['status'])] = statuses.get(str(sample['status']), 0) + 1
+            result = {
+                'requests': len(samples),
+                'ok': counts['ok'],
+                'rejected': counts['rejected'],
+                'errors': counts['error'],
+                'error_rate': round(counts['error'] / len(samples), 4) if samples else 0.0,
+                'throughput': round(len(samples) / elapsed, 3) if elapsed else 0.0,
+                'latency': {f'p{p}': round(percentile(latencies, p), 4) if latencies else None
+                            for p in PERCENTILES},
+                'statuses': statuses,
+            }
+            result['latency']['mean'] = round(sum(latencies) / len(latencies), 4) if latencies else None
+            result['latency']['max'] = round(latencies[-1], 4) if latencies else None
+            return result
+
+        operations = sorted({sample['operation'] for sample in self.samples})
+        return {
+            'total': summarize(self.samples),
+            'operations': {name: summarize([s for s in self.samples if s['operation'] == name])
+                           for name in operations},
+        }
+
+    def server_status(self):
+        """Estado de la instancia (/status de app.py), o None si no lo ofrece"""
+        try:
+            status, content = self.request('GET', '/status')
+            return json.loads(content.decode('utf-8')) if status == 200 else None
+        except (URLError, OSError, ValueError):
+            return None
+
+
+def parse_mix(text):
+    """Convierte "upload=8,status=2" en [('upload', 8.0), ('status', 2.0)]"""
+    mix = []
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition('=')
+        mix.append((name.strip(), float(weight) if weight else 1.0))
+    if not mix or all(weight <= 0 for _, weight in mix):
+        raise LoadTestError(f"Mezcla de operaciones no válida: {text}")
+    return mix
+
+
+def load_pdfs(specs, synthetic_pages=None):
+    """
+    Carga los PDF de la prueba.
+
+    Args:
+        specs (list): Rutas o patrones, con un peso opcional ("contrato.pdf:3")
+        synthetic_pages (list, optional): Tamaños (páginas) de contratos sintéticos que añadir
+
+    Returns:
+        list: Tripletas (nombre, contenido, peso)
+    """
+    pdfs = []
+    for spec in specs or [DEFAULT_PDF_PATTERN]:
+        pattern, weight = spec, 1.0
+        if ':' in spec and spec.rsplit(':', 1)[1].replace('.', '', 1).isdigit():
+            pattern, weight = spec.rsplit(':', 1)[0], float(spec.rsplit(':', 1)[1])
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            raise LoadTestError(f"No se encontró ningún PDF: {pattern}")
+        for path in paths:
+            with open(path, 'rb') as f:
+                pdfs.append((os.path.basename(path), f.read(), weight))
+
+    if synthetic_pages:
+        from benchmarks.synthetic_contracts import generate_contract, write_contract
+        with tempfile.TemporaryDirectory() as work_dir:
+            for pages in synthetic_pages:
+                path = write_contract(generate_contract(pages), work_dir, f'synthetic_{pages}p', formats=('pdf',))['pdf']
+                with open(path, 'rb') as f:
+                    pdfs.append((os.path.basename(path), f.read(), 1.0))
+    return pdfs
+
+
+def wait_until_ready(test, timeout=120.0):
+    """Espera a que la instancia responda (y, en app.py, a que los trabajadores estén listos)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, content = test.request('GET', '/status')
+            if status == 200 and json.loads(content.decode('utf-8')).get('ready', True):
+                return True
+            if status == 404 and test.request('GET', '/')[0] == 200:
+                return True
+        except (URLError, OSError, ValueError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def print_summary(result):
+    """Muestra el resumen por operación y total"""
+    header = f"{'operación':<10} {'peticiones':>10} {'ok':>6} {'rech.':>6} {'errores':>8} {'req/s':>8} " \
+             f"{'p50':>8} {'p95':>8} {'p99':>8}"
+    print(f"\n{header}\n{'-' * len(header)}")
+    rows = list(result['operations'].items()) + [('total', result['total'])]
+    for name, stats in rows:
+        latency = stats['latency']
+        values = ' '.join(f"{latency[f'p{p}']:8.3f}" if latency[f'p{p}'] is not None else f"{'-':>8}"
+                          for p in PERCENTILES)
+        print(f"{name:<10} {stats['requests']:>10} {stats['ok']:>6} {stats['rejected']:>6} "
+              f"{stats['errors']:>8} {stats['throughput']:>8.2f} {values}")
+    total = result['total']
+    print(f"\nTasa de errores: {total['error_rate'] * 100:.1f}%  Códigos: {total['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga contra una instancia local de app.py o server.py")
+    parser.add_argument('--url', default=DEFAULT_URL, help="URL base de la instancia local")
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help="Operaciones y pesos: upload, analyze, status, batch, compare, cancel (p. ej. upload=8,status=2)")
+    parser.add_argument('--pdf', action='append',
+                        help="PDF (o patrón) que enviar, con peso opcional: contrato.pdf:3. Se puede repetir")
+    parser.add_argument('--synthetic-pages', help="Añadir contratos sintéticos de estos tamaños (páginas, separados por comas)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Peticiones simultáneas")
+    parser.add_argument('--rate', type=float, help="Peticiones por segundo (en lugar de una concurrencia fija)")
+    parser.add_argument('--poisson', action='store_true', help="Llegadas de Poisson en lugar de equiespaciadas")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Peticiones simultáneas máximas con --rate")
+    parser.add_argument('--duration', type=float, help="Duración de la prueba, en segundos")
+    parser.add_argument('--requests', type=int, help="Número total de peticiones")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Tiempo máximo por petición, en segundos")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de la mezcla de operaciones y PDF")
+    parser.add_argument('--json', help="Guardar el resultado en un archivo JSON")
+    parser.add_argument('--history', help="Añadir el resumen como una línea a un archivo JSON Lines")
+    args = parser.parse_args()
+
+    try:
+        if urlparse(args.url).hostname not in LOCAL_HOSTS:
+            raise LoadTestError(f"La prueba solo se ejecuta contra instancias locales ({', '.join(LOCAL_HOSTS)})")
+        duration = args.duration if args.duration or args.requests else DEFAULT_DURATION
+        synthetic_pages = [int(p) for p in args.synthetic_pages.split(',')] if args.synthetic_pages else None
+        test = LoadTest(args.url, parse_mix(args.mix), load_pdfs(args.pdf, synthetic_pages), args.timeout)
+    except (LoadTestError, OSError, ValueError) as e:
+        print(f"[ERROR] load_test: {str(e)}")
+        return 2
+
+    if not wait_until_ready(test):
+        print(f"[ERROR] load_test: La instancia de {args.url} no responde")
+        return 2
+    mode = f"{args.rate:g} peticiones/s" if args.rate else f"concurrencia {args.concurrency}"
+    print(f"[INFO] load_test: {args.url}, {mode}, mezcla {args.mix}, {len(test.pdfs)} PDF")
+
+    started_at = time.time()
+    start = time.perf_counter()
+    if args.rate:
+        test.run_open(args.rate, duration, args.requests, args.max_in_flight, args.poisson, args.seed)
+    else:
+        test.run_closed(args.concurrency, duration, args.requests, args.seed)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started_at)),
+        'url': args.url,
+        'settings': {'mix': dict(test.mix), 'pdfs': [name for name, _, _ in test.pdfs],
+                     'concurrency': None if args.rate else args.concurrency, 'rate': args.rate,
+                     'poisson': args.poisson, 'duration': duration, 'requests': args.requests, 'seed': args.seed},
+        'python': platform.python_version(),
+        'elapsed': round(elapsed, 3),
+        **test.summary(elapsed),
+        'server': test.server_status(),
+    }
+    print_summary(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.history:
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({key: result[key] for key in ('started_at', 'url', 'settings', 'elapsed', 'total',
+                                                             'operations')}, ensure_ascii=False) + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Memory Benchmark
+
+Este script mide la memoria máxima de cada etapa del análisis (extracción, limpieza de saltos
+de página, división en secciones, reporte y HTML) con documentos sintéticos de tamaño
+creciente (ver synthetic_contracts). Para cada etapa registra el pico de tracemalloc y el
+pico de memoria residente (RSS), ajusta la curva de crecimiento y compara los MB de pico por
+MB de texto de entrada con la línea base guardada en memory_baseline.json.
+Si alguna etapa la supera (por ejemplo, por una copia accidental del texto del contrato), el
+script termina con código 1.
+
+Uso:
+    python benchmarks/memory_benchmark.py [--pages 10,20,40,80] [--json resultado.json]
+    python benchmarks/memory_benchmark.py --update-baseline
+"""
+import argparse
+import contextlib
+import gc
+import json
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+from benchmarks.synthetic_contracts import contract_text, generate_contract, write_contract
+
+# Línea base de memoria por MB de entrada de cada etapa
+BASELINE_FILE = os.path.join(current_dir, 'memory_baseline.json')
+
+# Tamaños por defecto (páginas) y margen sobre la línea base antes de considerar una regresión
+DEFAULT_PAGES = [10, 20, 40, 80]
+DEFAULT_TOLERANCE = 0.25
+
+# Etapas medidas, en orden
+STAGES = ['convert_pdf_to_text', 'standardize_page_breaks', 'split_contract_text', 'create_report',
+          'get_report_html']
+
+# Intervalo entre muestras de memoria residente, en segundos
+RSS_SAMPLE_INTERVAL = 0.01
+
+MB = 1024 * 1024
+
+
+class RSSSampler(threading.Thread):
+    """Muestrea la memoria residente del proceso y guarda el máximo"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        super().__init__(name='rss-sampler', daemon=True)
+        from inspector_functions.resource_limits import process_rss_mb
+        self._measure = process_rss_mb
+        self.interval = interval
+        self.start_rss = self.peak = process_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = self._measure()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def stop(self):
+        """Detiene el muestreo y devuelve el aumento máximo de memoria residente (MB)"""
+        self._stop_event.set()
+        self.join()
+        self._sample()
+        if self.start_rss is None or self.peak is None:
+            return None
+        return self.peak - self.start_rss
+
+
+def measure_stage(func, *args, **kwargs):
+    """
+    Ejecuta una etapa midiendo su memoria. tracemalloc debe estar activo.
+
+    Returns:
+        tuple: (resultado de la etapa, {'peak_mb', 'retained_mb', 'rss_peak_mb', 'seconds'})
+    """
+    gc.collect()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    sampler = RSSSampler()
+    sampler.start()
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    rss_peak = sampler.stop()
+    current, peak = tracemalloc.get_traced_memory()
+    return result, {
+        'peak_mb': round((peak - base) / MB, 3),
+        'retained_mb': round((current - base) / MB, 3),
+        'rss_peak_mb': round(rss_peak, 3) if rss_peak is not None else None,
+        'seconds': round(seconds, 3),
+    }
+
+
+def measure_document(pdf_path, work_dir):
+    """
+    Mide todas las etapas con un documento. Se ejecuta en un proceso nuevo por documento para
+    que la memoria liberada por un documento anterior no falsee la memoria residente.
+
+    Returns:
+        dict: Etapa -> medidas (ver measure_stage)
+    """
+    from inspector_functions.pdf_to_txt_pdfminer import convert_pdf_to_text
+    from inspector_functions.txt_cleaner import standardize_page_breaks
+    from inspector_functions.txt_to_txt_splitter import split_contract_text
+    from inspector_functions.create_report import create_report, get_report_html
+
+    raw_path = os.path.join(work_dir, 'output.txt')
+    ready_path = os.path.join(work_dir, 'output_ready.txt')
+    split_dir = os.path.join(work_dir, 'split')
+    report_dir = os.path.join(work_dir, 'report')
+    os.makedirs(split_dir, exist_ok=True)
+    os.makedirs(report_dir, exist_ok=True)
+
+    stages = {}
+    tracemalloc.start()
+    try:
+        text, stages['convert_pdf_to_text'] = measure_stage(convert_pdf_to_text, pdf_path)
+        with open(raw_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        del text
+        _, stages['standardize_page_breaks'] = measure_stage(standardize_page_breaks, raw_path, ready_path)
+        _, stages['split_contract_text'] = measure_stage(split_contract_text, ready_path, split_dir)
+        report, stages['create_report'] = measure_stage(create_report, pdf_path, report_dir, work_dir=work_dir)
+        _, stages['get_report_html'] = measure_stage(get_report_html, report, report_dir)
+    finally:
+        tracemalloc.stop()
+    if report.get('errors'):
+        raise RuntimeError(f"El análisis de {pdf_path} falló: {report['errors']}")
+    return stages
+
+
+def fit_growth(points):
+    """
+    Ajusta la curva de crecimiento de una etapa: recta pico = pendiente * entrada + constante
+    (la pendiente son los MB de pico por MB de entrada) y exponente de la ley de potencias
+    (1 = crecimiento lineal).
+
+    Args:
+        points (list): Pares (MB de entrada, MB de pico)
+
+    Returns:
+        dict: {'mb_per_mb', 'intercept_mb', 'exponent'}
+    """
+    if len(points) == 1:
+        x, y = points[0]
+        return {'mb_per_mb': round(y / x, 3), 'intercept_mb': 0.0, 'exponent': None}
+
+    def least_squares(pairs):
+        n = len(pairs)
+        mean_x = sum(x for x, _ in pairs) / n
+        mean_y = sum(y for _, y in pairs) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in pairs)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in pairs) / var_x if var_x else 0.0
+        return slope, mean_y - slope * mean_x
+
+    slope, intercept = least_squares(points)
+    positive = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    exponent = least_squares(positive)[0] if len(positive) > 1 else None
+    return {'mb_per_mb': round(slope, 3), 'intercept_mb': round(intercept, 3),
+            'exponent': round(exponent, 3) if exponent is not None else None}
+
+
+def run_benchmark(pages_list, work_dir):
+    """
+    Genera los documentos sintéticos y mide cada uno en un proceso nuevo.
+
+    Returns:
+        dict: {'documents': [...], 'fit': etapa -> ajuste (ver fit_growth)}
+    """
+    # Sin caché de páginas, para medir la extracción completa de cada documento
+    os.environ['INSPECTOR_PAGE_CACHE_SIZE'] = '0'
+    context = multiprocessing.get_context('spawn')
+
+    documents = []
+    for pages in pages_list:
+        document_dir = os.path.join(work_dir, f'pages_{pages}')
+        os.makedirs(document_dir, exist_ok=True)
+        contract = generate_contract(pages)
+        pdf_path = write_contract(contract, document_dir, 'input', formats=('pdf',))['pdf']
+        input_mb = len(contract_text(contract).encode('utf-8')) / MB
+        page_count = len(contract['pages'])
+
+        print(f"[INFO] memory_benchmark: {page_count} páginas ({input_mb:.2f} MB de texto)...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            stages = executor.submit(measure_document, pdf_path, document_dir).result()
+        for name in STAGES:
+            stages[name]['mb_per_mb'] = round(stages[name]['peak_mb'] / input_mb, 3)
+        documents.append({'pages': page_count, 'input_mb': round(input_mb, 4),
+                          'pdf_mb': round(os.path.getsize(pdf_path) / MB, 4), 'stages': stages})
+
+    fit = {name: fit_growth([(doc['input_mb'], doc['stages'][name]['peak_mb']) for doc in documents])
+           for name in STAGES}
+    return {'documents': documents, 'fit': fit}
+
+
+def check_regressions(fit, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara los MB de pico por MB de entrada de cada etapa con la línea base.
+
+    Returns:
+        list: Mensajes de las etapas que superan la línea base en más de `tolerance`
+    """
+    regressions = []
+    for name, stage_fit in fit.items():
+        reference = baseline.get('stages', {}).get(name)
+        if not reference:
+            continue
+        limit = reference['mb_per_mb'] * (1 + tolerance)
+        if stage_fit['mb_per_mb'] > limit:
+            regressions.append(f"{name}: {stage_fit['mb_per_mb']:.2f} MB por MB de entrada "
+                               f"(línea base {reference['mb_per_mb']:.2f}, límite {limit:.2f})")
+    return regressions
+
+
+def print_results(results):
+    """Muestra las medidas de cada documento y el ajuste de cada etapa"""
+    for doc in results['documents']:
+        print(f"\n{doc['pages']} páginas, {doc['input_mb']:.2f} MB de texto, PDF de {doc['pdf_mb']:.2f} MB")
+        for name in STAGES:
+            stage = doc['stages'][name]
+            rss = f"{stage['rss_peak_mb']:.1f}" if stage['rss_peak_mb'] is not None else "?"
+            print(f"  {name:<24} pico {stage['peak_mb']:8.2f} MB ({stage['mb_per_mb']:6.2f} MB/MB)  "
+                  f"RSS +{rss} MB  {stage['seconds']:.2f} s")
+    print("\nCrecimiento (MB de pico por MB de entrada, exponente)")
+    for name, stage_fit in results['fit'].items():
+        exponent = f"{stage_fit['exponent']:.2f}" if stage_fit['exponent'] is not None else "-"
+        print(f"  {name:<24} {stage_fit['mb_per_mb']:6.2f} MB/MB + {stage_fit['intercept_mb']:.2f} MB  "
+              f"exponente {exponent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria máxima por etapa con contratos sintéticos de tamaño creciente")
+    parser.add_argument('--pages', default=','.join(str(p) for p in DEFAULT_PAGES),
+                        help="Tamaños de los documentos, en páginas, separados por comas")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Archivo de la línea base")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Margen sobre la línea base antes de fallar (0.25 = 25%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Guardar el resultado como línea base")
+    parser.add_argument('--json', help="Guardar el resultado completo en un archivo JSON")
+    parser.add_argument('--keep', help="Directorio donde conservar los documentos generados")
+    args = parser.parse_args()
+
+    pages_list = sorted(int(p) for p in args.pages.split(',') if p.strip())
+    work_dir = args.keep or tempfile.mkdtemp(prefix='memory_benchmark_')
+    try:
+        results = run_benchmark(pages_list, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    results['python'] = platform.python_version()
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {'python': results['python'], 'pages': pages_list, 'stages': results['fit']}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"\nNo hay línea base ({args.baseline}); ejecute con --update-baseline para crearla")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = check_regressions(results['fit'], baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Regresiones de memoria:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print("\n✅ Sin regresiones de memoria respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Synthetic Contracts
+
+Este script genera contratos sintéticos a partir de las secciones de template/, como texto
+(con los saltos de página que produce la extracción) y como PDF sencillo con capa de texto,
+para probar la extracción, la división en secciones y los analizadores con tamaños como los
+de los acuerdos marco más largos, sin conexión y sin PDF reales. Se controlan:
+
+    pages               Número aproximado de páginas (de 10 a 2.000 o más): el cuerpo de los
+                        artículos se repite hasta alcanzarlo
+    articles            Número de artículos. El último es siempre el de notificaciones y firmas
+                        (artículo 15 de las plantillas); el resto reutiliza en ciclo los artículos
+                        1 a 14. El esquema por defecto solo conoce los artículos 1 a 15: con menos
+                        faltan secciones y con más los artículos sobrantes quedan dentro de article_15
+    edit_rate           Fracción de palabras del cuerpo que se sustituyen, eliminan o duplican
+    page_break_density  Saltos de página por cada 100 líneas de texto (2 = páginas de 50 líneas)
+
+La generación es determinista para una misma semilla.
+
+Uso:
+    python benchmarks/synthetic_contracts.py salida/ --pages 10,100,2000 [--articles 15]
+           [--edit-rate 0.02] [--page-break-density 2] [--seed 0] [--format txt,pdf]
+"""
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import textwrap
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+# Plantillas de las que se generan los contratos
+TEMPLATE_DIR = os.path.join(os.path.dirname(current_dir), 'template')
+
+# Valores por defecto
+DEFAULT_PAGES = 10
+DEFAULT_ARTICLES = 15
+DEFAULT_EDIT_RATE = 0.0
+DEFAULT_PAGE_BREAK_DENSITY = 2.0
+
+# Artículos de las plantillas: los 14 primeros se reutilizan en ciclo; el 15 (notificaciones
+# y bloque de firmas) cierra siempre el contrato y no se repite
+TEMPLATE_ARTICLES = 15
+
+# Caracteres por línea del texto y de los PDF
+CHARS_PER_LINE = 90
+
+# Encabezado de un artículo ("Article 4: Restrictions")
+ARTICLE_HEADING_PATTERN = re.compile(r'^Article\s*\d+\s*:\s*')
+
+
+def read_template(name):
+    """Texto de una sección de template/"""
+    with open(os.path.join(TEMPLATE_DIR, f'template_{name}.txt'), 'r', encoding='utf-8-sig') as f:
+        return f.read().strip()
+
+
+def wrap_lines(text):
+    """Divide un texto en líneas de CHARS_PER_LINE caracteres como máximo"""
+    lines = []
+    for line in text.replace('\t', ' ').split('\n'):
+        lines.extend(textwrap.wrap(line, CHARS_PER_LINE) or [''])
+    return lines
+
+
+def template_vocabulary(texts):
+    """Palabras en minúsculas de las plantillas, para las ediciones (nunca forman un encabezado)"""
+    return sorted({word for text in texts for word in text.split() if word.isalpha() and word.islower()})
+
+
+def apply_edits(text, edit_rate, rng, vocabulary):
+    """
+    Edita una fracción `edit_rate` de las palabras de un texto: cada palabra editada se
+    sustituye por otra del vocabulario, se elimina o se duplica. Los saltos de línea se conservan.
+
+    Returns:
+        tuple: (texto editado, número de ediciones)
+    """
+    if edit_rate <= 0:
+        return text, 0
+    edits = 0
+    lines = []
+    for line in text.split('\n'):
+        words = []
+        for word in line.split(' '):
+            if not word or rng.random() >= edit_rate:
+                words.append(word)
+                continue
+            edits += 1
+            operation = rng.randrange(3)
+            if operation == 0:
+                words.append(rng.choice(vocabulary))
+            elif operation == 2:
+                words.extend((word, word))
+        lines.append(' '.join(words))
+    return '\n'.join(lines), edits
+
+
+def generate_contract(pages=DEFAULT_PAGES, articles=DEFAULT_ARTICLES, edit_rate=DEFAULT_EDIT_RATE,
+                      page_break_density=DEFAULT_PAGE_BREAK_DENSITY, seed=0):
+    """
+    Genera un contrato sintético.
+
+    Args:
+        pages (int): Número aproximado de páginas
+        articles (int): Número de artículos (el último es el de notificaciones y firmas)
+        edit_rate (float): Fracción de palabras del cuerpo editadas (0 a 1)
+        page_break_density (float): Saltos de página por cada 100 líneas
+        seed (int): Semilla de las ediciones
+
+    Returns:
+        dict: {'pages': páginas (listas de líneas, sin el número de página), 'articles',
+               'repeat': repeticiones del cuerpo de cada artículo, 'edits', 'lines_per_page',
+               'settings': parámetros de la generación}
+    """
+    if articles < 1:
+        raise ValueError("El contrato debe tener al menos un artículo")
+    if page_break_density <= 0:
+        raise ValueError("La densidad de saltos de página debe ser positiva")
+    lines_per_page = max(1, round(100 / page_break_density))
+    rng = random.Random(seed)
+
+    head = [read_template(name) for name in ('tittle', 'between', 'and', 'preamble')]
+    templates = [read_template(f'article_{i}') for i in range(1, TEMPLATE_ARTICLES + 1)]
+    vocabulary = template_vocabulary(templates)
+
+    # Encabezado y cuerpo de cada artículo, renumerados
+    contract_articles = []
+    for number in range(1, articles + 1):
+        if number == articles:
+            template = templates[-1]
+        else:
+            template = templates[(number - 1) % (TEMPLATE_ARTICLES - 1)]
+        heading, _, body = template.partition('\n')
+        heading = ARTICLE_HEADING_PATTERN.sub(f'Article {number}: ', heading)
+        contract_articles.append((heading, body.strip(), number != articles))
+
+    # Repeticiones del cuerpo de los artículos para alcanzar el número de páginas
+    fixed_lines = len(wrap_lines('\n\n'.join(head + [heading if repeated else f'{heading}\n\n{body}'
+                                                     for heading, body, repeated in contract_articles])))
+    body_lines = sum(len(wrap_lines(body)) + 1 for _, body, repeated in contract_articles if repeated)
+    target_lines = pages * lines_per_page
+    repeat = max(1, math.ceil((target_lines - fixed_lines) / body_lines)) if body_lines else 1
+
+    sections = list(head)
+    edits = 0
+    for heading, body, repeated in contract_articles:
+        copies = []
+        for _ in range(repeat if repeated else 1):
+            copy, copy_edits = apply_edits(body, edit_rate, rng, vocabulary) if repeated else (body, 0)
+            copies.append(copy)
+            edits += copy_edits
+        sections.append('\n\n'.join([heading] + copies))
+
+    lines = wrap_lines('\n\n'.join(sections))
+    return {
+        'pages': [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)],
+        'articles': articles,
+        'repeat': repeat,
+        'edits': edits,
+        'lines_per_page': lines_per_page,
+        'settings': {'pages': pages, 'articles': articles, 'edit_rate': edit_rate,
+                     'page_break_density': page_break_density, 'seed': seed},
+    }
+
+
+def page_texts(contract):
+    """
+    Texto de cada página como lo devuelve la extracción (extract_pdf_pages): las líneas de la
+    página, su número en una línea aparte y un salto de página (form feed) al final.
+
+    Returns:
+        list: Texto de cada página
+    """
+    return ['\n'.join(lines) + f'\n\n{number}\n\f' for number, lines in enumerate(contract['pages'], start=1)]
+
+
+def contract_text(contract):
+    """Texto completo del contrato, con los saltos de página de la extracción"""
+    return ''.join(page_texts(contract))
+
+
+def _pdf_string(line):
+    """Cadena literal de PDF (WinAnsiEncoding) de una línea de texto"""
+    data = line.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def write_text_pdf(contract, path):
+    """
+    Escribe el contrato como PDF mínimo con capa de texto (Helvetica, una línea de texto por
+    línea del contrato y el número de página al pie).
+
+    Args:
+        contract (dict): Contrato (ver generate_contract)
+        path (str): Ruta del PDF
+    """
+    leading = min(14, 700 / max(contract['lines_per_page'], 1))
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    kids = []
+    for number, lines in enumerate(contract['pages'], start=1):
+        content = (b'BT /F1 10 Tf %.2f TL 50 790 Td\n' % leading
+                   + b''.join(_pdf_string(line) + b' Tj T*\n' for line in lines)
+                   + b'ET\nBT /F1 9 Tf 290 40 Td (%d) Tj ET' % number)
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> '
+                       b'/Contents %d 0 R >>' % len(objects))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(kids)
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        f.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+
+def write_contract(contract, output_dir, name, formats=('txt', 'pdf')):
+    """
+    Guarda un contrato como texto y/o PDF.
+
+    Args:
+        contract (dict): Contrato (ver generate_contract)
+        output_dir (str): Directorio de salida
+        name (str): Nombre de los archivos, sin extensión
+        formats (tuple): 'txt' y/o 'pdf'
+
+    Returns:
+        dict: Formato -> ruta del archivo
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    if 'txt' in formats:
+        paths['txt'] = os.path.join(output_dir, f'{name}.txt')
+        with open(paths['txt'], 'w', encoding='utf-8') as f:
+            f.write(contract_text(contract))
+    if 'pdf' in formats:
+        paths['pdf'] = os.path.join(output_dir, f'{name}.pdf')
+        write_text_pdf(contract, paths['pdf'])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera contratos sintéticos (texto y PDF) a partir de template/")
+    parser.add_argument('output_dir', help="Directorio de salida")
+    parser.add_argument('--pages', default=str(DEFAULT_PAGES),
+                        help="Tamaños de los contratos, en páginas, separados por comas")
+    parser.add_argument('--articles', type=int, default=DEFAULT_ARTICLES, help="Número de artículos")
+    parser.add_argument('--edit-rate', type=float, default=DEFAULT_EDIT_RATE,
+                        help="Fracción de palabras editadas (0 a 1)")
+    parser.add_argument('--page-break-density', type=float, default=DEFAULT_PAGE_BREAK_DENSITY,
+                        help="Saltos de página por cada 100 líneas")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de las ediciones")
+    parser.add_argument('--format', default='txt,pdf', help="Formatos: txt, pdf o ambos separados por comas")
+    args = parser.parse_args()
+
+    formats = tuple(fmt.strip() for fmt in args.format.split(','))
+    for pages in (int(p) for p in args.pages.split(',') if p.strip()):
+        contract = generate_contract(pages, args.articles, args.edit_rate, args.page_break_density, args.seed)
+        name = f'synthetic_{pages}p_{args.articles}a_s{args.seed}'
+        paths = write_contract(contract, args.output_dir, name, formats)
+        print(f"{len(contract['pages'])} páginas, {contract['edits']} ediciones: {', '.join(paths.values())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,7 @@ a = Analysis(
         ('functions.js', '.'),
         ('inspector_functions/*', 'inspector_functions'),
         ('template/*', 'template'),
+        ('template_sets', 'template_sets'),
         # Asegurarse de que la carpeta output_split existe en el ejecutable
         ('output_split', 'output_split'),
     ],
@@ -1,6 +1,33 @@
 // URL base del servidor local
 const SERVER_BASE_URL = 'http://127.0.0.1:5050';
 
+// Con ?stream en la URL, la página servida por server.py analiza los contratos con su propio
+// servidor y muestra cada paso del análisis en cuanto llega (/analyze/stream)
+const STREAM_SERVER_BASE_URL = new URLSearchParams(window.location.search).has('stream')
+    ? window.location.origin
+    : null;
+
+// Genera un identificador aleatorio (32 caracteres hexadecimales)
+function newRandomId() {
+    return Array.from(crypto.getRandomValues(new Uint8Array(16)), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Identificador de esta pestaña: el servidor cancela el análisis anterior de la misma sesión
+// cuando se sube otro contrato
+const SESSION_ID = newRandomId();
+
+// Análisis en curso (se cancela si se cierra o abandona la página)
+let currentJobId = null;
+
+function cancelCurrentJob() {
+    if (!currentJobId) return;
+    // keepalive permite que la petición termine aunque la página se esté cerrando
+    fetch(`${SERVER_BASE_URL}/jobs/${currentJobId}`, { method: 'DELETE', keepalive: true }).catch(() => {});
+    currentJobId = null;
+}
+
+window.addEventListener('pagehide', cancelCurrentJob);
+
 // Función para mostrar un mensaje flash que desaparece después de 2 segundos
 function showFlashMessage(message, type = 'success', container = null, duration = 2000) {
     // Si no se proporciona un contenedor, usar el panel principal
@@ -53,18 +80,30 @@ function checkServerConnection() {
     const indicator = document.getElementById('server-indicator');
     const statusText = document.getElementById('server-status-text');
     
-    // Añadir timestamp para evitar caché
-    const url = `${SERVER_BASE_URL}/status?t=${Date.now()}`;
+    // Añadir timestamp para evitar caché (server.py responde en la ruta principal)
+    const url = STREAM_SERVER_BASE_URL
+        ? `${STREAM_SERVER_BASE_URL}/?t=${Date.now()}`
+        : `${SERVER_BASE_URL}/status?t=${Date.now()}`;
     
     fetch(url, { method: 'GET' })
     .then(response => {
         if (!response.ok) {
             throw new Error(`Error HTTP: ${response.status}`);
         }
+        return response.json();
+    })
+    .then(data => {
+        // Mientras los trabajadores se precalientan, el servidor responde pero aún no está listo
+        if (data.ready === false) {
+            indicator.classList.remove('online');
+            indicator.classList.add('offline');
+            statusText.textContent = 'Preparando...';
+            setTimeout(checkServerConnection, 500);
+            return;
+        }
         indicator.classList.remove('offline');
         indicator.classList.add('online');
         statusText.textContent = 'Conectado';
-        return response.json();
     })
     .catch(error => {
         console.error('Error al verificar conexión:', error);
@@ -78,6 +117,8 @@ function checkServerConnection() {
 function toggleReportCard(id) {
     const reportCard = document.getElementById(id);
     if (reportCard) {
+        // Las tarjetas del historial se renderizan la primera vez que se expanden
+        renderReportCardContent(reportCard);
         reportCard.classList.toggle('expanded');
         
         // Cambiar el ícono del botón
@@ -104,13 +145,136 @@ function removeElement(id, event) {
             if (element.parentNode) {
                 element.parentNode.removeChild(element);
                 
-                // Eliminar también del almacenamiento local
-                removeReportFromLocalStorage(id);
+                // Eliminar también del historial
+                removeReportFromStorage(id);
             }
         }, 300);
     }
 }
 
+// Función para mostrar el error de una carga junto con los datos del archivo
+function showUploadError(panelContainer, file, error) {
+    panelContainer.innerHTML = `
+        <div class="contract-info">
+            <h3>Archivo cargado:</h3>
+            <p><strong>Nombre:</strong> ${file.name}</p>
+            <p><strong>Tamaño:</strong> ${(file.size / 1024).toFixed(2)} KB</p>
+            <p><strong>Tipo:</strong> ${file.type}</p>
+        </div>
+    `;
+    
+    // Mostrar mensaje de error como flash
+    if (error.failure) {
+        showFlashMessage(`❌ ${error.message}`, 'error', panelContainer, 5000);
+    } else {
+        showFlashMessage(`❌ Error al procesar el archivo: ${error.message}. Por favor, verifica que el servidor local esté funcionando.`, 'error', panelContainer, 5000);
+    }
+}
+
+// Función para leer una respuesta NDJSON y llamar a onRecord con cada registro en cuanto llega
+function readNdjson(response, onRecord) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    function readChunk() {
+        return reader.read().then(({ done, value }) => {
+            buffer += decoder.decode(value, { stream: !done });
+            // La última línea puede estar incompleta: se guarda hasta el siguiente fragmento
+            const lines = buffer.split('\n');
+            buffer = done ? '' : lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onRecord(JSON.parse(line)));
+            return done ? undefined : readChunk();
+        });
+    }
+    
+    return readChunk();
+}
+
+// Función para analizar un contrato con server.py mostrando cada paso en cuanto llega
+function streamContractAnalysis(file, panelContainer) {
+    const reportId = 'report-' + Date.now();
+    const title = `Análisis del Contrato: ${file.name}`;
+    // Reporte que se completa con cada paso, para mostrarlo y guardarlo en el historial
+    const report = { statistics: {}, paragraph_analysis: {} };
+    const fragments = [];
+    let reportCard = null;
+    let finished = false;
+    
+    // Muestra lo que se tiene hasta ahora con la misma tabla que el historial
+    function renderPartialReport() {
+        if (!reportCard) {
+            panelContainer.innerHTML = "";
+            reportCard = createReportCard(reportId, title, '');
+            panelContainer.appendChild(reportCard);
+            toggleReportCard(reportId);
+        }
+        reportCard.querySelector('.report-card-content').innerHTML =
+            renderCompactReport(compactReport(reportId, title, report));
+    }
+    
+    function handleRecord({ stage, elapsed, ...record }) {
+        switch (stage) {
+            case 'document':
+            case 'report':
+                Object.assign(report, record);
+                break;
+            case 'sections':
+                report.section_pages = record.section_pages;
+                break;
+            case 'section_statistics':
+                report.statistics[record.section] = record.statistics;
+                break;
+            case 'paragraph_analysis':
+                report.paragraph_analysis = record.paragraph_analysis;
+                break;
+            case 'fragment':
+                fragments.push(record.html);
+                return;
+            case 'done':
+                // El HTML completo del servidor sustituye a la tabla provisional
+                finished = true;
+                reportCard.querySelector('.report-card-content').innerHTML = fragments.join('\n');
+                return;
+            case 'error':
+                throw new Error(record.error);
+            default:
+                return;
+        }
+        renderPartialReport();
+    }
+    
+    const formData = new FormData();
+    formData.append('file', file);
+    // Solo guardar el archivo: el análisis llega por partes desde /analyze/stream
+    formData.append('analyze', '0');
+    
+    return fetch(`${STREAM_SERVER_BASE_URL}/upload`, { method: 'POST', body: formData })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            throw new Error(data.error || 'Error desconocido');
+        }
+        return fetch(`${STREAM_SERVER_BASE_URL}/analyze/stream`);
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json().then(data => {
+                throw new Error(data.error || `Error HTTP: ${response.status} ${response.statusText}`);
+            });
+        }
+        return readNdjson(response, handleRecord);
+    })
+    .then(() => {
+        if (!finished) {
+            throw new Error('El servidor cerró la conexión antes de terminar el análisis');
+        }
+        showFlashMessage('✅ Archivo procesado correctamente', 'success');
+        saveReport(compactReport(reportId, title, report));
+        console.log('Reporte mostrado en el panel');
+    });
+}
+
 // Función para cargar y procesar un contrato PDF
 function loadContract() {
     const fileInput = document.createElement('input');
@@ -137,8 +301,21 @@ function loadContract() {
         
         console.log('Enviando archivo al servidor local...');
         
+        if (STREAM_SERVER_BASE_URL) {
+            streamContractAnalysis(file, panelContainer).catch(error => {
+                console.error('Error en la petición:', error);
+                showUploadError(panelContainer, file, error);
+            });
+            return;
+        }
+        
+        const jobId = newRandomId();
+        currentJobId = jobId;
+        
         const formData = new FormData();
         formData.append('file', file);
+        formData.append('job_id', jobId);
+        formData.append('session', SESSION_ID);
         
         // Enviar el archivo al servidor local
         fetch(`${SERVER_BASE_URL}/upload`, {
@@ -147,14 +324,21 @@ function loadContract() {
         })
         .then(response => {
             console.log('Respuesta recibida del servidor:', response.status, response.statusText);
-            if (!response.ok) {
+            // Las respuestas de error del análisis (422, 409, 500) también traen el motivo en JSON
+            return response.json().catch(() => {
                 throw new Error(`Error HTTP: ${response.status} ${response.statusText}`);
-            }
-            return response.json();
+            });
         })
         .then(data => {
             console.log('Datos recibidos del servidor:', data);
             
+            // Ignorar la respuesta de un análisis sustituido por otra carga
+            if (jobId !== currentJobId) {
+                console.log('Respuesta de un análisis anterior ignorada:', jobId);
+                return;
+            }
+            currentJobId = null;
+            
             if (data.success) {
                 // Eliminar todos los elementos de información previos
                 panelContainer.innerHTML = "";
@@ -170,23 +354,13 @@ function loadContract() {
                     const reportId = 'report-' + Date.now();
                     
                     // Mostrar el reporte como tarjeta colapsable
-                    panelContainer.innerHTML += `
-                        <div id="${reportId}" class="report-card">
-                            <div class="report-card-header" onclick="toggleReportCard('${reportId}')">
-                                <h3>Análisis del Contrato: ${file.name}</h3>
-                                <div style="display: flex; align-items: center;">
-                                    <button type="button" class="report-card-toggle" title="Expandir/Colapsar">▼</button>
-                                    <button type="button" class="report-card-close" title="Cerrar reporte" onclick="removeElement('${reportId}', event)">×</button>
-                                </div>
-                            </div>
-                            <div class="report-card-content">
-                                ${data.html}
-                            </div>
-                        </div>
-                    `;
+                    const title = `Análisis del Contrato: ${file.name}`;
+                    panelContainer.appendChild(createReportCard(reportId, title, data.html));
                     
-                    // Guardar el reporte en localStorage
-                    saveReportToLocalStorage(reportId, file.name, data.html);
+                    // Guardar el registro compacto del reporte en IndexedDB
+                    if (data.report) {
+                        saveReport(compactReport(reportId, title, data.report));
+                    }
                     
                     // Expandir automáticamente la tarjeta
                     setTimeout(() => toggleReportCard(reportId), 100);
@@ -195,152 +369,364 @@ function loadContract() {
                 }
             } else {
                 console.error('Error en la respuesta del servidor:', data.error);
-                throw new Error(data.error || 'Error desconocido');
+                const error = new Error(data.error || 'Error desconocido');
+                // El PDF fue rechazado (comprobaciones previas o límites): el servidor funciona
+                error.failure = data.failure || null;
+                throw error;
             }
         })
         .catch(error => {
             console.error('Error en la petición:', error);
-            
-            // Mostrar información del archivo
-            panelContainer.innerHTML = `
-                <div class="contract-info">
-                    <h3>Archivo cargado:</h3>
-                    <p><strong>Nombre:</strong> ${file.name}</p>
-                    <p><strong>Tamaño:</strong> ${(file.size / 1024).toFixed(2)} KB</p>
-                    <p><strong>Tipo:</strong> ${file.type}</p>
-                </div>
-            `;
-            
-            // Mostrar mensaje de error como flash
-            showFlashMessage(`❌ Error al procesar el archivo: ${error.message}. Por favor, verifica que el servidor local esté funcionando.`, 'error', panelContainer, 5000);
+            if (currentJobId !== null && jobId !== currentJobId) return;
+            currentJobId = null;
+            showUploadError(panelContainer, file, error);
         });
     };
     
     fileInput.click();
 }
 
-// Función para guardar un reporte en localStorage
-function saveReportToLocalStorage(reportId, title, htmlContent) {
-    try {
-        // Obtener los reportes existentes o inicializar un arreglo vacío
-        let savedReports = JSON.parse(localStorage.getItem('contractReports')) || [];
+// Historial de reportes en IndexedDB
+// Se guarda solo un registro compacto por reporte (identificadores y estadísticas numéricas);
+// el HTML se genera bajo demanda al expandir la tarjeta.
+const REPORTS_DB_NAME = 'contractInspector';
+const REPORTS_DB_VERSION = 1;
+const REPORTS_STORE = 'reports';
+const LEGACY_STORAGE_KEY = 'contractReports';
+const REPORT_CARDS_PER_FRAME = 20;
+const STAT_KEYS = ['word_count', 'period_count', 'comma_count', 's_count',
+                   'a_count', 'e_count', 'i_count', 'o_count', 'u_count'];
+const STAT_HEADERS = ['Art.', 'Pág.', 'palabras', 'puntos.', 'comas.', 's', 'a', 'e', 'i', 'o', 'u',
+                      'Párrafos (Contrato)', 'Párrafos (Plantilla)', 'Relación', 'z máx.'];
+
+let reportsDbPromise = null;
+
+// Función para abrir (una sola vez) la base de datos de reportes
+function openReportsDB() {
+    if (reportsDbPromise) return reportsDbPromise;
+    
+    reportsDbPromise = new Promise((resolve, reject) => {
+        if (!window.indexedDB) {
+            reject(new Error('IndexedDB no está disponible en este navegador'));
+            return;
+        }
         
-        // Añadir el nuevo reporte
-        savedReports.push({
-            id: reportId,
-            title: title,
-            html: htmlContent,
-            date: new Date().toISOString()
-        });
+        const openRequest = indexedDB.open(REPORTS_DB_NAME, REPORTS_DB_VERSION);
         
-        // Limitar a los 5 reportes más recientes para no sobrecargar el localStorage
-        if (savedReports.length > 5) {
-            savedReports = savedReports.slice(-5);
+        openRequest.onupgradeneeded = () => {
+            const db = openRequest.result;
+            if (!db.objectStoreNames.contains(REPORTS_STORE)) {
+                const store = db.createObjectStore(REPORTS_STORE, { keyPath: 'id' });
+                store.createIndex('date', 'date');
+            }
+        };
+        openRequest.onsuccess = () => resolve(openRequest.result);
+        openRequest.onerror = () => reject(openRequest.error);
+    });
+    
+    return reportsDbPromise;
+}
+
+// Función para ejecutar una operación sobre el almacén de reportes
+function withReportsStore(mode, operation) {
+    return openReportsDB().then(db => new Promise((resolve, reject) => {
+        const transaction = db.transaction(REPORTS_STORE, mode);
+        const result = operation(transaction.objectStore(REPORTS_STORE));
+        transaction.oncomplete = () => resolve(result && 'result' in result ? result.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+        transaction.onabort = () => reject(transaction.error);
+    }));
+}
+
+// Función para reducir el reporte del servidor a un registro compacto
+function compactReport(reportId, title, report) {
+    const statistics = {};
+    Object.entries(report.statistics || {}).forEach(([section, data]) => {
+        if (data.output_stats && data.template_stats) {
+            statistics[section] = {
+                output: STAT_KEYS.map(key => data.output_stats[key]),
+                template: STAT_KEYS.map(key => data.template_stats[key]),
+                zMax: maxZScore(data.z_scores)
+            };
+        } else {
+            statistics[section] = { error: true };
         }
-        
-        // Guardar en localStorage
-        localStorage.setItem('contractReports', JSON.stringify(savedReports));
-        console.log('Reporte guardado en localStorage:', reportId);
+    });
+    
+    const paragraphs = {};
+    Object.entries(report.paragraph_analysis || {}).forEach(([section, data]) => {
+        paragraphs[section] = 'error' in data
+            ? { error: true }
+            : { output: data.output_paragraphs, template: data.template_paragraphs, ratio: data.ratio };
+    });
+    
+    return {
+        id: reportId,
+        title: title,
+        date: new Date().toISOString(),
+        inputFile: report.input_file,
+        reportDate: report.date,
+        pageCount: report.page_count,
+        status: report.status,
+        errors: report.errors || [],
+        warnings: report.warnings || [],
+        statistics: statistics,
+        paragraphs: paragraphs,
+        sectionPages: report.section_pages || {}
+    };
+}
+
+// Función para guardar un reporte en el historial
+function saveReport(record) {
+    return withReportsStore('readwrite', store => store.put(record))
+        .then(() => console.log('Reporte guardado en IndexedDB:', record.id))
+        .catch(error => console.error('Error al guardar el reporte en IndexedDB:', error));
+}
+
+// Función para eliminar un reporte del historial
+function removeReportFromStorage(reportId) {
+    return withReportsStore('readwrite', store => store.delete(reportId))
+        .then(() => console.log('Reporte eliminado de IndexedDB:', reportId))
+        .catch(error => console.error('Error al eliminar el reporte de IndexedDB:', error));
+}
+
+// Función para leer un único reporte del historial
+function getSavedReport(reportId) {
+    return withReportsStore('readonly', store => store.get(reportId));
+}
+
+// Función para migrar (una sola vez) los reportes antiguos guardados en localStorage
+function migrateLegacyReports() {
+    const legacy = localStorage.getItem(LEGACY_STORAGE_KEY);
+    if (!legacy) return Promise.resolve();
+    
+    let legacyReports = [];
+    try {
+        legacyReports = JSON.parse(legacy) || [];
     } catch (error) {
-        console.error('Error al guardar el reporte en localStorage:', error);
+        console.error('Error al leer los reportes antiguos de localStorage:', error);
     }
+    
+    return withReportsStore('readwrite', store => {
+        legacyReports.forEach(report => store.put({
+            id: report.id,
+            title: report.title,
+            date: report.date,
+            legacyHtml: report.html
+        }));
+    }).then(() => {
+        localStorage.removeItem(LEGACY_STORAGE_KEY);
+        console.log(`Migrados ${legacyReports.length} reportes desde localStorage`);
+    });
 }
 
-// Función para eliminar un reporte del localStorage
-function removeReportFromLocalStorage(reportId) {
-    try {
-        // Obtener los reportes existentes
-        const savedReports = JSON.parse(localStorage.getItem('contractReports')) || [];
+// Función para escapar texto antes de insertarlo como HTML
+function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+}
+
+// Función para formatear un conteo como fracción contrato/plantilla
+function formatStatFraction(outputValue, templateValue) {
+    if (templateValue === 0) {
+        return outputValue > 0 ? 'inf' : '1';
+    }
+    return `${outputValue}/${templateValue}`;
+}
+
+// Función para obtener la puntuación z de mayor valor absoluto de una sección
+function maxZScore(zScores) {
+    const values = Object.values(zScores || {}).filter(z => typeof z === 'number');
+    if (!values.length) return null;
+    return values.reduce((best, z) => Math.abs(z) > Math.abs(best) ? z : best);
+}
+
+// Función para formatear las páginas de una sección ("3" o "3-4")
+function formatPageSpan(pages) {
+    if (!pages) return '-';
+    const [firstPage, lastPage] = pages;
+    return firstPage === lastPage ? `${firstPage}` : `${firstPage}-${lastPage}`;
+}
+
+// Función para generar el HTML de un reporte a partir de su registro compacto
+function renderCompactReport(record) {
+    if (record.legacyHtml) return record.legacyHtml;
+    
+    const html = ['<div class="report-container">'];
+    html.push(`<p><strong>Archivo:</strong> ${escapeHtml(record.inputFile || record.title)}<br>`
+        + `<strong>Fecha:</strong> ${escapeHtml(record.reportDate || record.date)}<br>`
+        + `<strong>Páginas:</strong> ${record.pageCount}</p>`);
+    
+    [['report-errors', 'Errores encontrados:', record.errors],
+     ['report-warnings', 'Advertencias:', record.warnings]].forEach(([className, heading, items]) => {
+        if (items && items.length) {
+            html.push(`<div class="${className}"><h3>${heading}</h3><ul>`);
+            items.forEach(item => html.push(`<li>${escapeHtml(item)}</li>`));
+            html.push('</ul></div>');
+        }
+    });
+    
+    html.push('<table class="report-table"><thead><tr>');
+    STAT_HEADERS.forEach(header => html.push(`<th>${header}</th>`));
+    html.push('</tr></thead><tbody>');
+    
+    // Solo incluir los artículos (1-15), igual que el reporte del servidor
+    for (let i = 1; i <= 15; i++) {
+        const stats = record.statistics[`article_${i}`];
+        const paragraphs = record.paragraphs[`article_${i}`];
+        const pages = (record.sectionPages || {})[`article_${i}`];
+        const cells = [i, formatPageSpan(pages)];
         
-        // Filtrar el reporte a eliminar
-        const filteredReports = savedReports.filter(report => report.id !== reportId);
+        if (!stats) {
+            cells.push(...STAT_KEYS.map(() => '-'));
+        } else if (stats.error) {
+            cells.push(...STAT_KEYS.map(() => 'ERROR'));
+        } else {
+            cells.push(...stats.output.map((value, index) => formatStatFraction(value, stats.template[index])));
+        }
         
-        // Guardar la lista actualizada
-        localStorage.setItem('contractReports', JSON.stringify(filteredReports));
-        console.log('Reporte eliminado de localStorage:', reportId);
-    } catch (error) {
-        console.error('Error al eliminar el reporte de localStorage:', error);
+        if (!paragraphs) {
+            cells.push('-', '-', '-');
+        } else if (paragraphs.error) {
+            cells.push('ERROR', '-', '-');
+        } else {
+            cells.push(paragraphs.output, paragraphs.template, paragraphs.ratio);
+        }
+        
+        const zMax = stats && !stats.error ? stats.zMax : null;
+        cells.push(typeof zMax === 'number' ? `${zMax >= 0 ? '+' : ''}${zMax.toFixed(2)}` : '-');
+        
+        html.push('<tr>' + cells.map(cell => `<td>${escapeHtml(cell)}</td>`).join('') + '</tr>');
+    }
+    
+    html.push('</tbody></table></div>');
+    return html.join('');
+}
+
+// Función para crear la tarjeta de un reporte (el contenido se renderiza al expandirla)
+function createReportCard(reportId, title, contentHtml = null) {
+    const card = document.createElement('div');
+    card.id = reportId;
+    card.className = 'report-card';
+    card.innerHTML = `
+        <div class="report-card-header" onclick="toggleReportCard('${reportId}')">
+            <h3>${escapeHtml(title)}</h3>
+            <div style="display: flex; align-items: center;">
+                <button type="button" class="report-card-toggle" title="Expandir/Colapsar">▼</button>
+                <button type="button" class="report-card-close" title="Cerrar reporte" onclick="removeElement('${reportId}', event)">×</button>
+            </div>
+        </div>
+        <div class="report-card-content"></div>
+    `;
+    
+    if (contentHtml !== null) {
+        card.querySelector('.report-card-content').innerHTML = contentHtml;
+        card.dataset.rendered = 'true';
     }
+    
+    return card;
+}
+
+// Función para renderizar bajo demanda el contenido de una tarjeta del historial
+function renderReportCardContent(reportCard) {
+    if (reportCard.dataset.rendered) return;
+    reportCard.dataset.rendered = 'true';
+    
+    getSavedReport(reportCard.id)
+        .then(record => {
+            const content = reportCard.querySelector('.report-card-content');
+            content.innerHTML = record ? renderCompactReport(record) : '<p class="error">Reporte no encontrado</p>';
+        })
+        .catch(error => {
+            console.error('Error al leer el reporte desde IndexedDB:', error);
+            delete reportCard.dataset.rendered;
+        });
 }
 
-// Función para cargar reportes guardados desde localStorage
+// Función para cargar reportes guardados desde IndexedDB
 function loadSavedReports() {
-    try {
-        // Obtener los reportes guardados
-        const savedReports = JSON.parse(localStorage.getItem('contractReports')) || [];
-        
-        if (savedReports.length > 0) {
-            const panelContainer = document.getElementById('panel-container');
+    const panelContainer = document.getElementById('panel-container');
+    let pending = [];
+    let loaded = 0;
+    
+    // Insertar las tarjetas por bloques para no bloquear el hilo principal
+    const flush = () => {
+        if (!pending.length) return;
+        const fragment = document.createDocumentFragment();
+        pending.forEach(record => fragment.appendChild(createReportCard(record.id, record.title)));
+        pending = [];
+        requestAnimationFrame(() => panelContainer.appendChild(fragment));
+    };
+    
+    migrateLegacyReports()
+        .catch(error => console.error('Error al migrar reportes de localStorage:', error))
+        .then(() => openReportsDB())
+        .then(db => new Promise((resolve, reject) => {
+            const transaction = db.transaction(REPORTS_STORE, 'readonly');
+            const cursorRequest = transaction.objectStore(REPORTS_STORE).index('date').openCursor();
             
-            // Mostrar mensaje flash informando que se han cargado reportes
-            if (savedReports.length > 0) {
-                showFlashMessage(`ℹ️ Se han cargado ${savedReports.length} reportes guardados`, 'info');
+            cursorRequest.onsuccess = () => {
+                const cursor = cursorRequest.result;
+                if (!cursor) {
+                    flush();
+                    resolve(loaded);
+                    return;
+                }
+                pending.push({ id: cursor.value.id, title: cursor.value.title });
+                loaded++;
+                if (pending.length >= REPORT_CARDS_PER_FRAME) flush();
+                cursor.continue();
+            };
+            cursorRequest.onerror = () => reject(cursorRequest.error);
+        }))
+        .then(count => {
+            if (count > 0) {
+                showFlashMessage(`ℹ️ Se han cargado ${count} reportes guardados`, 'info');
             }
-            
-            // Mostrar cada reporte como una tarjeta
-            savedReports.forEach(report => {
-                panelContainer.innerHTML += `
-                    <div id="${report.id}" class="report-card">
-                        <div class="report-card-header" onclick="toggleReportCard('${report.id}')">
-                            <h3>${report.title}</h3>
-                            <div style="display: flex; align-items: center;">
-                                <button type="button" class="report-card-toggle" title="Expandir/Colapsar">▼</button>
-                                <button type="button" class="report-card-close" title="Cerrar reporte" onclick="removeElement('${report.id}', event)">×</button>
-                            </div>
-                        </div>
-                        <div class="report-card-content">
-                            ${report.html}
-                        </div>
-                    </div>
-                `;
-            });
-            
-            console.log(`Cargados ${savedReports.length} reportes desde localStorage`);
-        }
-    } catch (error) {
-        console.error('Error al cargar reportes desde localStorage:', error);
-    }
+            console.log(`Cargados ${count} reportes desde IndexedDB`);
+        })
+        .catch(error => console.error('Error al cargar reportes desde IndexedDB:', error));
 }
 
 // Función para limpiar todos los reportes guardados
 function clearSavedReports() {
-    try {
-        // Verificar si hay reportes guardados
-        const savedReports = JSON.parse(localStorage.getItem('contractReports')) || [];
-        
-        if (savedReports.length === 0) {
-            showFlashMessage('ℹ️ No hay reportes guardados para eliminar', 'info');
-            return;
-        }
-        
-        // Eliminar los reportes del localStorage
-        localStorage.removeItem('contractReports');
-        
-        // Eliminar las tarjetas de reporte del DOM
-        const panelContainer = document.getElementById('panel-container');
-        const reportCards = panelContainer.querySelectorAll('.report-card');
-        
-        // Animar la eliminación de cada tarjeta
-        reportCards.forEach((card, index) => {
-            setTimeout(() => {
-                card.style.opacity = '0';
-                card.style.transform = 'scale(0.9)';
+    withReportsStore('readonly', store => store.count())
+        .then(count => {
+            if (!count) {
+                showFlashMessage('ℹ️ No hay reportes guardados para eliminar', 'info');
+                return;
+            }
+            
+            // Eliminar los reportes de IndexedDB
+            return withReportsStore('readwrite', store => store.clear()).then(() => {
+                // Eliminar las tarjetas de reporte del DOM
+                const panelContainer = document.getElementById('panel-container');
+                const reportCards = panelContainer.querySelectorAll('.report-card');
                 
-                setTimeout(() => {
-                    if (card.parentNode) {
-                        card.parentNode.removeChild(card);
-                    }
-                }, 300);
-            }, index * 100); // Eliminar con un pequeño retraso entre cada tarjeta para efecto visual
+                // Animar la eliminación de cada tarjeta
+                reportCards.forEach((card, index) => {
+                    setTimeout(() => {
+                        card.style.opacity = '0';
+                        card.style.transform = 'scale(0.9)';
+                        
+                        setTimeout(() => {
+                            if (card.parentNode) {
+                                card.parentNode.removeChild(card);
+                            }
+                        }, 300);
+                    }, Math.min(index, 20) * 100); // Pequeño retraso entre tarjetas, acotado para historiales grandes
+                });
+                
+                // Mostrar mensaje de éxito
+                showFlashMessage('✅ Todos los reportes han sido eliminados', 'success');
+                console.log('Todos los reportes eliminados de IndexedDB');
+            });
+        })
+        .catch(error => {
+            console.error('Error al limpiar reportes:', error);
+            showFlashMessage('❌ Error al eliminar reportes: ' + error.message, 'error');
         });
-        
-        // Mostrar mensaje de éxito
-        showFlashMessage('✅ Todos los reportes han sido eliminados', 'success');
-        console.log('Todos los reportes eliminados de localStorage');
-    } catch (error) {
-        console.error('Error al limpiar reportes:', error);
-        showFlashMessage('❌ Error al eliminar reportes: ' + error.message, 'error');
-    }
 }
 
 // Inicializar cuando el DOM esté listo
@@ -355,6 +741,6 @@ document.addEventListener('DOMContentLoaded', () => {
     // Verificar la conexión con el servidor
     checkServerConnection();
     
-    // Cargar reportes guardados desde localStorage
+    // Cargar reportes guardados desde IndexedDB
     loadSavedReports();
 });
\ No newline at end of file
@@ -0,0 +1,751 @@
+"""
+Analysis Pool
+
+Este módulo mantiene un conjunto de procesos trabajadores precalentados que ejecutan
+los análisis de contratos. Antes de declararse listo, cada trabajador importa la pila
+de extracción (pdfminer, tabulate y analizadores), precarga las tablas de codificación
+de fuentes y compila las plantillas, de modo que el primer contrato tras el arranque
+no paga esos costes.
+"""
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+# Número de trabajadores por defecto (configurable con INSPECTOR_WORKERS)
+DEFAULT_WORKERS = 2
+
+# Número de directorios de trabajos que se conservan completos (configurable con INSPECTOR_KEEP_JOBS)
+DEFAULT_KEEP_JOBS = 20
+
+# Número de análisis completos cuyo reporte y secciones se conservan para /compare, contando
+# los trabajos conservados completos (configurable con INSPECTOR_KEEP_REPORTS)
+DEFAULT_KEEP_REPORTS = 500
+
+# Archivos de un trabajo que se conservan tras limpiarlo (los que lee compare_versions)
+KEPT_JOB_FILES = ('contract_report.json', 'output_split')
+
+# Subdirectorio del directorio base donde cada trabajo guarda sus archivos
+JOBS_DIR_NAME = 'jobs'
+
+# Segundos que se espera a que un trabajo cancelado se detenga antes de reiniciar su trabajador
+CANCEL_GRACE_SECONDS = 5.0
+
+# Umbrales de reciclado de los trabajadores (configurables con INSPECTOR_RECYCLE_JOBS e
+# INSPECTOR_RECYCLE_RSS_MB; 0 los desactiva). Un trabajador que los supera se reemplaza por uno
+# nuevo, que se calienta mientras el anterior sigue atendiendo trabajos
+DEFAULT_RECYCLE_JOBS = 200
+DEFAULT_RECYCLE_RSS_MB = 512
+
+# Número de reemplazos de trabajadores recientes que se muestran en /status y los diagnósticos
+RECYCLE_EVENTS_KEPT = 20
+
+# Intervalo (en segundos) con el que un hilo sin trabajos comprueba si su reemplazo está listo
+RECYCLE_POLL_SECONDS = 0.5
+
+# Directorio de plantillas que se precarga durante el calentamiento
+TEMPLATE_DIR = os.path.join(Path(__file__).parent.parent, "template")
+
+
+class AnalysisError(Exception):
+    """Error producido al ejecutar un trabajo en un proceso trabajador"""
+
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.details = details or {}
+
+
+class WorkerCrashed(AnalysisError):
+    """El proceso trabajador terminó inesperadamente mientras ejecutaba un trabajo"""
+
+
+class JobCancelled(AnalysisError):
+    """El trabajo se canceló (DELETE /jobs/<id>, desconexión del cliente o una carga más reciente)"""
+
+
+def _env_int(name, default):
+    """Lee un entero de una variable de entorno, con valor por defecto"""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def default_worker_count():
+    """Número de trabajadores configurado (variable de entorno INSPECTOR_WORKERS)"""
+    return max(1, _env_int('INSPECTOR_WORKERS', DEFAULT_WORKERS))
+
+
+def recycle_thresholds():
+    """
+    Umbrales de reciclado configurados.
+
+    Returns:
+        dict: {'jobs': trabajos por trabajador o None, 'rss_mb': MB de memoria residente o None}
+    """
+    return {
+        'jobs': max(0, _env_int('INSPECTOR_RECYCLE_JOBS', DEFAULT_RECYCLE_JOBS)) or None,
+        'rss_mb': max(0, _env_int('INSPECTOR_RECYCLE_RSS_MB', DEFAULT_RECYCLE_RSS_MB)) or None,
+    }
+
+
+def warm_up(warmup_pdf=None):
+    """
+    Prepara el proceso actual para analizar contratos sin costes de arranque.
+
+    Args:
+        warmup_pdf (str, optional): PDF pequeño que se pasa por todo el proceso de análisis
+
+    Returns:
+        dict: Tiempo (en segundos) de cada fase del calentamiento
+    """
+    timings = {}
+
+    # Importar la pila de extracción y los analizadores
+    start = time.perf_counter()
+    from inspector_functions import create_report
+    # Al importarse carga las métricas de las fuentes estándar, glyphlist y encodingdb
+    from pdfminer.pdffont import FontMetricsDB
+    FontMetricsDB.get_metrics('Helvetica')
+    timings['imports'] = time.perf_counter() - start
+
+    # Precargar los mapas de Unicode indicados (p. ej. "Adobe-Japan1"), si se configuran
+    start = time.perf_counter()
+    from pdfminer.cmapdb import CMapDB
+    for name in filter(None, os.environ.get('INSPECTOR_PRELOAD_CMAPS', '').split(',')):
+        try:
+            CMapDB.get_unicode_map(name.strip())
+        except Exception as e:
+            print(f"[WARNING] analysis_pool: No se pudo precargar el mapa {name}: {str(e)}")
+    timings['cmaps'] = time.perf_counter() - start
+
+    # Compilar las plantillas
+    start = time.perf_counter()
+    from inspector_functions import template_store
+    template_store.get_template_set(TEMPLATE_DIR)
+    template_store.get_template_index()
+    timings['templates'] = time.perf_counter() - start
+
+    # Opcionalmente, pasar un PDF pequeño por todo el proceso
+    if warmup_pdf and os.path.exists(warmup_pdf):
+        start = time.perf_counter()
+        work_dir = tempfile.mkdtemp(prefix='inspector_warmup_')
+        try:
+            create_report.create_report(warmup_pdf, os.path.join(work_dir, 'output_split'), work_dir=work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        timings['pipeline'] = time.perf_counter() - start
+
+    return timings
+
+
+def run_report_job(input_pdf, output_dir, work_dir, extraction_profile=None, template_set=None, cancel_event=None,
+                   profile=False):
+    """
+    Genera el reporte de un contrato y su HTML.
+
+    Args:
+        input_pdf (str): Ruta al PDF del contrato
+        output_dir (str): Directorio donde guardar las secciones
+        work_dir (str): Directorio de trabajo del análisis
+        extraction_profile (str, optional): Perfil de extracción (ver pdf_to_txt_pdfminer)
+        template_set (str, optional): Conjunto de plantillas (ver template_store). Si es None, se elige automáticamente
+        cancel_event (Event, optional): Evento que, al activarse, detiene el análisis entre páginas y entre pasos
+        profile (bool): Perfilar el análisis (ver profiling). También se activa con INSPECTOR_PROFILE
+
+    Returns:
+        dict: {'report': reporte, 'html': HTML del reporte o None si hubo errores}
+              y, si se perfiló, 'profile' con los archivos del perfil
+    """
+    from inspector_functions.create_report import create_report, get_report_html
+    from inspector_functions import profiling
+
+    def run():
+        report = create_report(input_pdf, output_dir, work_dir=work_dir, extraction_profile=extraction_profile,
+                               template_set=template_set, cancel_event=cancel_event)
+        html = None
+        if not report.get('errors') and report.get('status') != 'cancelled':
+            html = get_report_html(report, output_dir)
+        return {'report': report, 'html': html}
+
+    if not (profile or profiling.profiling_enabled()):
+        return run()
+    # El directorio de trabajo se llama como el trabajo (ver create_job_directory)
+    with profiling.profile_job(os.path.basename(os.path.normpath(work_dir)), input_pdf) as profile_info:
+        result = run()
+    result['profile'] = profile_info
+    return result
+
+
+# Tipos de trabajo que puede ejecutar un trabajador
+JOB_HANDLERS = {
+    'report': run_report_job,
+}
+
+
+def _run_limited_job(kind, kwargs, cancel_event, limits):
+    """
+    Ejecuta un trabajo con el límite de CPU configurado.
+
+    Returns:
+        tuple: (resultado, True si el trabajador debe reemplazarse tras el trabajo)
+    """
+    from inspector_functions.resource_limits import ResourceLimitExceeded, cpu_limit, failed_report_result
+
+    try:
+        with cpu_limit(limits['cpu_seconds']):
+            return JOB_HANDLERS[kind](cancel_event=cancel_event, **kwargs), False
+    except ResourceLimitExceeded as e:
+        print(f"[WARNING] analysis_pool: {str(e)}")
+        return failed_report_result(e, kwargs), False
+    except MemoryError:
+        # Tras quedarse sin memoria el estado del proceso no es fiable: se reemplaza
+        error = ResourceLimitExceeded('memory', limits['memory_mb'] or 0)
+        print(f"[WARNING] analysis_pool: {str(error)}")
+        return failed_report_result(error, kwargs), True
+
+
+def _worker_main(conn, worker_id, warmup_pdf, cancel_event):
+    """Bucle principal de un proceso trabajador"""
+    from inspector_functions.resource_limits import apply_memory_limit, configured_limits
+
+    limits = configured_limits()
+    try:
+        # El límite de memoria se aplica antes del calentamiento para que cubra todo el proceso
+        limits['applied'] = apply_memory_limit(limits['memory_mb'])
+        timings = warm_up(warmup_pdf)
+    except Exception as e:
+        conn.send(('warmup_failed', None, {'error': str(e), 'traceback': traceback.format_exc()}))
+        return
+
+    # Recargar en segundo plano las plantillas que cambien mientras el trabajador está activo
+    from inspector_functions import template_store
+    template_store.start_watcher()
+
+    conn.send(('ready', None, {'pid': os.getpid(), 'timings': timings, 'limits': limits}))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        job_id, kind, kwargs = message
+        retire = False
+        try:
+            result, retire = _run_limited_job(kind, kwargs, cancel_event, limits)
+            conn.send(('result', job_id, result))
+        except Exception as e:
+            conn.send(('error', job_id, {'error': str(e), 'traceback': traceback.format_exc()}))
+        if retire:
+            break
+
+
+class AnalysisJob:
+    """
+    Trabajo enviado al pool.
+
+    Attributes:
+        id (str): Identificador del trabajo
+        kind (str): Tipo de trabajo (clave de JOB_HANDLERS)
+        kwargs (dict): Argumentos del trabajo
+        future (Future): Resultado del trabajo
+    """
+
+    def __init__(self, kind, kwargs, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted_at = time.time()
+        self.worker_id = None
+        self.cancel_requested_at = None
+
+
+class WorkerProcess:
+    """Proceso trabajador y su canal de comunicación con el proceso principal"""
+
+    def __init__(self, context, worker_id, warmup_pdf=None):
+        self.id = worker_id
+        self.jobs_done = 0
+        self.ready_info = None
+        self.current_job = None
+        self.started_at = time.time()
+        # Memoria residente tras el último trabajo (en MB)
+        self.rss_mb = None
+        # El trabajador terminó por sí mismo tras el último trabajo y hay que reemplazarlo
+        self.retired = False
+        # Evento compartido con el proceso para cancelar el trabajo en curso
+        self.cancel_event = context.Event()
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, worker_id, warmup_pdf, self.cancel_event),
+            name=f'inspector-worker-{worker_id}',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def wait_ready(self):
+        """Espera a que el trabajador termine el calentamiento"""
+        try:
+            kind, _, payload = self.conn.recv()
+        except (EOFError, OSError):
+            raise WorkerCrashed(f"El trabajador {self.id} terminó durante el calentamiento")
+        if kind != 'ready':
+            raise AnalysisError(f"Error en el calentamiento del trabajador {self.id}: {payload['error']}", payload)
+        self.ready_info = payload
+        return payload
+
+    def run(self, job):
+        """
+        Ejecuta un trabajo en el proceso y devuelve su resultado.
+
+        Raises:
+            JobCancelled: Si el trabajo se canceló. Si el proceso no se detiene en
+                          CANCEL_GRACE_SECONDS, se termina y hay que reemplazarlo
+        """
+        from inspector_functions.resource_limits import process_rss_mb
+
+        # El evento se limpia aquí (y no en el trabajador) para que una cancelación tardía
+        # del trabajo anterior no afecte a este
+        self.cancel_event.clear()
+        self.current_job = job
+        try:
+            self.conn.send((job.id, job.kind, job.kwargs))
+            while not self.conn.poll(0.2):
+                if (job.cancel_requested_at is not None
+                        and time.time() - job.cancel_requested_at > CANCEL_GRACE_SECONDS):
+                    self.process.terminate()
+                    raise WorkerCrashed(
+                        f"El trabajador {self.id} no se detuvo tras cancelar el trabajo {job.id}",
+                        {'cancelled': True}
+                    )
+                if not self.process.is_alive():
+                    break
+            kind, _, payload = self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            raise WorkerCrashed(
+                f"El trabajador {self.id} terminó inesperadamente (código {self.process.exitcode})",
+                {'exitcode': self.process.exitcode}
+            )
+        finally:
+            self.current_job = None
+            self.jobs_done += 1
+            self.rss_mb = process_rss_mb(self.process.pid)
+        failure = payload.get('report', {}).get('failure', {}) if isinstance(payload, dict) else {}
+        if failure.get('code') == 'resource_limit' and failure.get('resource') == 'memory':
+            self.retired = True
+        if kind == 'error':
+            raise AnalysisError(payload['error'], payload)
+        if job.cancel_requested_at is not None and payload.get('report', {}).get('status') == 'cancelled':
+            raise JobCancelled(f"Trabajo {job.id} cancelado")
+        return payload
+
+    def recycle_reason(self, thresholds):
+        """
+        Indica si el trabajador debe reciclarse.
+
+        Args:
+            thresholds (dict): Umbrales de recycle_thresholds()
+
+        Returns:
+            str: 'jobs' o 'rss' según el umbral superado, o None
+        """
+        if thresholds['jobs'] and self.jobs_done >= thresholds['jobs']:
+            return 'jobs'
+        if thresholds['rss_mb'] and self.rss_mb is not None and self.rss_mb >= thresholds['rss_mb']:
+            return 'rss'
+        return None
+
+    def cancel(self, job):
+        """Pide al proceso que detenga el trabajo indicado si es el que está ejecutando"""
+        if self.current_job is job:
+            self.cancel_event.set()
+            return True
+        return False
+
+    def stop(self, timeout=5.0):
+        """Detiene el proceso trabajador"""
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class AnalysisPool:
+    """
+    Conjunto de procesos trabajadores precalentados.
+
+    Cada trabajador tiene un hilo en el proceso principal que toma trabajos de una
+    cola común en cuanto el trabajador queda libre. Si un trabajador termina de forma
+    inesperada, el trabajo falla con WorkerCrashed y el trabajador se reemplaza.
+
+    Los trabajadores que superan los umbrales de reciclado (número de trabajos o memoria
+    residente) se reemplazan sin perder capacidad: el nuevo trabajador se calienta mientras
+    el anterior sigue atendiendo trabajos, y solo entonces se detiene el anterior.
+    """
+
+    def __init__(self, size=None, warmup_pdf=None):
+        self.size = size or default_worker_count()
+        self.warmup_pdf = warmup_pdf
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._workers = {}
+        self._busy = set()
+        # Trabajos encolados o en curso, por identificador
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closing = False
+        self.started_at = None
+        self.recycle = recycle_thresholds()
+        # Huecos cuyo reemplazo se está calentando y últimos reemplazos de trabajadores
+        self._recycling = set()
+        self.recycle_events = collections.deque(maxlen=RECYCLE_EVENTS_KEPT)
+        self.recycled = 0
+
+    def start(self):
+        """Arranca los trabajadores en segundo plano (el calentamiento no bloquea)"""
+        self.started_at = time.time()
+        for slot in range(self.size):
+            thread = threading.Thread(target=self._serve, args=(slot,), name=f'inspector-pool-{slot}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[INFO] analysis_pool: Arrancando {self.size} trabajadores")
+
+    @property
+    def ready(self):
+        """Indica si todos los trabajadores han terminado el calentamiento"""
+        with self._lock:
+            return len(self._workers) == self.size
+
+    def status(self):
+        """Devuelve el estado del pool para /status y los diagnósticos"""
+        from inspector_functions.resource_limits import process_rss_mb
+
+        with self._lock:
+            workers = [
+                {'id': worker.id, 'pid': worker.process.pid, 'jobs_done': worker.jobs_done,
+                 'busy': slot in self._busy, 'recycling': slot in self._recycling,
+                 'uptime': round(time.time() - worker.started_at, 1),
+                 'warmup': worker.ready_info.get('timings'), 'limits': worker.ready_info.get('limits')}
+                for slot, worker in sorted(self._workers.items())
+            ]
+            recycle = dict(self.recycle, recycled=self.recycled, events=list(self.recycle_events))
+        for worker in workers:
+            rss_mb = process_rss_mb(worker['pid'])
+            worker['rss_mb'] = round(rss_mb, 1) if rss_mb is not None else None
+        return {
+            'ready': len(workers) == self.size,
+            'size': self.size,
+            'ready_workers': len(workers),
+            'queued': self._jobs.qsize(),
+            'pending_jobs': len(self._pending),
+            'workers': workers,
+            'recycle': recycle,
+        }
+
+    def submit(self, kind, job_id=None, **kwargs):
+        """
+        Encola un trabajo.
+
+        Args:
+            kind (str): Tipo de trabajo (clave de JOB_HANDLERS)
+            job_id (str, optional): Identificador del trabajo; si es None se genera uno
+
+        Returns:
+            AnalysisJob: El trabajo encolado; su resultado está en job.future
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+        job = AnalysisJob(kind, kwargs, job_id)
+        with self._lock:
+            self._pending[job.id] = job
+        job.future.add_done_callback(lambda _: self._forget(job))
+        self._jobs.put(job)
+        return job
+
+    def pending_job_ids(self):
+        """Identificadores de los trabajos encolados o en curso"""
+        with self._lock:
+            return set(self._pending)
+
+    def _forget(self, job):
+        with self._lock:
+            if self._pending.get(job.id) is job:
+                del self._pending[job.id]
+
+    def cancel(self, job_id):
+        """
+        Cancela un trabajo. Si aún está en la cola, no llega a ejecutarse; si está en curso,
+        el trabajador lo detiene en la siguiente página o paso y queda libre para otro trabajo.
+
+        Args:
+            job_id (str): Identificador del trabajo
+
+        Returns:
+            bool: True si el trabajo existía y no había terminado
+        """
+        with self._lock:
+            job = self._pending.get(job_id)
+            workers = list(self._workers.values())
+        if job is None:
+            return False
+        if job.cancel_requested_at is None:
+            job.cancel_requested_at = time.time()
+        if job.future.cancel():
+            print(f"[INFO] analysis_pool: Trabajo {job_id} cancelado antes de empezar")
+            return True
+        for worker in workers:
+            if worker.cancel(job):
+                print(f"[INFO] analysis_pool: Cancelando el trabajo {job_id} en el trabajador {worker.id}")
+                break
+        return True
+
+    def shutdown(self):
+        """Detiene todos los trabajadores"""
+        self._closing = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=10)
+
+    def _spawn(self, slot):
+        """Crea un trabajador para el hueco indicado y espera a que esté listo"""
+        while not self._closing:
+            worker_id = f'{slot}-{uuid.uuid4().hex[:6]}'
+            worker = WorkerProcess(self._context, worker_id, self.warmup_pdf)
+            try:
+                info = worker.wait_ready()
+            except AnalysisError as e:
+                print(f"[ERROR] analysis_pool: {str(e)}")
+                worker.stop()
+                time.sleep(1.0)
+                continue
+            print(f"[INFO] analysis_pool: Trabajador {worker_id} listo (pid {info['pid']}, "
+                  f"calentamiento {sum(info['timings'].values()):.2f}s)")
+            with self._lock:
+                self._workers[slot] = worker
+            return worker
+        return None
+
+    def _replace(self, slot, old_worker, new_worker, reason):
+        """
+        Pone un trabajador ya listo en el hueco de otro, detiene el anterior y registra el
+        reemplazo.
+        """
+        with self._lock:
+            self._workers[slot] = new_worker
+            self._recycling.discard(slot)
+            self.recycled += 1
+            self.recycle_events.append({
+                'time': time.time(),
+                'slot': slot,
+                'reason': reason,
+                'old_worker': old_worker.id,
+                'new_worker': new_worker.id,
+                'jobs_done': old_worker.jobs_done,
+                'rss_mb': round(old_worker.rss_mb, 1) if old_worker.rss_mb is not None else None,
+                'warmup': round(sum(new_worker.ready_info['timings'].values()), 3),
+            })
+        old_worker.stop(timeout=1.0)
+        print(f"[INFO] analysis_pool: Trabajador {old_worker.id} reemplazado por {new_worker.id} ({reason})")
+        return new_worker
+
+    def _start_replacement(self, slot, reason):
+        """Arranca el reemplazo de un trabajador; se calienta en segundo plano"""
+        worker_id = f'{slot}-{uuid.uuid4().hex[:6]}'
+        with self._lock:
+            self._recycling.add(slot)
+        print(f"[INFO] analysis_pool: Calentando el trabajador {worker_id} para reciclar el hueco {slot} ({reason})")
+        return WorkerProcess(self._context, worker_id, self.warmup_pdf)
+
+    def _finish_replacement(self, slot, replacement):
+        """
+        Espera a que el reemplazo termine el calentamiento.
+
+        Returns:
+            bool: True si está listo; si falló, se detiene y se devuelve False
+        """
+        try:
+            replacement.wait_ready()
+            return True
+        except AnalysisError as e:
+            print(f"[ERROR] analysis_pool: {str(e)}")
+            replacement.stop(timeout=1.0)
+            with self._lock:
+                self._recycling.discard(slot)
+            return False
+
+    def _serve(self, slot):
+        """Hilo que entrega trabajos de la cola a un trabajador"""
+        worker = self._spawn(slot)
+        # Reemplazo que se calienta mientras el trabajador actual sigue atendiendo trabajos
+        replacement = replacement_reason = None
+        while worker is not None and not self._closing:
+            # El reemplazo está listo (o falló) cuando ha enviado su mensaje de calentamiento
+            if replacement is not None and replacement.conn.poll():
+                if self._finish_replacement(slot, replacement):
+                    worker = self._replace(slot, worker, replacement, replacement_reason)
+                replacement = replacement_reason = None
+
+            try:
+                job = self._jobs.get(timeout=RECYCLE_POLL_SECONDS if replacement is not None else None)
+            except queue.Empty:
+                continue
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
+
+            job.worker_id = worker.id
+            with self._lock:
+                self._busy.add(slot)
+            try:
+                job.future.set_result(worker.run(job))
+            except WorkerCrashed as e:
+                print(f"[ERROR] analysis_pool: {str(e)}; reemplazando trabajador")
+                if e.details.get('cancelled'):
+                    e = JobCancelled(f"Trabajo {job.id} cancelado", e.details)
+                job.future.set_exception(e)
+                # Si ya se estaba calentando un reemplazo, se usa ese
+                if replacement is not None and self._finish_replacement(slot, replacement):
+                    worker = self._replace(slot, worker, replacement, 'crashed')
+                else:
+                    with self._lock:
+                        self._workers.pop(slot, None)
+                    worker.stop(timeout=1.0)
+                    worker = self._spawn(slot)
+                replacement = replacement_reason = None
+                continue
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._busy.discard(slot)
+
+            # El trabajador superó el límite de memoria y terminó: reemplazarlo ya
+            if worker.retired:
+                print(f"[INFO] analysis_pool: Reemplazando el trabajador {worker.id} tras superar el límite de memoria")
+                if replacement is None:
+                    replacement = self._start_replacement(slot, 'memory_limit')
+                if self._finish_replacement(slot, replacement):
+                    worker = self._replace(slot, worker, replacement, 'memory_limit')
+                else:
+                    with self._lock:
+                        self._workers.pop(slot, None)
+                    worker.stop(timeout=1.0)
+                    worker = self._spawn(slot)
+                replacement = replacement_reason = None
+            elif replacement is None:
+                replacement_reason = worker.recycle_reason(self.recycle)
+                if replacement_reason:
+                    replacement = self._start_replacement(slot, replacement_reason)
+
+        if replacement is not None:
+            replacement.stop(timeout=1.0)
+        if worker is not None:
+            worker.stop()
+
+
+def create_job_directory(base_dir, job_id):
+    """
+    Crea el directorio de trabajo de un análisis (input.pdf, output.txt, secciones y reporte).
+
+    Args:
+        base_dir (str): Directorio base de la aplicación
+        job_id (str): Identificador del trabajo
+
+    Returns:
+        str: Ruta al directorio del trabajo
+    """
+    job_dir = os.path.join(base_dir, JOBS_DIR_NAME, job_id)
+    os.makedirs(os.path.join(job_dir, 'output_split'), exist_ok=True)
+    return job_dir
+
+
+def _job_time(job_dir):
+    """
+    Fecha de un trabajo: la de su reporte o, si no lo tiene, la del directorio. Limpiar el
+    directorio cambia su fecha de modificación, pero no la del reporte.
+    """
+    try:
+        return os.path.getmtime(os.path.join(job_dir, KEPT_JOB_FILES[0]))
+    except OSError:
+        return os.path.getmtime(job_dir)
+
+
+def _is_complete_job(job_dir):
+    """Indica si un trabajo tiene un reporte de un análisis completo"""
+    try:
+        with open(os.path.join(job_dir, KEPT_JOB_FILES[0]), 'r', encoding='utf-8') as f:
+            return json.load(f).get('status') == 'complete'
+    except (OSError, ValueError):
+        return False
+
+
+def prune_job_directories(base_dir, keep=None, active=None, keep_reports=None):
+    """
+    Limpia los directorios de trabajo más antiguos. Los `keep` más recientes se conservan
+    completos; de los análisis completos más antiguos solo se conservan el reporte y las
+    secciones (lo que necesita /compare), hasta `keep_reports` análisis en total. El resto
+    de los directorios se eliminan.
+
+    Args:
+        base_dir (str): Directorio base de la aplicación
+        keep (int, optional): Número de directorios a conservar completos (INSPECTOR_KEEP_JOBS)
+        active (set, optional): Identificadores de trabajos en curso, cuyos directorios no se eliminan
+        keep_reports (int, optional): Número de análisis cuyo reporte y secciones se conservan
+                                      (INSPECTOR_KEEP_REPORTS)
+    """
+    if keep is None:
+        keep = _env_int('INSPECTOR_KEEP_JOBS', DEFAULT_KEEP_JOBS)
+    if keep_reports is None:
+        keep_reports = _env_int('INSPECTOR_KEEP_REPORTS', DEFAULT_KEEP_REPORTS)
+    jobs_dir = os.path.join(base_dir, JOBS_DIR_NAME)
+    if not os.path.isdir(jobs_dir):
+        return
+    job_dirs = [os.path.join(jobs_dir, name) for name in os.listdir(jobs_dir)]
+    job_dirs = sorted((path for path in job_dirs if os.path.isdir(path)), key=_job_time, reverse=True)
+    for index, path in enumerate(job_dirs[keep:], start=keep):
+        if active and os.path.basename(path) in active:
+            continue
+        if index >= keep_reports or not _is_complete_job(path):
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        for name in os.listdir(path):
+            if name in KEPT_JOB_FILES:
+                continue
+            file_path = os.path.join(path, name)
+            if os.path.isdir(file_path):
+                shutil.rmtree(file_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
@@ -0,0 +1,261 @@
+# Perfil de extracción de la línea base principal. Los demás perfiles separan párrafos y
+# palabras de otra manera, así que cada uno acumula su propia línea base
+BASELINE_PROFILE = 'accurate'
+
+"""
+Baseline Store
+
+Este módulo mantiene la línea base del corpus: la media y la varianza de cada métrica de
+cada artículo en los contratos ya analizados. Se actualiza en O(1) por contrato con el
+algoritmo de Welford y se guarda en un archivo JSON, de modo que la puntuación z de un
+contrato nuevo se calcula sin volver a recorrer el historial.
+"""
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+# Archivo de la línea base (configurable con INSPECTOR_BASELINE_FILE)
+DEFAULT_BASELINE_FILE = os.path.join(Path(__file__).parent.parent, "corpus_baseline.json")
+
+# Número mínimo de contratos en la línea base para calcular puntuaciones z
+MIN_SAMPLES = 3
+
+BASELINE_VERSION = 1
+
+# Sufijo del archivo con las huellas de los PDF ya añadidos (una por línea, solo se añaden
+# líneas), junto al archivo de la línea base
+RECORDED_SUFFIX = '.recorded'
+
+# Perfil de extracción de los contratos que entran en la línea base: los demás perfiles
+# separan párrafos y palabras de otra manera y desplazarían la media
+BASELINE_PROFILE = 'accurate'
+
+# Líneas base ya cargadas, indexadas por archivo
+_baselines = {}
+_baselines_lock = threading.Lock()
+
+
+def baseline_section(section, template_set=None, profile=None):
+    """
+    Clave de una sección en la línea base. Los contratos comparados con un conjunto de
+    plantillas distinto del de por defecto, o extraídos con un perfil distinto de
+    BASELINE_PROFILE, tienen su propia línea base.
+
+    Args:
+        section (str): Nombre de la sección
+        template_set (str, optional): Nombre del conjunto de plantillas
+        profile (str, optional): Perfil de extracción del contrato
+
+    Returns:
+        str: Clave de la sección (por ejemplo "article_1", "lease:article_1" o "article_1@fast")
+    """
+    key = section if not template_set or template_set == 'default' else f"{template_set}:{section}"
+    if profile and profile != BASELINE_PROFILE:
+        key = f"{key}@{profile}"
+    return key
+
+
+def default_baseline_file():
+    """Archivo de la línea base configurado (variable de entorno INSPECTOR_BASELINE_FILE)"""
+    return os.environ.get('INSPECTOR_BASELINE_FILE') or DEFAULT_BASELINE_FILE
+
+
+class BaselineStore:
+    """
+    Media y varianza acumuladas de cada sección y métrica.
+
+    Para cada par sección/métrica se guarda [n, media, m2], donde m2 es la suma de los
+    cuadrados de las diferencias con la media (algoritmo de Welford). Las huellas de los PDF
+    ya añadidos, para no contar dos veces el mismo contrato, se guardan aparte en un archivo
+    al que solo se añaden líneas, así que guardar un contrato no depende del tamaño del historial.
+
+    Attributes:
+        path (str): Archivo JSON de la línea base
+        sections (dict): Sección -> métrica -> [n, media, m2]
+        recorded (set): Huellas (SHA-1) del contenido de los PDF ya añadidos
+        mtime_ns (int): Fecha de modificación del archivo cuando se cargó
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.recorded_path = f"{path}{RECORDED_SUFFIX}"
+        self.sections = {}
+        self.recorded = set()
+        self.mtime_ns = None
+        self._recorded_offset = 0
+        self._new_hashes = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Carga la línea base desde su archivo (si no existe, queda vacía)"""
+        with self._lock:
+            try:
+                self.mtime_ns = os.stat(self.path).st_mtime_ns
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.sections = data.get('sections', {})
+            except FileNotFoundError:
+                self.sections = {}
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] baseline_store: No se pudo leer {self.path}: {str(e)}")
+                self.sections = {}
+            self._load_recorded()
+        return self
+
+    def _load_recorded(self):
+        """Lee las huellas añadidas al archivo de huellas desde la última lectura"""
+        try:
+            if os.path.getsize(self.recorded_path) < self._recorded_offset:
+                self.recorded, self._recorded_offset = set(), 0
+            with open(self.recorded_path, 'r', encoding='ascii') as f:
+                f.seek(self._recorded_offset)
+                self.recorded.update(line.strip() for line in f if line.strip())
+                self._recorded_offset = f.tell()
+        except FileNotFoundError:
+            self.recorded, self._recorded_offset = set(), 0
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] baseline_store: No se pudo leer {self.recorded_path}: {str(e)}")
+
+    def save(self):
+        """
+        Guarda la línea base (se escribe a un archivo temporal y se reemplaza) y añade al
+        archivo de huellas las de los contratos nuevos.
+        """
+        with self._lock:
+            data = {'version': BASELINE_VERSION, 'sections': self.sections}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+            self.mtime_ns = os.stat(self.path).st_mtime_ns
+            if self._new_hashes:
+                with open(self.recorded_path, 'a', encoding='ascii') as f:
+                    f.write(''.join(f"{content_hash}\n" for content_hash in self._new_hashes))
+                    self._recorded_offset = f.tell()
+                self._new_hashes = []
+
+    def update(self, section_stats, content_hash=None):
+        """
+        Añade los conteos de un contrato a la línea base.
+
+        Args:
+            section_stats (dict): Sección -> métrica -> valor
+            content_hash (str, optional): Huella del PDF. Si ya se añadió, no se cuenta de nuevo
+
+        Returns:
+            bool: True si los conteos se añadieron
+        """
+        with self._lock:
+            if content_hash is not None:
+                if content_hash in self.recorded:
+                    return False
+                self.recorded.add(content_hash)
+                self._new_hashes.append(content_hash)
+            for section, stats in section_stats.items():
+                metrics = self.sections.setdefault(section, {})
+                for metric, value in stats.items():
+                    n, mean, m2 = metrics.get(metric, (0, 0.0, 0.0))
+                    n += 1
+                    delta = value - mean
+                    mean += delta / n
+                    m2 += delta * (value - mean)
+                    metrics[metric] = [n, mean, m2]
+        return True
+
+    def z_score(self, section, metric, value):
+        """
+        Puntuación z de un valor respecto a la línea base.
+
+        Returns:
+            float: Puntuación z, o None si no hay suficientes contratos o la varianza es 0
+        """
+        n, mean, m2 = self.sections.get(section, {}).get(metric, (0, 0.0, 0.0))
+        if n < MIN_SAMPLES or m2 <= 0:
+            return None
+        return (value - mean) / math.sqrt(m2 / (n - 1))
+
+    def z_scores(self, section, stats):
+        """
+        Puntuaciones z de todas las métricas de una sección.
+
+        Args:
+            section (str): Nombre de la sección
+            stats (dict): Métrica -> valor
+
+        Returns:
+            dict: Métrica -> puntuación z redondeada (o None)
+        """
+        z_scores = {}
+        for metric, value in stats.items():
+            z = self.z_score(section, metric, value)
+            z_scores[metric] = round(z, 3) if z is not None else None
+        return z_scores
+
+    def samples(self, section):
+        """Número de contratos en la línea base de una sección"""
+        counts = [values[0] for values in self.sections.get(section, {}).values()]
+        return max(counts) if counts else 0
+
+
+def get_baseline(path=None):
+    """
+    Devuelve la línea base de un archivo, volviendo a leerlo si otro proceso lo ha
+    modificado desde la última carga.
+
+    Args:
+        path (str, optional): Archivo de la línea base. Si es None, usa el configurado
+
+    Returns:
+        BaselineStore: Línea base
+    """
+    path = os.path.abspath(path or default_baseline_file())
+    with _baselines_lock:
+        baseline = _baselines.get(path)
+        if baseline is None:
+            baseline = _baselines[path] = BaselineStore(path).load()
+            return baseline
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if mtime_ns != baseline.mtime_ns:
+        baseline.load()
+    return baseline
+
+
+def record_report(report, path=None):
+    """
+    Añade los conteos de un reporte completo a la línea base y la guarda. Cada perfil de
+    extracción tiene su propia línea base (ver baseline_section), y cada PDF (por la huella
+    de su contenido, 'input_hash') se añade una sola vez a cada una. Solo un proceso debe
+    escribir la línea base (en la aplicación, el proceso principal).
+
+    Args:
+        report (dict): Reporte de create_report()
+        path (str, optional): Archivo de la línea base. Si es None, usa el configurado
+
+    Returns:
+        bool: True si el reporte se añadió
+    """
+    if report.get('status') != 'complete' or report.get('errors'):
+        return False
+    template_set = report.get('template_set', {}).get('name')
+    profile = report.get('extraction_profile')
+    section_stats = {
+        baseline_section(section, template_set, profile): data['output_stats']
+        for section, data in report.get('statistics', {}).items() if 'output_stats' in data
+    }
+    if not section_stats:
+        return False
+    baseline = get_baseline(path)
+    # Un mismo PDF puede entrar una vez en la línea base de cada perfil
+    content_hash = report.get('input_hash')
+    if content_hash and profile and profile != BASELINE_PROFILE:
+        content_hash = f"{content_hash}@{profile}"
+    if not baseline.update(section_stats, content_hash):
+        return False
+    baseline.save()
+    return True
@@ -0,0 +1,345 @@
+"""
+Compare Versions
+
+Este módulo compara dos versiones del mismo contrato (por ejemplo, la v1 y la v2 de un
+NDA en negociación) sección a sección: diferencias en las estadísticas de texto, en el
+número de párrafos y fragmentos de texto modificados. Las versiones ya analizadas se leen
+de su directorio de trabajo (jobs/<id>: reporte y secciones), así que compararlas no
+vuelve a extraer el texto del PDF.
+"""
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+from inspector_functions.inspector_statistics import STAT_KEYS, analyze_string
+from inspector_functions.inspector_thermodynamics import align_paragraphs, paragraph_hash, split_paragraphs
+from inspector_functions.section_schema import get_matcher
+
+# Directorio de trabajos de la aplicación
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(current_dir), 'jobs')
+
+# Nombres de los archivos de un trabajo (ver analysis_pool.create_job_directory)
+REPORT_FILE = 'contract_report.json'
+INPUT_FILE = 'input.pdf'
+SECTIONS_DIR = 'output_split'
+
+
+class VersionNotFound(ValueError):
+    """La versión indicada no existe o no tiene un análisis completo"""
+
+
+def file_hash(path):
+    """Huella SHA-1 del contenido de un archivo"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_sections(sections_dir):
+    """
+    Lee los archivos de sección (output_<sección>.txt) de un directorio.
+
+    Returns:
+        dict: Sección -> texto
+    """
+    sections = {}
+    if os.path.isdir(sections_dir):
+        for filename in os.listdir(sections_dir):
+            if filename.startswith('output_') and filename.endswith('.txt'):
+                with open(os.path.join(sections_dir, filename), 'r', encoding='utf-8', errors='replace') as f:
+                    sections[filename[len('output_'):-len('.txt')]] = f.read()
+    return sections
+
+
+def _read_report(job_dir):
+    """Reporte de un trabajo, o None si no tiene uno legible"""
+    try:
+        with open(os.path.join(job_dir, REPORT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_job_version(job_dir):
+    """
+    Carga una versión ya analizada desde su directorio de trabajo.
+
+    Args:
+        job_dir (str): Directorio del trabajo (con contract_report.json y output_split/)
+
+    Returns:
+        dict: {'job_id', 'input_file', 'report', 'sections'}
+
+    Raises:
+        VersionNotFound: Si el trabajo no existe o su análisis no está completo
+    """
+    report = _read_report(job_dir)
+    if report is None:
+        raise VersionNotFound(f"No hay un reporte en {job_dir}")
+    if report.get('status') != 'complete':
+        raise VersionNotFound(f"El análisis de {job_dir} no está completo (estado {report.get('status')})")
+    sections = read_sections(os.path.join(job_dir, SECTIONS_DIR))
+    if not sections:
+        raise VersionNotFound(f"No se encontraron las secciones de {job_dir}")
+    return {
+        'job_id': os.path.basename(os.path.normpath(job_dir)),
+        'input_file': report.get('input_file'),
+        'report': report,
+        'sections': sections,
+    }
+
+
+def find_job_for_pdf(pdf_path, jobs_dir=None):
+    """
+    Busca un análisis completo del mismo PDF (mismo contenido) entre los trabajos guardados.
+    Se compara la huella del PDF con la que guarda cada reporte ('input_hash'), así que
+    también se encuentran los trabajos antiguos cuyo input.pdf ya se eliminó al limpiar jobs/.
+
+    Args:
+        pdf_path (str): PDF a buscar
+        jobs_dir (str, optional): Directorio de trabajos (por defecto jobs/)
+
+    Returns:
+        str: Directorio del trabajo, o None si el PDF no tiene un análisis completo
+    """
+    jobs_dir = jobs_dir or DEFAULT_JOBS_DIR
+    if not os.path.isdir(jobs_dir):
+        return None
+    digest = file_hash(pdf_path)
+    for name in os.listdir(jobs_dir):
+        job_dir = os.path.join(jobs_dir, name)
+        if os.path.abspath(os.path.join(job_dir, INPUT_FILE)) == os.path.abspath(pdf_path):
+            continue
+        report = _read_report(job_dir)
+        if report and report.get('status') == 'complete' and report.get('input_hash') == digest:
+            return job_dir
+    return None
+
+
+def resolve_job(source, jobs_dir=None):
+    """
+    Devuelve el directorio de trabajo de una versión indicada por identificador de trabajo,
+    por directorio o por su contract_report.json.
+
+    Returns:
+        str: Directorio del trabajo, o None si `source` no es ninguno de ellos
+    """
+    jobs_dir = jobs_dir or DEFAULT_JOBS_DIR
+    if os.path.isdir(source):
+        return source
+    if os.path.basename(source) == REPORT_FILE and os.path.isfile(source):
+        return os.path.dirname(os.path.abspath(source))
+    if os.path.isdir(os.path.join(jobs_dir, source)):
+        return os.path.join(jobs_dir, source)
+    return None
+
+
+def analyze_pdf_version(pdf_path, jobs_dir=None):
+    """
+    Analiza un PDF que no se había analizado y guarda el resultado como un trabajo nuevo.
+
+    Returns:
+        str: Directorio del trabajo
+    """
+    from inspector_functions.create_report import create_report
+
+    job_dir = os.path.join(jobs_dir or DEFAULT_JOBS_DIR, uuid.uuid4().hex)
+    os.makedirs(os.path.join(job_dir, SECTIONS_DIR), exist_ok=True)
+    input_pdf = os.path.join(job_dir, INPUT_FILE)
+    shutil.copyfile(pdf_path, input_pdf)
+    create_report(input_pdf, os.path.join(job_dir, SECTIONS_DIR), work_dir=job_dir)
+    return job_dir
+
+
+def load_version(source, jobs_dir=None):
+    """
+    Carga una versión de un contrato. Un PDF ya analizado (mismo contenido) reutiliza las
+    secciones de su análisis; solo los PDF nuevos pasan por la extracción.
+
+    Args:
+        source (str): Identificador de trabajo, directorio de trabajo, contract_report.json o PDF
+        jobs_dir (str, optional): Directorio de trabajos (por defecto jobs/)
+
+    Returns:
+        dict: Versión (ver load_job_version), con 'cached' indicando si se reutilizó un análisis
+              y 'filename' con el nombre del PDF (None si se indicó un trabajo)
+    """
+    job_dir = resolve_job(source, jobs_dir)
+    cached = job_dir is not None
+    if job_dir is None:
+        if not os.path.isfile(source):
+            raise VersionNotFound(f"No existe el trabajo ni el archivo: {source}")
+        job_dir = find_job_for_pdf(source, jobs_dir)
+        cached = job_dir is not None
+        if job_dir is None:
+            print(f"[INFO] compare_versions: Analizando {source}")
+            job_dir = analyze_pdf_version(source, jobs_dir)
+    version = load_job_version(job_dir)
+    version.update(cached=cached, filename=os.path.basename(source) if os.path.isfile(source) else None)
+    return version
+
+
+def section_order(*section_sets):
+    """Secciones de varias versiones en el orden del documento (las desconocidas, al final)"""
+    known = [section['name'] for section in get_matcher().sections]
+    known += [section['split']['section'] for section in get_matcher().sections if section.get('split')]
+    names = set().union(*section_sets)
+    return [name for name in known if name in names] + sorted(names.difference(known))
+
+
+def changed_spans(old_paragraph, new_paragraph):
+    """
+    Fragmentos de texto que cambian entre dos versiones de un párrafo (comparación por palabras).
+
+    Returns:
+        list: [{'op': 'replace'|'insert'|'delete', 'old': texto anterior, 'new': texto nuevo}]
+    """
+    old_words, new_words = old_paragraph.split(), new_paragraph.split()
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    return [
+        {'op': tag, 'old': ' '.join(old_words[i1:i2]), 'new': ' '.join(new_words[j1:j2])}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def compare_section(old_text, new_text):
+    """
+    Compara dos versiones de una sección. Los párrafos se alinean por su huella y solo se
+    comparan palabra a palabra los párrafos modificados.
+
+    Args:
+        old_text (str): Texto de la versión anterior, o None si la sección no existía
+        new_text (str): Texto de la versión nueva, o None si la sección ya no existe
+
+    Returns:
+        dict: Estado ('unchanged', 'changed', 'added' o 'removed'), estadísticas de cada versión y
+              su diferencia, número de párrafos y cambios ({'paragraph': [anterior, nuevo], 'op', 'old', 'new'},
+              con índices desde 1)
+    """
+    old_paragraphs = split_paragraphs(old_text) if old_text is not None else []
+    new_paragraphs = split_paragraphs(new_text) if new_text is not None else []
+    old_stats = analyze_string(old_text) if old_text is not None else {key: 0 for key in STAT_KEYS}
+    new_stats = analyze_string(new_text) if new_text is not None else {key: 0 for key in STAT_KEYS}
+
+    alignment = align_paragraphs([paragraph_hash(p) for p in old_paragraphs],
+                                 [paragraph_hash(p) for p in new_paragraphs])
+    changes = []
+    for old_index, new_index in alignment['modified']:
+        for span in changed_spans(old_paragraphs[old_index - 1], new_paragraphs[new_index - 1]):
+            changes.append({'paragraph': [old_index, new_index], **span})
+    for old_index in alignment['deleted']:
+        changes.append({'paragraph': [old_index, None], 'op': 'delete',
+                        'old': ' '.join(old_paragraphs[old_index - 1].split()), 'new': ''})
+    for new_index in alignment['inserted']:
+        changes.append({'paragraph': [None, new_index], 'op': 'insert',
+                        'old': '', 'new': ' '.join(new_paragraphs[new_index - 1].split())})
+
+    if old_text is None:
+        status = 'added'
+    elif new_text is None:
+        status = 'removed'
+    else:
+        status = 'changed' if changes else 'unchanged'
+
+    return {
+        'status': status,
+        'old_stats': old_stats,
+        'new_stats': new_stats,
+        'stats_delta': {key: new_stats[key] - old_stats[key] for key in STAT_KEYS},
+        'old_paragraphs': len(old_paragraphs),
+        'new_paragraphs': len(new_paragraphs),
+        'paragraph_delta': len(new_paragraphs) - len(old_paragraphs),
+        'alignment': alignment,
+        'changes': changes,
+    }
+
+
+def compare_versions(old, new):
+    """
+    Compara dos versiones de un contrato sección a sección.
+
+    Args:
+        old (dict): Versión anterior (ver load_version)
+        new (dict): Versión nueva
+
+    Returns:
+        dict: {'old', 'new' (descripción de cada versión), 'sections' (sección -> compare_section),
+               'summary' (número de secciones de cada estado y de fragmentos modificados)}
+    """
+    sections = {}
+    for name in section_order(old['sections'], new['sections']):
+        sections[name] = compare_section(old['sections'].get(name), new['sections'].get(name))
+
+    summary = {status: 0 for status in ('unchanged', 'changed', 'added', 'removed')}
+    for data in sections.values():
+        summary[data['status']] += 1
+    summary['changes'] = sum(len(data['changes']) for data in sections.values())
+
+    def describe(version):
+        return {key: version.get(key) for key in ('job_id', 'filename', 'cached')}
+
+    return {'old': describe(old), 'new': describe(new), 'sections': sections, 'summary': summary}
+
+
+def print_comparison(result, show_text=True):
+    """Muestra la comparación de dos versiones en forma de tabla"""
+    from tabulate import tabulate
+
+    rows = []
+    for name, data in result['sections'].items():
+        delta = data['stats_delta']
+        rows.append([name, data['status'], f"{data['old_paragraphs']}->{data['new_paragraphs']}",
+                     f"{delta['word_count']:+d}", f"{delta['period_count']:+d}", f"{delta['comma_count']:+d}",
+                     len(data['changes'])])
+    print(tabulate(rows, headers=['Sección', 'Estado', 'Párrafos', 'Palabras', 'Puntos', 'Comas', 'Cambios'],
+                   tablefmt='grid'))
+
+    if show_text:
+        for name, data in result['sections'].items():
+            for change in data['changes']:
+                old_index, new_index = change['paragraph']
+                print(f"\n[{name}] párrafo {old_index or '-'} -> {new_index or '-'} ({change['op']})")
+                if change['old']:
+                    print(f"  - {change['old']}")
+                if change['new']:
+                    print(f"  + {change['new']}")
+
+    summary = result['summary']
+    print(f"\n{summary['changed']} secciones modificadas, {summary['added']} añadidas, "
+          f"{summary['removed']} eliminadas, {summary['unchanged']} sin cambios ({summary['changes']} cambios)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compara dos versiones del mismo contrato sección a sección')
+    parser.add_argument('old', help='Versión anterior: PDF, identificador de trabajo, directorio de trabajo o contract_report.json')
+    parser.add_argument('new', help='Versión nueva (mismos formatos)')
+    parser.add_argument('--jobs-dir', default=DEFAULT_JOBS_DIR, help='Directorio de trabajos de la aplicación')
+    parser.add_argument('--json', help='Guardar la comparación en un archivo JSON')
+    parser.add_argument('--no-text', action='store_true', help='No mostrar el texto de los cambios')
+    args = parser.parse_args()
+
+    try:
+        versions = [load_version(source, args.jobs_dir) for source in (args.old, args.new)]
+    except VersionNotFound as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    comparison = compare_versions(*versions)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, indent=2, ensure_ascii=False)
+        print(f"Comparación guardada en {args.json}")
+    print_comparison(comparison, show_text=not args.no_text)
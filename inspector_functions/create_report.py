@@ -18,25 +18,233 @@ sys.path.append(os.path.dirname(current_dir))  # Añadir el directorio padre al
 # Importar funciones necesarias de otros módulos
 try:
     # Intenta primero importación absoluta (cuando se ejecuta directamente)
-    from inspector_functions.pdf_to_txt_pdfminer import convert_pdf_to_text, get_pdf_info
-    from inspector_functions.txt_to_txt_splitter import split_contract_text
-    from inspector_functions.txt_cleaner import standardize_page_breaks
+    from inspector_functions.pdf_to_txt_pdfminer import (
+        extract_pdf_pages, preflight_pdf, profiles_to_try, PDFRejected, BudgetExceeded, OperationCancelled,
+        default_max_pages, default_time_budget)
+    from inspector_functions.txt_to_txt_splitter import find_contract_sections, write_contract_sections, missing_sections
+    from inspector_functions.txt_cleaner import clean_pages, page_span
 except ImportError:
     # Si falla, usa importación relativa (cuando se importa como módulo)
-    from .pdf_to_txt_pdfminer import convert_pdf_to_text, get_pdf_info
-    from .txt_to_txt_splitter import split_contract_text
-    from .txt_cleaner import standardize_page_breaks
+    from .pdf_to_txt_pdfminer import (
+        extract_pdf_pages, preflight_pdf, profiles_to_try, PDFRejected, BudgetExceeded, OperationCancelled,
+        default_max_pages, default_time_budget)
+    from .txt_to_txt_splitter import find_contract_sections, write_contract_sections, missing_sections
+    from .txt_cleaner import clean_pages, page_span
 
 import inspector_functions.inspector_statistics as statistics
 import inspector_functions.inspector_thermodynamics as thermodynamics
+import inspector_functions.baseline_store as baseline_store
+import inspector_functions.template_store as template_store
+from inspector_functions.compare_versions import file_hash
 
-def create_report(input_pdf="input.pdf", output_dir="output_split"):
+
+class ExtractionError(Exception):
+    """No se pudo extraer o dividir el texto del PDF con un perfil de extracción"""
+
+
+def _extract_and_split(input_pdf, output_txt, output_dir, profile, report, schema=None,
+                       max_pages=None, time_budget=None, cancel_event=None):
+    """
+    Convierte el PDF a texto con el perfil indicado, lo limpia y lo divide en secciones
+    (pasos 1, 1.5 y 2 del reporte). Las páginas de cada sección se guardan en
+    report["section_pages"].
+    
+    Returns:
+        tuple: (rutas de los archivos de sección creados, texto limpio, inicio de cada página)
+        
+    Raises:
+        ExtractionError: Si no se pudo extraer o dividir el texto
+        BudgetExceeded: Si el documento supera el límite de páginas o de tiempo
+        OperationCancelled: Si se canceló el análisis
+    """
+    # Paso 1: Convertir PDF a texto
+    print(f"[INFO] create_report: PASO 1 - Convirtiendo PDF a texto")
+    print(f"[DEBUG] create_report: Perfil de extracción: {profile}")
+    print(f"[DEBUG] create_report: La ruta del archivo de salida será {output_txt}")
+    print(f"[DEBUG] create_report: Verificando existencia de {input_pdf}")
+    if os.path.exists(input_pdf):
+        print(f"[DEBUG] create_report: El archivo {input_pdf} existe y tiene {os.path.getsize(input_pdf)} bytes")
+    else:
+        print(f"[ERROR] create_report: El archivo {input_pdf} no existe")
+    
+    page_texts = extract_pdf_pages(input_pdf, profile, max_pages=max_pages, time_budget=time_budget,
+                                   cancel_event=cancel_event)
+    if not any(page_texts):
+        error_msg = "No se pudo extraer texto del PDF"
+        print(f"[ERROR] create_report: {error_msg}")
+        raise ExtractionError(error_msg)
+    
+    print(f"[INFO] create_report: PASO 1 completado")
+    
+    # Paso 1.5: Normalizar los saltos de página (en memoria, en una sola pasada). El texto
+    # limpio no lleva marcadores; el inicio de cada página se guarda aparte
+    print(f"[INFO] create_report: PASO 1.5 - Aplicando limpieza al texto completo")
+    try:
+        text_content, page_starts, counts = clean_pages(page_texts)
+        print(f"[DEBUG] create_report: Saltos de página normalizados: {counts}")
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"[WARNING] create_report: Error al limpiar el texto: {str(e)}")
+        report["warnings"].append(f"Error al limpiar archivo de texto completo: {str(e)}")
+        text_content, page_starts = ''.join(page_texts), None
+    
+    # Guardar el texto limpio
+    print(f"[DEBUG] create_report: Guardando {len(text_content)} caracteres en {output_txt}")
+    try:
+        with open(output_txt, 'w', encoding='utf-8') as f:
+            f.write(text_content)
+        print(f"[INFO] create_report: Texto guardado exitosamente en {output_txt}")
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"[ERROR] create_report: Error al guardar el texto: {str(e)}")
+        report["errors"].append(f"Error al guardar el texto: {str(e)}")
+    
+    print(f"[INFO] create_report: PASO 1.5 completado")
+    
+    split_results = _split_sections(text_content, page_starts, output_dir, schema, report)
+    return split_results, text_content, page_starts
+
+
+def _split_sections(text_content, page_starts, output_dir, schema, report):
+    """
+    Divide el texto limpio en secciones según un esquema de secciones (paso 2 del reporte).
+    
+    Returns:
+        dict: Rutas de los archivos de sección creados
+        
+    Raises:
+        ExtractionError: Si no se pudo dividir el texto
+    """
+    # Paso 2: Dividir el texto en secciones
+    print(f"[INFO] create_report: PASO 2 - Dividiendo texto en secciones")
+    
+    # Crear directorio de salida si no existe
+    print(f"[DEBUG] create_report: Creando directorio de salida {output_dir} si no existe")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    try:
+        print(f"[DEBUG] create_report: Iniciando división del texto en {output_dir}")
+        sections = find_contract_sections(text_content, schema)
+        split_results = write_contract_sections(text_content, sections, output_dir)
+        
+        # Páginas de cada sección (búsqueda binaria sobre el inicio de las páginas)
+        if page_starts is not None:
+            report["section_pages"] = {
+                section: list(page_span(page_starts, start, end))
+                for section, (start, end) in sections.items() if section in split_results
+            }
+    
+        num_files = len(split_results) if isinstance(split_results, dict) else 0
+        print(f"[INFO] create_report: Se crearon {num_files} archivos en {output_dir}")
+    
+        # Listar los archivos creados
+        print(f"[DEBUG] create_report: Archivos creados:")
+        for section, path in (split_results.items() if isinstance(split_results, dict) else []):
+            print(f"[DEBUG] create_report:   - {section}: {path}")
+    
+        # Ya no es necesario aplicar limpieza a cada archivo pues ya se limpió el archivo original
+    except MemoryError:
+        raise
+    except Exception as e:
+        import traceback
+        error_msg = f"Error al dividir el texto: {str(e)}"
+        print(f"[ERROR] create_report: {error_msg}")
+        print(f"[DEBUG] {traceback.format_exc()}")
+        raise ExtractionError(error_msg)
+    
+    print(f"[INFO] create_report: PASO 2 completado")
+    
+    return split_results
+
+
+def _is_forced_template_set(template_set):
+    """Indica si se pidió un conjunto de plantillas concreto (en lugar de elegirlo automáticamente)"""
+    return bool(template_set) and template_set != 'auto'
+
+
+def _select_template_set(split_results, template_set, report):
+    """
+    Elige el conjunto de plantillas del contrato (paso 2.5 del reporte). Si no se indica
+    ninguno, se elige el que más se parece por título y preámbulo. La elección se guarda
+    en report["template_set"].
+    
+    Args:
+        split_results (dict): Rutas de los archivos de sección del contrato
+        template_set (str): Nombre del conjunto, o None/"auto" para elegirlo automáticamente
+        report (dict): Reporte en construcción
+    
+    Returns:
+        str: Directorio de las plantillas elegidas
+    """
+    if _is_forced_template_set(template_set):
+        report["template_set"] = {'name': template_set, 'confidence': None, 'scores': {}}
+        return template_store.template_set_directory(template_set)
+    
+    section_texts = {}
+    for section in template_store.SIGNATURE_SECTIONS:
+        if section in split_results:
+            with open(split_results[section], 'r', encoding='utf-8') as f:
+                section_texts[section] = f.read()
+    
+    index = template_store.get_template_index()
+    routing = index.route(section_texts)
+    report["template_set"] = routing
+    print(f"[INFO] create_report: Conjunto de plantillas '{routing['name']}' "
+          f"(confianza {routing['confidence']})")
+    return index.directories[routing['name']]
+
+
+def _check_cancelled(cancel_event, stage):
+    """Lanza OperationCancelled si se pidió cancelar el análisis (se comprueba entre pasos)"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled(f"Análisis cancelado antes de {stage}")
+
+
+def _emit(on_stage, stage, data):
+    """Notifica un paso terminado del análisis (ver create_report); un error al notificar no detiene el análisis"""
+    if on_stage is None:
+        return
+    try:
+        on_stage(stage, data)
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"[WARNING] create_report: Error al notificar el paso '{stage}': {str(e)}")
+
+
+def _reject(report, error):
+    """Marca el reporte como fallido por un PDFRejected (comprobaciones previas o límites)"""
+    report["errors"].append(str(error))
+    report["failure"] = error.to_dict()
+    report["status"] = "error"
+    return report
+
+
+def create_report(input_pdf="input.pdf", output_dir="output_split", work_dir=None, extraction_profile=None,
+                  template_set=None, max_pages=None, time_budget=None, cancel_event=None, on_stage=None):
     """
     Crea un reporte completo del análisis de un contrato.
     
     Args:
         input_pdf (str): Ruta al archivo PDF del contrato
         output_dir (str): Directorio donde guardar los archivos divididos
+        work_dir (str, optional): Directorio donde guardar output.txt y contract_report.json.
+                                  Si es None, se usa el directorio base de la aplicación
+        extraction_profile (str, optional): Perfil de extracción ("accurate", "fast", "raw" o "auto").
+                                            Si es None, se usa INSPECTOR_EXTRACTION_PROFILE o "accurate"
+        template_set (str, optional): Conjunto de plantillas con el que comparar. Si es None o "auto",
+                                      se elige el que más se parece al contrato
+        max_pages (int, optional): Número máximo de páginas. Si es None, se usa INSPECTOR_MAX_PAGES
+        time_budget (float, optional): Tiempo máximo de extracción en segundos. Si es None, se usa
+                                       INSPECTOR_TIME_BUDGET
+        cancel_event (Event, optional): Si se activa, el análisis se detiene entre páginas y entre
+                                        pasos; el reporte queda con estado "cancelled" y no se guarda
+        on_stage (callable, optional): Función que se llama con (paso, datos) en cuanto hay resultados
+                                       parciales: "document" (páginas y metadatos), "sections"
+                                       (secciones encontradas), "section_statistics" (una vez por
+                                       artículo) y "paragraph_analysis"
         
     Returns:
         dict: Un diccionario con los resultados del análisis para ser entregado al cliente
@@ -57,152 +265,212 @@ def create_report(input_pdf="input.pdf", output_dir="output_split"):
     if not os.path.isabs(output_dir):
         output_dir = os.path.join(base_dir, output_dir)
     
+    # Directorio de trabajo para los archivos intermedios y el reporte JSON
+    if work_dir is None:
+        work_dir = base_dir
+    
     print(f"[DEBUG] create_report: Directorio base: {base_dir}")
     print(f"[DEBUG] create_report: Archivo PDF: {input_pdf}")
     print(f"[DEBUG] create_report: Directorio de salida: {output_dir}")
     
     # Asegurarse de que el directorio output_dir existe
     os.makedirs(output_dir, exist_ok=True)
-    # Obtener información del PDF (número de páginas y metadatos)
-    page_count, metadata = get_pdf_info(input_pdf)
+    
+    # Límites del documento
+    if max_pages is None:
+        max_pages = default_max_pages()
+    if time_budget is None:
+        time_budget = default_time_budget()
+    started = time.monotonic()
+    
+    # Comprobaciones previas (número de páginas, cifrado y capa de texto) antes de la
+    # extracción completa; también dan el número de páginas y los metadatos
+    rejection = None
+    try:
+        preflight = preflight_pdf(input_pdf, max_pages=max_pages)
+    except PDFRejected as e:
+        print(f"[WARNING] create_report: PDF rechazado ({e.code}): {str(e)}")
+        rejection = e
+        preflight = {'page_count': e.details.get('value', 0) if e.code == 'too_many_pages' else 0,
+                     'metadata': {}, 'warnings': []}
+    except OSError as e:
+        rejection = PDFRejected('unreadable', f"No se pudo abrir el PDF: {str(e)}")
+        preflight = {'page_count': 0, 'metadata': {}, 'warnings': []}
+    page_count, metadata = preflight['page_count'], preflight['metadata']
     standard_page_count = 10  # Número estándar de páginas para este tipo de contrato
     
+    # Huella del contenido del PDF: la línea base no cuenta dos veces el mismo contrato
+    try:
+        input_hash = file_hash(input_pdf)
+    except OSError:
+        input_hash = None
+    
     report = {
         "timestamp": time.time(),
         "date": time.strftime("%Y-%m-%d %H:%M:%S"),
         "input_file": os.path.basename(input_pdf),
+        "input_hash": input_hash,
         "status": "processing",
         "page_count": page_count,
         "standard_page_ratio": page_count / standard_page_count if standard_page_count > 0 else 0,
         "metadata": metadata,
         "statistics": {},
         "paragraph_analysis": {},
-        "warnings": [],
+        "warnings": list(preflight['warnings']),
         "errors": []
     }
+    if 'elapsed' in preflight:
+        report["preflight"] = {k: preflight[k] for k in ('encrypted', 'text_pages_probed', 'elapsed')}
+    _emit(on_stage, 'document', {k: report[k] for k in ('input_file', 'date', 'page_count', 'standard_page_ratio',
+                                                        'metadata') if k in report})
+    if rejection is not None:
+        return _reject(report, rejection)
     
     try:
         print(f"[DEBUG] create_report: Iniciando proceso para archivo {input_pdf}")
         print(f"[DEBUG] create_report: Directorio de salida: {output_dir}")
         
-        # Paso 1: Convertir PDF a texto
-        print(f"[INFO] create_report: PASO 1 - Convirtiendo PDF a texto")
-        # Usar la variable base_dir ya definida para guardar output.txt
-        output_txt = os.path.join(base_dir, "output.txt")
+        # Pasos 1 a 2: extraer el texto y dividirlo en secciones. En modo "auto" se prueba
+        # primero el perfil rápido y se recurre al preciso si no aparecen los encabezados
+        output_txt = os.path.join(work_dir, "output.txt")
+        profiles = profiles_to_try(extraction_profile)
         
-        print(f"[DEBUG] create_report: La ruta del archivo de salida será {output_txt}")
-        print(f"[DEBUG] create_report: Verificando existencia de {input_pdf}")
-        if os.path.exists(input_pdf):
-            print(f"[DEBUG] create_report: El archivo {input_pdf} existe y tiene {os.path.getsize(input_pdf)} bytes")
-        else:
-            print(f"[ERROR] create_report: El archivo {input_pdf} no existe")
-            
-        text_content = convert_pdf_to_text(input_pdf)
-        if not text_content:
-            error_msg = "No se pudo extraer texto del PDF"
-            print(f"[ERROR] create_report: {error_msg}")
-            report["errors"].append(error_msg)
-            report["status"] = "error"
-            return report
-            
-        # Guardar el texto extraído
-        print(f"[DEBUG] create_report: Guardando {len(text_content)} caracteres en {output_txt}")
-        try:
-            with open(output_txt, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-            print(f"[INFO] create_report: Texto guardado exitosamente en {output_txt}")
-        except Exception as e:
-            print(f"[ERROR] create_report: Error al guardar el texto: {str(e)}")
-            report["errors"].append(f"Error al guardar el texto: {str(e)}")
-            
-        print(f"[INFO] create_report: PASO 1 completado")
+        # Esquema de secciones: el del conjunto de plantillas pedido o, si se elige
+        # automáticamente, el de por defecto (el título y el preámbulo son los mismos)
+        schema = templates = None
+        if _is_forced_template_set(template_set):
+            try:
+                templates = template_store.get_template_set(template_store.template_set_directory(template_set))
+                schema = templates.schema
+            except ValueError as e:
+                report["errors"].append(str(e))
+                report["status"] = "error"
+                return report
         
-        # Paso 1.5: Aplicar limpieza al archivo de texto completo
-        print(f"[INFO] create_report: PASO 1.5 - Aplicando limpieza al archivo de texto completo")
-        cleaned_output_txt = output_txt
-        try:
-            print(f"[DEBUG] create_report: Verificando existencia del archivo de texto {output_txt}")
-            if os.path.exists(output_txt):
-                print(f"[DEBUG] create_report: El archivo {output_txt} existe y tiene {os.path.getsize(output_txt)} bytes")
-                # Aplicar limpieza al archivo completo
-                print(f"[DEBUG] create_report: Limpiando archivo {output_txt}")
-                standardize_page_breaks(output_txt, output_txt)
-                print(f"[DEBUG] create_report: Archivo {output_txt} limpiado correctamente")
-            else:
-                print(f"[ERROR] create_report: El archivo {output_txt} no existe")
-                raise FileNotFoundError(f"Archivo no encontrado: {output_txt}")
-        except Exception as e:
-            print(f"[WARNING] create_report: Error al limpiar archivo {output_txt}: {str(e)}")
-            report["warnings"].append(f"Error al limpiar archivo de texto completo: {str(e)}")
+        for attempt, profile in enumerate(profiles, 1):
+            is_last_attempt = attempt == len(profiles)
+            try:
+                remaining = time_budget - (time.monotonic() - started) if time_budget else None
+                _check_cancelled(cancel_event, "la extracción")
+                split_results, text_content, page_starts = _extract_and_split(
+                    input_pdf, output_txt, output_dir, profile, report, schema,
+                    max_pages=max_pages, time_budget=remaining, cancel_event=cancel_event)
+            except BudgetExceeded as e:
+                report["extraction_profile"] = profile
+                if e.details['budget'] == 'time':
+                    # El límite de tiempo es del documento, no de cada perfil
+                    e = BudgetExceeded('time', time_budget, round(time.monotonic() - started, 2))
+                return _reject(report, e)
+            except ExtractionError as e:
+                if is_last_attempt:
+                    report["errors"].append(str(e))
+                    report["status"] = "error"
+                    report["extraction_profile"] = profile
+                    return report
+                print(f"[WARNING] create_report: Falló la extracción con el perfil '{profile}', reintentando")
+                continue
             
-        print(f"[INFO] create_report: PASO 1.5 completado")
-        
-        # Paso 2: Dividir el texto en secciones
-        print(f"[INFO] create_report: PASO 2 - Dividiendo texto en secciones")
+            missing = missing_sections(split_results, schema)
+            if missing and not is_last_attempt:
+                print(f"[WARNING] create_report: El perfil '{profile}' no encontró {len(missing)} secciones "
+                      f"({', '.join(missing)}), reintentando con otro perfil")
+                # Eliminar las secciones del intento fallido antes de reintentar
+                for path in split_results.values():
+                    os.remove(path)
+                continue
+            break
         
-        # Crear directorio de salida si no existe
-        print(f"[DEBUG] create_report: Creando directorio de salida {output_dir} si no existe")
-        os.makedirs(output_dir, exist_ok=True)
+        report["extraction_profile"] = profile
+        print(f"[INFO] create_report: Texto extraído con el perfil '{profile}'")
         
+        # Paso 2.5: Elegir el conjunto de plantillas
+        _check_cancelled(cancel_event, "elegir las plantillas")
         try:
-            print(f"[DEBUG] create_report: Verificando existencia del archivo de texto limpio {output_txt}")
-            if os.path.exists(output_txt):
-                print(f"[DEBUG] create_report: El archivo {output_txt} existe y tiene {os.path.getsize(output_txt)} bytes")
-            else:
-                print(f"[ERROR] create_report: El archivo {output_txt} no existe")
-                raise FileNotFoundError(f"Archivo no encontrado: {output_txt}")
-                
-            print(f"[DEBUG] create_report: Iniciando división del texto en {output_dir}")
-            split_results = split_contract_text(output_txt, output_dir)
-            
-            num_files = len(split_results) if isinstance(split_results, dict) else 0
-            print(f"[INFO] create_report: Se crearon {num_files} archivos en {output_dir}")
-            
-            # Listar los archivos creados
-            print(f"[DEBUG] create_report: Archivos creados:")
-            for section, path in (split_results.items() if isinstance(split_results, dict) else []):
-                print(f"[DEBUG] create_report:   - {section}: {path}")
-                
-            # Ya no es necesario aplicar limpieza a cada archivo pues ya se limpió el archivo original
-        except Exception as e:
-            import traceback
-            error_msg = f"Error al dividir el texto: {str(e)}"
-            print(f"[ERROR] create_report: {error_msg}")
-            print(f"[DEBUG] {traceback.format_exc()}")
-            report["errors"].append(error_msg)
+            template_dir = _select_template_set(split_results, template_set, report)
+        except ValueError as e:
+            report["errors"].append(str(e))
             report["status"] = "error"
             return report
-            
-        print(f"[INFO] create_report: PASO 2 completado")
+        except MemoryError:
+            raise
+        except Exception as e:
+            report["warnings"].append(f"Error al elegir el conjunto de plantillas: {str(e)}")
+            report["template_set"] = {'name': template_store.DEFAULT_SET_NAME, 'confidence': None, 'scores': {}}
+            template_dir = template_store.DEFAULT_TEMPLATE_DIR
+        
+        # Copia de las plantillas para el resto del análisis: si se recargan mientras tanto
+        # (ver template_store.start_watcher), este contrato se sigue comparando con las mismas
+        if templates is None:
+            templates = template_store.get_template_set(template_dir)
+        report["template_set"]["version"] = templates.version
+        
+        # Si el conjunto elegido automáticamente tiene su propio esquema de secciones,
+        # volver a dividir el texto con él
+        routed_schema = templates.schema
+        if schema is None and routed_schema is not None:
+            print(f"[INFO] create_report: Dividiendo de nuevo con el esquema '{routed_schema.name}'")
+            for path in split_results.values():
+                os.remove(path)
+            try:
+                split_results = _split_sections(text_content, page_starts, output_dir, routed_schema, report)
+            except ExtractionError as e:
+                report["errors"].append(str(e))
+                report["status"] = "error"
+                return report
+        
+        _emit(on_stage, 'sections', {
+            'sections': list(split_results),
+            'section_pages': report.get("section_pages", {}),
+            'extraction_profile': profile,
+            'template_set': report.get("template_set"),
+        })
         
         # Paso 3: Analizar estadísticas
+        _check_cancelled(cancel_event, "las estadísticas")
         
         try:
-            # Obtener la ruta al directorio de plantillas
-            base_dir = Path(__file__).parent.parent
-            template_dir = os.path.join(base_dir, "template")
-            
-            # Analizar estadísticas
-            stats_results = statistics.compare_files_with_templates(output_dir, template_dir)
+            # Puntuaciones z respecto a la línea base del corpus (contratos ya analizados)
+            set_name = report["template_set"]["name"]
+            try:
+                baseline = baseline_store.get_baseline()
+            except MemoryError:
+                raise
+            except Exception as e:
+                baseline = None
+                report["warnings"].append(f"Error al calcular las puntuaciones z: {str(e)}")
             
-            # Convertir resultados a un formato más adecuado para JSON
-            for article, data in stats_results.items():
+            def finish_section(article, data):
+                """Completa las estadísticas de un artículo y las notifica"""
+                if baseline is not None and 'output_stats' in data:
+                    try:
+                        section = baseline_store.baseline_section(article, set_name, report.get("extraction_profile"))
+                        data['z_scores'] = baseline.z_scores(section, data['output_stats'])
+                        data['baseline_samples'] = baseline.samples(section)
+                    except MemoryError:
+                        raise
+                    except Exception as e:
+                        report["warnings"].append(f"Error al calcular las puntuaciones z: {str(e)}")
+                # Convertir los valores de ratio a cadenas de texto para JSON
                 if 'ratios' in data:
-                    # Convertir los valores de ratio a cadenas de texto para JSON
-                    stats_results[article]['ratios'] = {
-                        k: str(v) for k, v in data['ratios'].items()
-                    }
+                    data['ratios'] = {k: str(v) for k, v in data['ratios'].items()}
+                _emit(on_stage, 'section_statistics', {'section': article, 'statistics': data})
+            
+            # Analizar estadísticas (cada artículo se completa y se notifica en cuanto se compara)
+            stats_results = statistics.compare_files_with_templates(output_dir, templates, on_section=finish_section)
             
             report["statistics"] = stats_results
             
+        except MemoryError:
+            raise
         except Exception as e:
             report["warnings"].append(f"Error al analizar estadísticas: {str(e)}")
         
         # Paso 4: Analizar párrafos
+        _check_cancelled(cancel_event, "el análisis de párrafos")
         
         try:
             # Analizar párrafos
-            para_results = thermodynamics.compare_paragraph_counts(output_dir, template_dir)
+            para_results = thermodynamics.compare_paragraph_counts(output_dir, templates)
             
             # Convertir resultados a un formato más adecuado para JSON
             formatted_para_results = {}
@@ -213,41 +481,116 @@ def create_report(input_pdf="input.pdf", output_dir="output_split"):
                         'template_paragraphs': data['template_paragraphs'],
                         'ratio': data['ratio']
                     }
+                    if 'alignment' in data:
+                        formatted_para_results[section]['alignment'] = data['alignment']
                 else:
                     formatted_para_results[section] = {'error': data['error']}
             
             report["paragraph_analysis"] = formatted_para_results
+            _emit(on_stage, 'paragraph_analysis', {'paragraph_analysis': formatted_para_results})
             
+        except MemoryError:
+            raise
         except Exception as e:
             report["warnings"].append(f"Error al analizar párrafos: {str(e)}")
         
         # Finalizar reporte
+        _check_cancelled(cancel_event, "guardar el reporte")
         report["status"] = "complete" if not report["errors"] else "error"
         
         # Guardar el reporte en un archivo JSON para referencia
-        report_file = os.path.join(base_dir, "contract_report.json")
+        report_file = os.path.join(work_dir, "contract_report.json")
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False)
             
         return report
         
+    except MemoryError:
+        # Sin memoria el reporte no es fiable; lo gestiona quien llama (ver resource_limits)
+        raise
+    except OperationCancelled as e:
+        print(f"[INFO] create_report: {str(e)}")
+        report["status"] = "cancelled"
+        report["warnings"].append(str(e))
+        return report
     except Exception as e:
         report["status"] = "error"
         report["errors"].append(f"Error general: {str(e)}")
         return report
 
 
-def get_report_html(report, output_dir="output_split"):
+def format_page_span(pages):
+    """
+    Formatea las páginas de una sección ("3" o "3-4"), o "-" si no se conocen.
+    """
+    if not pages:
+        return '-'
+    first_page, last_page = pages
+    return f"{first_page}" if first_page == last_page else f"{first_page}-{last_page}"
+
+
+def max_z_score(z_scores):
+    """
+    Devuelve la puntuación z de mayor valor absoluto de una sección, o None.
+    """
+    values = [z for z in (z_scores or {}).values() if z is not None]
+    return max(values, key=abs) if values else None
+
+
+def get_report_html(report, output_dir="output_split", templates=None):
     """
     Convierte el reporte en formato HTML para mostrarlo en la página web.
     
     Args:
         report (dict): El reporte generado por create_report()
         output_dir (str): Directorio donde se encuentran los archivos divididos
+        templates (TemplateSet, optional): Plantillas del análisis (ver get_report_fragments)
         
     Returns:
         str: HTML formateado del reporte
     """
+    return '\n'.join(fragment for _, fragment in get_report_fragments(report, output_dir, templates))
+
+
+def _report_templates(report):
+    """
+    Plantillas con las que se calcularon las estadísticas de un reporte: la versión guardada en
+    report["template_set"] aunque el vigilante ya haya cargado otra, o, si ya no está en memoria,
+    la versión actual del conjunto.
+    """
+    template_set = report.get("template_set", {})
+    templates = template_store.get_template_snapshot(template_set.get("version"))
+    if templates is not None:
+        return templates
+    set_name = template_set.get("name", template_store.DEFAULT_SET_NAME)
+    template_dir = template_store.DEFAULT_TEMPLATE_DIR
+    if set_name != template_store.DEFAULT_SET_NAME:
+        try:
+            template_dir = template_store.template_set_directory(set_name)
+        except ValueError:
+            print(f"[WARNING] get_report_html: Conjunto de plantillas desconocido: {set_name}")
+    templates = template_store.get_template_set(template_dir)
+    if template_set.get("version") and templates.version != template_set["version"]:
+        print(f"[WARNING] get_report_html: La versión {template_set['version']} de las plantillas ya no está "
+              f"disponible, se muestra la versión {templates.version}")
+    return templates
+
+
+def get_report_fragments(report, output_dir="output_split", templates=None):
+    """
+    Genera el HTML del reporte por fragmentos, para poder enviarlo por partes. Unidos con
+    saltos de línea, los fragmentos forman el HTML de get_report_html().
+    
+    Args:
+        report (dict): El reporte generado por create_report()
+        output_dir (str): Directorio donde se encuentran los archivos divididos
+        templates (TemplateSet, optional): Plantillas del análisis. Si es None, se usa la
+                                           versión indicada en report["template_set"]
+        
+    Returns:
+        list: Pares (nombre, HTML) en orden: "header", "tables", "comparison", "article_<n>",
+              "furthermore" y "footer" (solo los que tienen contenido)
+    """
     # Determinar el directorio base de la aplicación
     if getattr(sys, 'frozen', False):
         # Si es ejecutable, usar el directorio donde está el ejecutable
@@ -271,7 +614,13 @@ def get_report_html(report, output_dir="output_split"):
             print(f"[DEBUG] get_report_html: - {file}")
     else:
         print(f"[DEBUG] get_report_html: ¡El directorio {output_dir} no existe!")
-    html = []
+    fragments = []
+    
+    def new_fragment(name):
+        fragments.append((name, []))
+        return fragments[-1][1]
+    
+    html = new_fragment('header')
     # Iniciar el contenedor principal del reporte en formato ASCII
     html.append('<div class="report-container">')
     
@@ -317,13 +666,14 @@ Fecha: {report['date']}
         
         # Preparar datos para la tabla combinada
         table_data = []
-        headers = ['Art.', 'palabras', 'puntos.', 'comas.', 's', 'a', 'e', 'i', 'o', 'u', 
-                   'Párrafos (Contrato)', 'Párrafos (Plantilla)', 'Relación']
+        headers = ['Art.', 'Pág.', 'palabras', 'puntos.', 'comas.', 's', 'a', 'e', 'i', 'o', 'u', 
+                   'Párrafos (Contrato)', 'Párrafos (Plantilla)', 'Relación', 'z máx.']
+        section_pages = report.get("section_pages", {})
         
         # Solo incluir los artículos (1-15), omitir title, between, and
         for i in range(1, 16):
             article_key = f'article_{i}'
-            row = [i]
+            row = [i, format_page_span(section_pages.get(article_key))]
             
             # Añadir estadísticas
             if article_key in report["statistics"]:
@@ -360,11 +710,32 @@ Fecha: {report['date']}
             else:
                 row.extend(['-', '-', '-'])
             
+            # Añadir la mayor desviación respecto a la línea base del corpus
+            z = max_z_score(report["statistics"].get(article_key, {}).get('z_scores'))
+            row.append(f"{z:+.2f}" if z is not None else '-')
+            
             table_data.append(row)
         
         # Generar tabla ASCII
         ascii_table = tabulate(table_data, headers=headers, tablefmt="grid")
         
+        # Párrafos insertados, eliminados y modificados de cada artículo (índices desde 1)
+        alignment_rows = []
+        for i in range(1, 16):
+            alignment = report["paragraph_analysis"].get(f'article_{i}', {}).get('alignment')
+            if alignment and (alignment['inserted'] or alignment['deleted'] or alignment['modified']):
+                alignment_rows.append([
+                    i,
+                    ', '.join(str(index) for index in alignment['inserted']) or '-',
+                    ', '.join(str(index) for index in alignment['deleted']) or '-',
+                    ', '.join(f"{t}→{o}" for t, o in alignment['modified']) or '-'
+                ])
+        alignment_table = None
+        if alignment_rows:
+            alignment_table = tabulate(alignment_rows, headers=['Art.', 'Párrafos insertados', 'Párrafos eliminados',
+                                                                'Párrafos modificados (Plantilla→Contrato)'],
+                                       tablefmt="grid")
+        
         # Crear una tabla ASCII para información de páginas y metadatos
         page_ratio = report.get("standard_page_ratio", 0)
         page_count = report.get("page_count", 0)
@@ -375,7 +746,9 @@ Fecha: {report['date']}
             ["Información de Páginas", "Valor"],
             ["Número de páginas en el documento", f"{page_count}"],
             ["Número estándar de páginas", f"{standard_page_count}"],
-            ["Ratio de páginas (Actual/Estándar)", f"{page_ratio:.2f}"]
+            ["Ratio de páginas (Actual/Estándar)", f"{page_ratio:.2f}"],
+            ["Perfil de extracción", report.get("extraction_profile", "-")],
+            ["Conjunto de plantillas", report.get("template_set", {}).get("name", "-")]
         ]
         
         page_info_table = tabulate(page_info, headers="firstrow", tablefmt="grid")
@@ -401,32 +774,32 @@ Fecha: {report['date']}
         metadata_table = tabulate(metadata_rows, headers="firstrow", tablefmt="grid")
         
         # Añadir directamente las tablas ASCII al contenedor único
+        html = new_fragment('tables')
         html.append(header_ascii)  # Ya se inicializó el encabezado antes
         html.append(page_info_table)
         html.append('\n')
         html.append(metadata_table)
         html.append('\n')
         html.append(ascii_table)
+        if alignment_table:
+            html.append('\n')
+            html.append(alignment_table)
         html.append('</pre>')  # Cerrar el contenedor ASCII único
         
         # No cerramos el div.report-container aquí, lo haremos al final
         
         # Añadir sección de comparación visual con desplegables (con separación)
+        html = new_fragment('comparison')
         html.append('<div class="visual-comparison" style="margin-top:30px; padding-top:20px;">')
         
         
         # Incluir enlace a Material Icons
         html.append('<link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">')
         
-        # Obtener la ruta al directorio de plantillas
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = Path(__file__).parent.parent
-        
-        template_dir = os.path.join(base_dir, "template")
-        print(f"[DEBUG] get_report_html: Directorio de plantillas: {template_dir}")
-        print(f"[DEBUG] get_report_html: El directorio de plantillas existe: {os.path.exists(template_dir)}")
+        # Plantillas con las que se compararon las secciones (las mismas que las estadísticas)
+        if templates is None:
+            templates = _report_templates(report)
+        print(f"[DEBUG] get_report_html: Plantillas: {templates.directory} (versión {templates.version})")
         
         # Listar archivos en output_dir para diagnóstico
         print(f"[DEBUG] get_report_html: Contenido de {output_dir}:")
@@ -439,15 +812,16 @@ Fecha: {report['date']}
         # Crear desplegables para cada artículo, alternando contrato y plantilla
         for i in range(1, 16):
             article_key = f'article_{i}'
+            html = new_fragment(article_key)
             
             # Ruta al archivo de salida del artículo
             output_article_path = os.path.join(output_dir, f'output_{article_key}.txt')
-            # Ruta al archivo de plantilla del artículo
-            template_article_path = os.path.join(template_dir, f'template_{article_key}.txt')
+            # Texto de la plantilla del artículo
+            template_content = templates.texts.get(article_key)
             
             # Verificar la existencia de los archivos (para diagnóstico)
             print(f"[DEBUG] get_report_html: Verificando archivo output: {output_article_path} - Existe: {os.path.exists(output_article_path)}")
-            print(f"[DEBUG] get_report_html: Verificando archivo template: {template_article_path} - Existe: {os.path.exists(template_article_path)}")
+            print(f"[DEBUG] get_report_html: Verificando plantilla {article_key} - Existe: {template_content is not None}")
             
             # Verificar si existen los archivos
             if os.path.exists(output_article_path):
@@ -468,35 +842,30 @@ Fecha: {report['date']}
                         html.append(content_ascii)
                         html.append('</pre>')
                         html.append('</div>')
+                except MemoryError:
+                    raise
                 except Exception as e:
                     html.append(f'<p class="error">Error al leer el archivo: {str(e)}</p>')
                 html.append('</details>')
             
-            # Verificar si existe el archivo de plantilla
-            if os.path.exists(template_article_path):
+            # Verificar si existe la plantilla
+            if template_content is not None:
                 # Añadir desplegable para el artículo de la plantilla
                 html.append(f'<details class="template-comparison">')
                 html.append(f'<summary>')
                 html.append(f'<div class="summary-content">template_{article_key}</div>')
                 html.append(f'<span class="dropdown-icon">▼</span>')
                 html.append(f'</summary>')
-                try:
-                    with open(template_article_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        # Mostrar directamente el contenido sin encabezado
-                        content_ascii = content
-                        
-                        html.append(f'<div class="content-container">')
-                        html.append(f'<pre id="template-content-{i}" class="template-content ascii-style">')
-                        html.append(content_ascii)
-                        html.append('</pre>')
-                        html.append('</div>')
-                except Exception as e:
-                    html.append(f'<p class="error">Error al leer el archivo: {str(e)}</p>')
+                html.append(f'<div class="content-container">')
+                html.append(f'<pre id="template-content-{i}" class="template-content ascii-style">')
+                html.append(template_content)
+                html.append('</pre>')
+                html.append('</div>')
                 html.append('</details>')
         
         # Añadir sección para furthermore si existe
         furthermore_path = os.path.join(output_dir, 'output_furthermore.txt')
+        html = new_fragment('furthermore')
         if os.path.exists(furthermore_path):
             # Añadir desplegable para la sección furthermore
             html.append(f'<details class="article-comparison">')
@@ -512,10 +881,13 @@ Fecha: {report['date']}
                     html.append(content)
                     html.append('</pre>')
                     html.append('</div>')
+            except MemoryError:
+                raise
             except Exception as e:
                 html.append(f'<p class="error">Error al leer el archivo furthermore: {str(e)}</p>')
             html.append('</details>')
         
+        html = new_fragment('footer')
         html.append('</div>')
         
         # Añadir JavaScript para la función de copiar al portapapeles
@@ -631,7 +1003,7 @@ Fecha: {report['date']}
     
     html.append('</div>')  # Cierra report-container
     
-    return '\n'.join(html)
+    return [(name, '\n'.join(parts)) for name, parts in fragments if parts]
 
 
 # Función principal para ejecutar desde la línea de comandos
@@ -639,16 +1011,27 @@ if __name__ == "__main__":
     input_pdf = "input.pdf"
     output_dir = "output_split"
     
+    # --profile guarda un perfil del análisis (ver profiling)
+    profile = "--profile" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--profile"]
+    
     # Permitir especificar archivo de entrada
-    if len(sys.argv) > 1:
-        input_pdf = sys.argv[1]
+    if len(args) > 0:
+        input_pdf = args[0]
     
     # Permitir especificar directorio de salida
-    if len(sys.argv) > 2:
-        output_dir = sys.argv[2]
+    if len(args) > 1:
+        output_dir = args[1]
     
     print(f"Generando reporte para {input_pdf}...")
-    report = create_report(input_pdf, output_dir)
+    from inspector_functions.profiling import profile_job, profiling_enabled
+    if profile or profiling_enabled():
+        # Sin trabajo, los archivos del perfil se nombran como el PDF
+        with profile_job(Path(input_pdf).stem, input_pdf) as profile_info:
+            report = create_report(input_pdf, output_dir)
+        print(f"Perfil guardado en {profile_info['pstats']} y {profile_info['collapsed']}")
+    else:
+        report = create_report(input_pdf, output_dir)
     
     if report["status"] == "complete":
         print("Reporte generado con éxito")
@@ -0,0 +1,291 @@
+"""
+Inspector Matrix
+
+Este módulo compara muchos contratos a la vez. Los conteos de todos los contratos se
+guardan en una matriz densa contratos x secciones x métricas, y los cocientes,
+desviaciones y alertas se calculan con operaciones sobre la matriz completa (con NumPy
+si está instalado, o con array de la biblioteca estándar si no lo está).
+"""
+import csv
+import json
+import math
+import os
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Configurar la importación para que funcione tanto cuando se ejecuta directamente como cuando se importa
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+from inspector_functions.inspector_statistics import STAT_KEYS
+
+# Secciones que se comparan (las mismas que muestra el reporte)
+ARTICLE_SECTIONS = [f'article_{i}' for i in range(1, 16)]
+
+# Desviación relativa respecto a la plantilla a partir de la cual se marca una métrica
+DEFAULT_TOLERANCE = 0.25
+
+NAN = float('nan')
+INF = float('inf')
+
+
+class ComparisonMatrix:
+    """
+    Conteos de varios contratos y de sus plantillas en matrices contratos x secciones x métricas.
+
+    Las secciones que no aparecen en un contrato quedan como NaN y sus cocientes también.
+
+    Attributes:
+        contracts (list): Identificadores de los contratos (primer eje)
+        sections (list): Nombres de las secciones (segundo eje)
+        metrics (list): Claves de las métricas (tercer eje)
+        backend (str): 'numpy' o 'array'
+    """
+
+    def __init__(self, contracts, sections=ARTICLE_SECTIONS, metrics=STAT_KEYS):
+        self.contracts = list(contracts)
+        self.sections = list(sections)
+        self.metrics = list(metrics)
+        self._section_index = {section: i for i, section in enumerate(self.sections)}
+        self.shape = (len(self.contracts), len(self.sections), len(self.metrics))
+        size = self.shape[0] * self.shape[1] * self.shape[2]
+
+        if np is not None:
+            self.backend = 'numpy'
+            self.counts = np.full(self.shape, np.nan)
+            self.template_counts = np.full(self.shape, np.nan)
+        else:
+            self.backend = 'array'
+            self.counts = array('d', [NAN]) * size
+            self.template_counts = array('d', [NAN]) * size
+
+    def _offset(self, contract_index, section_index):
+        return (contract_index * self.shape[1] + section_index) * self.shape[2]
+
+    def set_section(self, contract_index, section, output_stats, template_stats):
+        """
+        Guarda los conteos de una sección de un contrato y de su plantilla.
+
+        Args:
+            contract_index (int): Posición del contrato en self.contracts
+            section (str): Nombre de la sección
+            output_stats (dict): Conteos del contrato (inspector_statistics.analyze_string)
+            template_stats (dict): Conteos de la plantilla
+        """
+        section_index = self._section_index.get(section)
+        if section_index is None:
+            return
+        output_values = [output_stats[key] for key in self.metrics]
+        template_values = [template_stats[key] for key in self.metrics]
+        if self.backend == 'numpy':
+            self.counts[contract_index, section_index] = output_values
+            self.template_counts[contract_index, section_index] = template_values
+        else:
+            offset = self._offset(contract_index, section_index)
+            end = offset + len(self.metrics)
+            self.counts[offset:end] = array('d', output_values)
+            self.template_counts[offset:end] = array('d', template_values)
+
+    @classmethod
+    def from_reports(cls, reports, sections=ARTICLE_SECTIONS, metrics=STAT_KEYS):
+        """
+        Construye la matriz a partir de reportes de create_report().
+
+        Args:
+            reports (dict): Identificador del contrato -> reporte
+
+        Returns:
+            ComparisonMatrix: Matriz con los conteos de todos los reportes
+        """
+        matrix = cls(reports.keys(), sections, metrics)
+        for contract_index, report in enumerate(reports.values()):
+            for section, data in report.get('statistics', {}).items():
+                if 'output_stats' in data and 'template_stats' in data:
+                    matrix.set_section(contract_index, section, data['output_stats'], data['template_stats'])
+        return matrix
+
+    def ratios(self):
+        """
+        Cocientes contrato/plantilla de todas las métricas, con las mismas reglas que
+        inspector_statistics: inf si la plantilla es 0 y el contrato no, 1 si ambos son 0.
+
+        Returns:
+            Matriz (numpy.ndarray o array) con la forma de self.shape
+        """
+        if self.backend == 'numpy':
+            counts, template_counts = self.counts, self.template_counts
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = np.where(template_counts > 0, counts / template_counts,
+                                  np.where(counts > 0, np.inf, 1.0))
+            ratios[np.isnan(counts) | np.isnan(template_counts)] = np.nan
+            return ratios
+
+        ratios = array('d', self.counts)
+        for i, (output_value, template_value) in enumerate(zip(self.counts, self.template_counts)):
+            if math.isnan(output_value) or math.isnan(template_value):
+                ratios[i] = NAN
+            elif template_value > 0:
+                ratios[i] = output_value / template_value
+            else:
+                ratios[i] = INF if output_value > 0 else 1.0
+        return ratios
+
+    def deviations(self, ratios=None):
+        """
+        Desviación relativa respecto a la plantilla (cociente - 1).
+
+        Args:
+            ratios (optional): Resultado de ratios(), para no volver a calcularlo
+        """
+        if ratios is None:
+            ratios = self.ratios()
+        if self.backend == 'numpy':
+            return ratios - 1.0
+        return array('d', (ratio - 1.0 for ratio in ratios))
+
+    def flags(self, tolerance=DEFAULT_TOLERANCE, deviations=None):
+        """
+        Métricas cuya desviación absoluta supera la tolerancia (las secciones que faltan no se marcan).
+
+        Args:
+            tolerance (float): Desviación relativa máxima admitida
+            deviations (optional): Resultado de deviations(), para no volver a calcularlo
+
+        Returns:
+            Matriz de booleanos (numpy) o de 0/1 (array) con la forma de self.shape
+        """
+        if deviations is None:
+            deviations = self.deviations()
+        if self.backend == 'numpy':
+            with np.errstate(invalid='ignore'):
+                return np.abs(deviations) > tolerance
+        return array('b', (1 if abs(deviation) > tolerance else 0 for deviation in deviations))
+
+    def _value(self, values, contract_index, section_index, metric_index):
+        if self.backend == 'numpy':
+            return values[contract_index, section_index, metric_index]
+        return values[self._offset(contract_index, section_index) + metric_index]
+
+    def to_rows(self, tolerance=DEFAULT_TOLERANCE, only_flagged=False):
+        """
+        Convierte los cocientes en filas de tabla: contrato, sección, un cociente por
+        métrica y el número de métricas marcadas.
+
+        Args:
+            tolerance (float): Tolerancia para las alertas
+            only_flagged (bool): Incluir solo las secciones con alguna métrica marcada
+
+        Returns:
+            list: Filas de la tabla (las secciones que faltan se omiten)
+        """
+        ratios = self.ratios()
+        flags = self.flags(tolerance, self.deviations(ratios))
+        rows = []
+        for contract_index, contract in enumerate(self.contracts):
+            for section_index, section in enumerate(self.sections):
+                values = [self._value(ratios, contract_index, section_index, metric_index)
+                          for metric_index in range(len(self.metrics))]
+                if math.isnan(values[0]):
+                    continue
+                flagged = sum(int(self._value(flags, contract_index, section_index, metric_index))
+                              for metric_index in range(len(self.metrics)))
+                if only_flagged and not flagged:
+                    continue
+                rows.append([contract, section] + [round(float(value), 3) for value in values] + [flagged])
+        return rows
+
+    def headers(self):
+        """Encabezados de las filas de to_rows()"""
+        return ['contrato', 'sección'] + self.metrics + ['alertas']
+
+    def print_table(self, tolerance=DEFAULT_TOLERANCE, only_flagged=False):
+        """Imprime los cocientes en una tabla usando tabulate"""
+        from tabulate import tabulate
+        print(tabulate(self.to_rows(tolerance, only_flagged), headers=self.headers(), tablefmt="grid"))
+
+    def save_csv(self, output_file, tolerance=DEFAULT_TOLERANCE, only_flagged=False):
+        """
+        Guarda los cocientes en un archivo CSV.
+
+        Args:
+            output_file (str): Ruta al archivo de salida
+            tolerance (float): Tolerancia para las alertas
+            only_flagged (bool): Incluir solo las secciones con alguna métrica marcada
+        """
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers())
+            writer.writerows(self.to_rows(tolerance, only_flagged))
+
+
+def find_report_files(paths):
+    """
+    Busca los archivos contract_report.json de una lista de archivos y directorios
+    (por ejemplo, el directorio jobs/ de la aplicación).
+
+    Args:
+        paths (list): Archivos JSON o directorios donde buscar
+
+    Returns:
+        list: Rutas a los reportes encontrados
+    """
+    report_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                if 'contract_report.json' in files:
+                    report_files.append(os.path.join(root, 'contract_report.json'))
+        elif os.path.isfile(path):
+            report_files.append(path)
+    return sorted(report_files)
+
+
+def load_reports(report_files):
+    """
+    Carga reportes JSON, indexados por su ruta.
+
+    Args:
+        report_files (list): Rutas a los reportes
+
+    Returns:
+        dict: Ruta -> reporte
+    """
+    reports = {}
+    for report_file in report_files:
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                reports[report_file] = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] inspector_matrix: No se pudo leer {report_file}: {str(e)}")
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compara los reportes de muchos contratos a la vez')
+    parser.add_argument('paths', nargs='+', help='Reportes contract_report.json o directorios donde buscarlos')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Desviación relativa máxima respecto a la plantilla')
+    parser.add_argument('--flagged', action='store_true', help='Mostrar solo las secciones con alertas')
+    parser.add_argument('--csv', help='Guardar la tabla en un archivo CSV')
+    args = parser.parse_args()
+
+    reports = load_reports(find_report_files(args.paths))
+    if not reports:
+        print("No se encontraron reportes")
+        sys.exit(1)
+
+    matrix = ComparisonMatrix.from_reports(reports)
+    print(f"{len(reports)} contratos comparados (backend: {matrix.backend})")
+    if args.csv:
+        matrix.save_csv(args.csv, args.tolerance, args.flagged)
+        print(f"Resultados guardados en {args.csv}")
+    else:
+        matrix.print_table(args.tolerance, args.flagged)
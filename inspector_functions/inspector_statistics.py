@@ -9,6 +9,16 @@ import re
 import sys
 from tabulate import tabulate
 
+try:
+    from inspector_functions import template_store
+except ImportError:
+    # Importación directa cuando se ejecuta como script independiente
+    import template_store
+
+# Conteos que calcula analyze_string(), en el orden en que se muestran
+STAT_KEYS = ['word_count', 'period_count', 'comma_count', 's_count',
+             'a_count', 'e_count', 'i_count', 'o_count', 'u_count']
+
 
 def analyze_text(file_path):
     """
@@ -37,11 +47,28 @@ def analyze_text(file_path):
     try:
         with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             text = f.read()
+    except MemoryError:
+        raise
     except Exception as e:
         raise IOError(f"Error al leer el archivo: {str(e)}")
     
-    # Eliminar el marcador de salto de página
-    text_clean = text.replace('===PAGE_BREAK===', '')
+    return analyze_string(text)
+
+
+def analyze_string(text):
+    """
+    Cuenta palabras, puntos, comas, la letra "s" y vocales de un texto ya cargado
+    en memoria, excluyendo el marcador de salto de página.
+    
+    Args:
+        text (str): Texto a analizar
+    
+    Returns:
+        dict: Diccionario con los mismos conteos que analyze_text()
+    """
+    # El texto limpio ya no lleva marcadores de salto de página; solo los archivos
+    # generados por versiones anteriores necesitan quitarlos
+    text_clean = text.replace('===PAGE_BREAK===', '') if '===PAGE_BREAK===' in text else text
     
     # Limpiar el texto para contar palabras (manteniendo espacios donde había puntuación)
     text_for_words = re.sub(r'[^\w\s]', ' ', text_clean)
@@ -79,33 +106,36 @@ def analyze_text(file_path):
     return results
 
 
-def compare_files_with_templates(output_dir, template_dir):
+def compare_files_with_templates(output_dir, template_dir, on_section=None):
     """
     Compara archivos de salida con sus plantillas correspondientes.
     
     Args:
         output_dir (str): Directorio con archivos de salida
-        template_dir (str): Directorio con archivos de plantilla
+        template_dir (str or TemplateSet): Directorio con archivos de plantilla, o las plantillas ya compiladas
+        on_section (callable, optional): Función que se llama con (artículo, resultado) en cuanto
+                                         se compara cada artículo
         
     Returns:
         dict: Diccionario con resultados de comparación
     """
     results = {}
     
+    # Las estadísticas de las plantillas se calculan una sola vez y se reutilizan
+    templates = template_store.get_template_set(template_dir)
+    
     # Analizar archivos para artículos 1 a 15
     for i in range(1, 16):
         output_file = os.path.join(output_dir, f'output_article_{i}.txt')
-        template_file = os.path.join(template_dir, f'template_article_{i}.txt')
+        template_stats = templates.stats.get(f'article_{i}')
         
-        if os.path.exists(output_file) and os.path.exists(template_file):
+        if os.path.exists(output_file) and template_stats is not None:
             try:
                 output_stats = analyze_text(output_file)
-                template_stats = analyze_text(template_file)
                 
                 # Calcular cocientes
                 ratios = {}
-                for key in ['word_count', 'period_count', 'comma_count', 's_count', 
-                           'a_count', 'e_count', 'i_count', 'o_count', 'u_count']:
+                for key in STAT_KEYS:
                     if template_stats[key] > 0:  # Evitar división por cero
                         ratios[key] = output_stats[key] / template_stats[key]
                     else:
@@ -116,8 +146,12 @@ def compare_files_with_templates(output_dir, template_dir):
                     'template_stats': template_stats,
                     'ratios': ratios
                 }
+            except MemoryError:
+                raise
             except Exception as e:
                 results[f'article_{i}'] = {'error': str(e)}
+            if on_section is not None:
+                on_section(f'article_{i}', results[f'article_{i}'])
     
     return results
 
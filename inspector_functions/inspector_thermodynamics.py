@@ -5,11 +5,41 @@ Este módulo proporciona funciones para analizar la estructura de contratos,
 específicamente contando el número de párrafos en archivos de texto y comparando
 entre contratos y plantillas para identificar cambios estructurales.
 """
+import hashlib
 import os
 import re
 import sys
+from bisect import bisect_left
+from collections import Counter
 from tabulate import tabulate
 
+try:
+    from inspector_functions import template_store
+except ImportError:
+    # Importación directa cuando se ejecuta como script independiente
+    import template_store
+
+# Niveles de anclas anidadas: dentro de cada hueco entre anclas se buscan nuevas anclas
+# (párrafos únicos en el hueco) hasta esta profundidad; después, los párrafos restantes se
+# emparejan por posición. Cada nivel recorre cada párrafo una vez como mucho
+MAX_ANCHOR_DEPTH = 8
+
+
+def _read_text(file_path):
+    """Lee un archivo de texto, validando que exista"""
+    # Validar que el archivo exista
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"El archivo no existe: {file_path}")
+    
+    # Leer el contenido del archivo
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except MemoryError:
+        raise
+    except Exception as e:
+        raise IOError(f"Error al leer el archivo: {str(e)}")
+
 
 def count_paragraphs(file_path):
     """
@@ -24,28 +54,181 @@ def count_paragraphs(file_path):
     Raises:
         FileNotFoundError: Si el archivo no existe
     """
-    # Validar que el archivo exista
-    if not os.path.isfile(file_path):
-        raise FileNotFoundError(f"El archivo no existe: {file_path}")
+    return count_string_paragraphs(_read_text(file_path))
+
+
+def split_paragraphs(text):
+    """
+    Divide un texto en párrafos (bloques de texto separados por una o más líneas en blanco).
     
-    # Leer el contenido del archivo
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            text = f.read()
-    except Exception as e:
-        raise IOError(f"Error al leer el archivo: {str(e)}")
+    Args:
+        text (str): Texto a dividir
     
-    # Eliminar el marcador de salto de página si existe
-    text_clean = text.replace('===PAGE_BREAK===', '')
+    Returns:
+        list: Párrafos no vacíos, en orden
+    """
+    # El texto limpio ya no lleva marcadores de salto de página; solo los archivos
+    # generados por versiones anteriores necesitan quitarlos
+    text_clean = text.replace('===PAGE_BREAK===', '') if '===PAGE_BREAK===' in text else text
     
     # Dividir el texto por párrafos
     # Consideramos un párrafo como un bloque de texto separado por una o más líneas en blanco
     paragraphs = re.split(r'\n\s*\n', text_clean)
     
     # Filtrar párrafos vacíos (solo espacios en blanco)
-    paragraphs = [p for p in paragraphs if p.strip()]
+    return [p for p in paragraphs if p.strip()]
+
+
+def count_string_paragraphs(text):
+    """
+    Cuenta el número de párrafos de un texto ya cargado en memoria.
+    
+    Args:
+        text (str): Texto a analizar
+    
+    Returns:
+        int: Número de párrafos encontrados en el texto
+    """
+    return len(split_paragraphs(text))
+
+
+def paragraph_hash(paragraph):
+    """
+    Huella de un párrafo. Los espacios y saltos de línea se normalizan, de modo que un
+    párrafo con otro ajuste de línea tiene la misma huella.
+    
+    Args:
+        paragraph (str): Texto del párrafo
     
-    return len(paragraphs)
+    Returns:
+        str: Huella hexadecimal (16 caracteres)
+    """
+    normalized = ' '.join(paragraph.split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def paragraph_hashes(text):
+    """
+    Huellas de los párrafos de un texto, en orden.
+    
+    Args:
+        text (str): Texto a analizar
+    
+    Returns:
+        list: Huella de cada párrafo
+    """
+    return [paragraph_hash(p) for p in split_paragraphs(text)]
+
+
+def _longest_increasing_pairs(pairs):
+    """
+    Subsecuencia creciente más larga (por el segundo elemento) de pares ya ordenados por
+    el primero, en O(n log n).
+    """
+    tails = []        # Índice en pairs del último elemento de cada longitud
+    tail_values = []  # Valor de ese último elemento
+    previous = []     # Índice en pairs del elemento anterior de la subsecuencia
+    for i, (_, value) in enumerate(pairs):
+        position = bisect_left(tail_values, value)
+        previous.append(tails[position - 1] if position > 0 else -1)
+        if position == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[position] = i
+            tail_values[position] = value
+    
+    result = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        result.append(pairs[i])
+        i = previous[i]
+    return result[::-1]
+
+
+def align_paragraphs(template_hashes, output_hashes):
+    """
+    Alinea los párrafos de una sección con los de su plantilla a partir de sus huellas.
+    
+    Los párrafos que aparecen una sola vez en ambos textos sirven de anclas (se conserva
+    la secuencia de anclas más larga que respeta el orden). En cada hueco entre dos anclas
+    se emparejan los párrafos iguales del principio y del final, y se buscan de nuevo anclas
+    entre los párrafos únicos dentro del hueco, hasta MAX_ANCHOR_DEPTH niveles. Los párrafos
+    que quedan se emparejan por posición (como sin cambios si sus huellas son iguales, o
+    como modificados) y los que sobran son insertados o eliminados.
+    
+    No se compara el texto ni se calcula una subsecuencia común completa: los huecos de un
+    mismo nivel no se solapan, así que cada nivel cuesta O(n log n) y el total, para n
+    párrafos entre plantilla y contrato, es O(MAX_ANCHOR_DEPTH · n log n) en el peor caso.
+    
+    Args:
+        template_hashes (list): Huellas de los párrafos de la plantilla
+        output_hashes (list): Huellas de los párrafos del contrato
+    
+    Returns:
+        dict: Índices (desde 1) de los párrafos insertados en el contrato, eliminados de
+              la plantilla y modificados (pares [plantilla, contrato]), y número de
+              párrafos sin cambios
+    """
+    alignment = {'inserted': [], 'deleted': [], 'modified': [], 'unchanged': 0}
+    _align_range(template_hashes, output_hashes, 0, len(template_hashes), 0, len(output_hashes), alignment, 0)
+    return alignment
+
+
+def _unique_anchors(template_hashes, output_hashes, t_start, t_end, o_start, o_end):
+    """
+    Anclas de un tramo: párrafos que aparecen una sola vez en el tramo de la plantilla y una
+    sola vez en el del contrato, en la secuencia más larga que respeta el orden.
+
+    Returns:
+        list: Pares (índice en la plantilla, índice en el contrato), en orden
+    """
+    template_counts = Counter(template_hashes[t_start:t_end])
+    output_counts = Counter(output_hashes[o_start:o_end])
+    output_positions = {output_hashes[j]: j for j in range(o_start, o_end) if output_counts[output_hashes[j]] == 1}
+    candidates = [(i, output_positions[template_hashes[i]]) for i in range(t_start, t_end)
+                  if template_counts[template_hashes[i]] == 1 and template_hashes[i] in output_positions]
+    return _longest_increasing_pairs(candidates)
+
+
+def _pair_by_position(template_hashes, output_hashes, t_start, t_end, o_start, o_end, alignment):
+    """Empareja por posición los párrafos de un tramo; los que sobran se insertaron o eliminaron"""
+    paired = min(t_end - t_start, o_end - o_start)
+    for offset in range(paired):
+        if template_hashes[t_start + offset] == output_hashes[o_start + offset]:
+            alignment['unchanged'] += 1
+        else:
+            alignment['modified'].append([t_start + offset + 1, o_start + offset + 1])
+    alignment['deleted'].extend(range(t_start + paired + 1, t_end + 1))
+    alignment['inserted'].extend(range(o_start + paired + 1, o_end + 1))
+
+
+def _align_range(template_hashes, output_hashes, t_start, t_end, o_start, o_end, alignment, depth):
+    """Alinea los párrafos de un tramo (la sección completa o el hueco entre dos anclas)"""
+    if depth > 0:
+        # Párrafos iguales al principio del hueco
+        while t_start < t_end and o_start < o_end and template_hashes[t_start] == output_hashes[o_start]:
+            alignment['unchanged'] += 1
+            t_start += 1
+            o_start += 1
+        
+        # Párrafos iguales al final del hueco
+        while t_start < t_end and o_start < o_end and template_hashes[t_end - 1] == output_hashes[o_end - 1]:
+            alignment['unchanged'] += 1
+            t_end -= 1
+            o_end -= 1
+    
+    anchors = []
+    if depth <= MAX_ANCHOR_DEPTH and t_start < t_end and o_start < o_end:
+        anchors = _unique_anchors(template_hashes, output_hashes, t_start, t_end, o_start, o_end)
+    if not anchors:
+        _pair_by_position(template_hashes, output_hashes, t_start, t_end, o_start, o_end, alignment)
+        return
+    
+    alignment['unchanged'] += len(anchors)
+    for t_anchor, o_anchor in anchors + [(t_end, o_end)]:
+        _align_range(template_hashes, output_hashes, t_start, t_anchor, o_start, o_anchor, alignment, depth + 1)
+        t_start, o_start = t_anchor + 1, o_anchor + 1
 
 
 def compare_paragraph_counts(output_dir, template_dir):
@@ -54,13 +237,16 @@ def compare_paragraph_counts(output_dir, template_dir):
     
     Args:
         output_dir (str): Directorio con archivos de salida
-        template_dir (str): Directorio con archivos de plantilla
+        template_dir (str or TemplateSet): Directorio con archivos de plantilla, o las plantillas ya compiladas
         
     Returns:
         dict: Diccionario con resultados de comparación de párrafos
     """
     results = {}
     
+    # Los párrafos de las plantillas se cuentan una sola vez y se reutilizan
+    templates = template_store.get_template_set(template_dir)
+    
     # Lista de prefijos de archivo para buscar
     prefixes = [
         'article_1', 'article_2', 'article_3', 'article_4', 'article_5',
@@ -84,18 +270,21 @@ def compare_paragraph_counts(output_dir, template_dir):
     # Analizar cada tipo de archivo normal
     for prefix in prefixes:
         output_file = os.path.join(output_dir, f'output_{prefix}.txt')
-        template_file = os.path.join(template_dir, f'template_{prefix}.txt')
+        template_paragraphs = templates.paragraphs.get(prefix)
         
-        if os.path.exists(output_file) and os.path.exists(template_file):
+        if os.path.exists(output_file) and template_paragraphs is not None:
             try:
-                output_paragraphs = count_paragraphs(output_file)
-                template_paragraphs = count_paragraphs(template_file)
+                output_hashes = paragraph_hashes(_read_text(output_file))
+                output_paragraphs = len(output_hashes)
                 
                 results[prefix] = {
                     'output_paragraphs': output_paragraphs,
                     'template_paragraphs': template_paragraphs,
-                    'ratio': f"{output_paragraphs}/{template_paragraphs}"
+                    'ratio': f"{output_paragraphs}/{template_paragraphs}",
+                    'alignment': align_paragraphs(templates.paragraph_hashes[prefix], output_hashes)
                 }
+            except MemoryError:
+                raise
             except Exception as e:
                 results[prefix] = {'error': str(e)}
     
@@ -105,17 +294,20 @@ def compare_paragraph_counts(output_dir, template_dir):
         
         # Si tiene un template definido
         if files['template']:
-            template_file = os.path.join(template_dir, files['template'])
-            if os.path.exists(output_file) and os.path.exists(template_file):
+            template_paragraphs = templates.paragraphs.get(section)
+            if os.path.exists(output_file) and template_paragraphs is not None:
                 try:
-                    output_paragraphs = count_paragraphs(output_file)
-                    template_paragraphs = count_paragraphs(template_file)
+                    output_hashes = paragraph_hashes(_read_text(output_file))
+                    output_paragraphs = len(output_hashes)
                     
                     results[section] = {
                         'output_paragraphs': output_paragraphs,
                         'template_paragraphs': template_paragraphs,
-                        'ratio': f"{output_paragraphs}/{template_paragraphs}"
+                        'ratio': f"{output_paragraphs}/{template_paragraphs}",
+                        'alignment': align_paragraphs(templates.paragraph_hashes[section], output_hashes)
                     }
+                except MemoryError:
+                    raise
                 except Exception as e:
                     results[section] = {'error': str(e)}
         # Si no tiene template (como furthermore)
@@ -128,6 +320,8 @@ def compare_paragraph_counts(output_dir, template_dir):
                     'template_paragraphs': 0,  # No hay template, así que marcamos como 0
                     'ratio': f"{output_paragraphs}/0 (N/A)"  # No hay ratio válido
                 }
+            except MemoryError:
+                raise
             except Exception as e:
                 results[section] = {'error': str(e)}
     
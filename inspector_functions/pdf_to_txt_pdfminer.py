@@ -9,12 +9,18 @@ This script:
 
 import os
 import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
+from pdfminer.layout import LAParams, LTChar, LTContainer
 from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
-from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfdocument import PDFDocument, PDFPasswordIncorrect, PDFEncryptionError
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+from pdfminer.psparser import PSLiteral, PSKeyword
 from io import StringIO
 import traceback
 
@@ -34,78 +40,605 @@ except ImportError:
     from inspector_functions.txt_cleaner import standardize_page_breaks
 
 
-def convert_pdf_to_text(pdf_path):
+# Extraction profiles: layout analysis parameters for LAParams, or None to skip layout analysis
+EXTRACTION_PROFILES = {
+    # Full layout analysis, including text inside figures (the original behaviour)
+    'accurate': {
+        'line_margin': 0.5,       # Valor moderado para mantener párrafos juntos
+        'word_margin': 0.1,       # Valor estándar para espaciado entre palabras
+        'char_margin': 7.0,       # Valor más alto para no unir demasiado los caracteres
+        'boxes_flow': 0.5,        # Valor estándar para el flujo de texto
+        'detect_vertical': False,  # Detectar texto vertical
+        'all_texts': True,        # Incluir todo el texto, incluso en figuras
+    },
+    # Lines and text boxes are still grouped, but boxes are ordered by position instead of
+    # the hierarchical box grouping, and text inside figures is not analyzed
+    'fast': {
+        'line_margin': 0.5,
+        'word_margin': 0.1,
+        'char_margin': 7.0,
+        'boxes_flow': None,
+        'detect_vertical': False,
+        'all_texts': False,
+    },
+    # No layout analysis: characters are written in content stream order, and spaces and
+    # line breaks are rebuilt from the character positions (see RawTextConverter)
+    'raw': None,
+}
+
+# Spacing rebuilt by the raw profile, relative to the character size (same meaning as the
+# word_margin and line_margin of the other profiles)
+RAW_WORD_MARGIN = 0.1
+RAW_LINE_MARGIN = 0.5
+
+DEFAULT_PROFILE = 'accurate'
+
+# "auto" tries the cheap profile first and falls back to the accurate one
+AUTO_PROFILE = 'auto'
+AUTO_PROFILE_ORDER = ('fast', 'accurate')
+
+
+def default_extraction_profile():
     """
-    Convert a PDF file to plain text using pdfminer.six.
+    Return the configured extraction profile (INSPECTOR_EXTRACTION_PROFILE), or 'accurate'.
+    """
+    profile = os.environ.get('INSPECTOR_EXTRACTION_PROFILE', DEFAULT_PROFILE).strip().lower()
+    if profile != AUTO_PROFILE and profile not in EXTRACTION_PROFILES:
+        print(f"[WARNING] Unknown extraction profile '{profile}', using '{DEFAULT_PROFILE}'")
+        return DEFAULT_PROFILE
+    return profile
+
+
+def profiles_to_try(profile=None):
+    """
+    Return the ordered list of extraction profiles to try for the requested profile.
+    
+    Args:
+        profile (str, optional): 'accurate', 'fast', 'raw' or 'auto'. If None, uses the configured default
+    
+    Returns:
+        tuple: Profile names, cheapest first
+    """
+    if profile is None:
+        profile = default_extraction_profile()
+    if profile == AUTO_PROFILE:
+        return AUTO_PROFILE_ORDER
+    if profile not in EXTRACTION_PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile}")
+    return (profile,)
+
+
+def get_laparams(profile=DEFAULT_PROFILE):
+    """
+    Build the LAParams for an extraction profile.
+    
+    Args:
+        profile (str): Name of the profile in EXTRACTION_PROFILES
+    
+    Returns:
+        LAParams: Layout parameters, or None if the profile skips layout analysis
+    """
+    if profile not in EXTRACTION_PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile}")
+    params = EXTRACTION_PROFILES[profile]
+    return LAParams(**params) if params is not None else None
+
+
+# Maximum number of pages kept in the page text cache (INSPECTOR_PAGE_CACHE_SIZE, 0 disables it)
+DEFAULT_PAGE_CACHE_SIZE = 256
+
+# Maximum number of decoded fonts shared between documents (INSPECTOR_FONT_CACHE_SIZE, 0 disables it)
+DEFAULT_FONT_CACHE_SIZE = 128
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache keyed by content fingerprint.
+    
+    Attributes:
+        max_size (int): Maximum number of cached entries
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that missed
+    """
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, fingerprint):
+        """Return the cached value for a fingerprint, or None"""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            value = self._entries.get(fingerprint)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.hits += 1
+            return value
+    
+    def put(self, fingerprint, value):
+        """Store a value, evicting the least recently used entries"""
+        if fingerprint is None or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[fingerprint] = value
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all cached entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Return the cache size and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _cache_size(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Caches shared by every extraction in this process (each analysis worker has its own)
+page_cache = LRUCache(_cache_size('INSPECTOR_PAGE_CACHE_SIZE', DEFAULT_PAGE_CACHE_SIZE))
+font_cache = LRUCache(_cache_size('INSPECTOR_FONT_CACHE_SIZE', DEFAULT_FONT_CACHE_SIZE))
+
+
+def extraction_cache_stats():
+    """
+    Return the size and hit rate of the page text and font caches of this process.
+    """
+    return {'pages': page_cache.stats(), 'fonts': font_cache.stats()}
+
+
+def _hash_pdf_object(digest, obj, seen):
+    """
+    Feed a PDF object into a hash, resolving references and hashing stream data.
+    
+    Object numbers differ between documents, so references are hashed by content. An
+    object that was already visited is hashed by its visit order, which keeps shared
+    and cyclic structures deterministic.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            digest.update(b'@%d;' % seen[obj.objid])
+            return
+        seen[obj.objid] = len(seen)
+        obj = obj.resolve()
+    
+    if isinstance(obj, dict):
+        digest.update(b'{')
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode('utf-8', 'replace') + b'=')
+            _hash_pdf_object(digest, obj[key], seen)
+        digest.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _hash_pdf_object(digest, item, seen)
+        digest.update(b']')
+    elif isinstance(obj, PDFStream):
+        # The encoded bytes are hashed, so images are never decoded. pdfminer drops them
+        # once the stream is decoded, so the digest is kept on the stream itself
+        stream_digest = getattr(obj, '_inspector_digest', None)
+        if stream_digest is None:
+            data = obj.rawdata if obj.rawdata is not None else obj.get_data()
+            stream_digest = hashlib.sha1(data).digest()
+            obj._inspector_digest = stream_digest
+        digest.update(b'S')
+        _hash_pdf_object(digest, obj.attrs, seen)
+        digest.update(stream_digest)
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update(b'/' + str(obj.name).encode('utf-8', 'replace') + b';')
+    elif isinstance(obj, bytes):
+        digest.update(b'b%d:' % len(obj) + obj)
+    else:
+        digest.update(repr(obj).encode('utf-8', 'replace') + b';')
+
+
+def page_fingerprint(page, profile=DEFAULT_PROFILE):
+    """
+    Fingerprint a page from its content streams, resources and geometry.
+    
+    Two pages with the same fingerprint produce the same text with the same profile,
+    whatever document they come from.
+    
+    Args:
+        page (PDFPage): Page to fingerprint
+        profile (str): Extraction profile the text is extracted with
+    
+    Returns:
+        str: Hex digest, or None if the page could not be fingerprinted
+    """
+    try:
+        digest = hashlib.sha1(profile.encode('utf-8'))
+        digest.update(repr((page.mediabox, page.cropbox, page.rotate)).encode('ascii'))
+        seen = {}
+        for stream in page.contents:
+            _hash_pdf_object(digest, stream, seen)
+        digest.update(b'|')
+        _hash_pdf_object(digest, page.resources, seen)
+        return digest.hexdigest()
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"[WARNING] page_fingerprint: No se pudo calcular la huella de la página: {str(e)}")
+        return None
+
+
+def font_fingerprint(spec):
+    """
+    Fingerprint a font from its dictionary, including the embedded font file and
+    ToUnicode streams.
+    
+    Args:
+        spec (dict): Font dictionary
+    
+    Returns:
+        str: Hex digest, or None if the font could not be fingerprinted
+    """
+    try:
+        digest = hashlib.sha1(b'font')
+        _hash_pdf_object(digest, spec, {})
+        return digest.hexdigest()
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"[WARNING] font_fingerprint: No se pudo calcular la huella de la fuente: {str(e)}")
+        return None
+
+
+class SharedFontResourceManager(PDFResourceManager):
+    """
+    PDFResourceManager that takes decoded fonts from the process-wide font cache.
+    
+    pdfminer caches fonts by object number, which is only meaningful inside one
+    document. This manager also looks fonts up by the digest of their dictionary and
+    font streams, so the fonts of documents from the same producer are parsed once
+    per process. CMaps are already cached process-wide by pdfminer's CMapDB.
+    """
+    
+    def get_font(self, objid, spec):
+        if objid and objid in self._cached_fonts:
+            return self._cached_fonts[objid]
+        
+        fingerprint = font_fingerprint(spec) if font_cache.max_size > 0 else None
+        font = font_cache.get(fingerprint)
+        if font is None:
+            font = super().get_font(None, spec)
+            font_cache.put(fingerprint, font)
+        
+        if objid and self.caching:
+            self._cached_fonts[objid] = font
+        return font
+
+
+class RawTextConverter(TextConverter):
+    """
+    TextConverter for the raw profile.
+    
+    Without layout analysis pdfminer writes the characters back to back, with no spaces or
+    line breaks. This converter keeps the content stream order, which is much cheaper than
+    grouping characters into lines and boxes, but adds a space when two characters on the
+    same line are further apart than RAW_WORD_MARGIN, a line break when the baseline
+    changes, and a blank line (a paragraph break) when the gap between two lines is larger
+    than RAW_LINE_MARGIN or the text goes back up the page.
+    """
+    
+    def receive_layout(self, ltpage):
+        parts = []
+        previous = None
+        for char in self._chars(ltpage):
+            if previous is not None:
+                size = min(char.height, previous.height) or 1.0
+                if abs(char.y0 - previous.y0) > size / 2:
+                    gap = previous.y0 - char.y1
+                    parts.append('\n\n' if gap < 0 or gap > RAW_LINE_MARGIN * size else '\n')
+                elif (char.x0 - previous.x1 > RAW_WORD_MARGIN * max(char.width, char.height)
+                      and not previous.get_text().isspace() and not char.get_text().isspace()):
+                    parts.append(' ')
+            parts.append(char.get_text())
+            previous = char
+        if parts:
+            parts.append('\n')
+        parts.append('\f')
+        self.write_text(''.join(parts))
+    
+    def _chars(self, item):
+        """Characters of a layout item (and of the figures inside it), in stream order"""
+        for child in item:
+            if isinstance(child, LTChar):
+                yield child
+            elif isinstance(child, LTContainer):
+                yield from self._chars(child)
+
+
+# Per-document budgets (configurable with INSPECTOR_MAX_PAGES and INSPECTOR_TIME_BUDGET;
+# 0 disables them). The time budget is checked between pages
+DEFAULT_MAX_PAGES = 200
+DEFAULT_TIME_BUDGET = 120.0
+
+# Number of leading pages probed for a text layer during the pre-flight checks
+PREFLIGHT_PROBE_PAGES = 3
+
+
+class PDFRejected(Exception):
+    """
+    The PDF cannot (or should not) be analyzed.
+    
+    Attributes:
+        code (str): 'unreadable', 'encrypted', 'too_many_pages', 'no_text_layer' or 'budget_exceeded'
+        details (dict): Extra information (limits, measured values)
+    """
+    
+    def __init__(self, code, message, **details):
+        super().__init__(message)
+        self.code = code
+        self.details = details
+    
+    def to_dict(self):
+        """Structured form of the error, for the report"""
+        return dict({'code': self.code, 'message': str(self)}, **self.details)
+
+
+class BudgetExceeded(PDFRejected):
+    """Extraction went over the page or wall-clock budget of the document"""
+    
+    def __init__(self, budget, limit, value):
+        if budget == 'pages':
+            message = f"Se superó el límite de páginas: {value:g} (máximo {limit:g})"
+        else:
+            message = f"Se superó el límite de tiempo: {value:g} s (máximo {limit:g} s)"
+        super().__init__('budget_exceeded', message,
+                         budget=budget, limit=limit, value=value)
+
+
+class OperationCancelled(Exception):
+    """The caller cancelled the extraction (or the analysis) through its cancel event"""
+
+
+def _env_number(name, default):
+    """Read a number from an environment variable, falling back to the default"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def default_max_pages():
+    """Page budget per document (INSPECTOR_MAX_PAGES), or None if disabled"""
+    return int(_env_number('INSPECTOR_MAX_PAGES', DEFAULT_MAX_PAGES)) or None
+
+
+def default_time_budget():
+    """Wall-clock extraction budget per document in seconds (INSPECTOR_TIME_BUDGET), or None if disabled"""
+    return _env_number('INSPECTOR_TIME_BUDGET', DEFAULT_TIME_BUDGET) or None
+
+
+def _page_tree_count(document):
+    """Page count declared in the root of the page tree, or None if it is missing"""
+    try:
+        pages = resolve1(document.catalog['Pages'])
+        count = resolve1(pages.get('Count'))
+        return count if isinstance(count, int) and count >= 0 else None
+    except MemoryError:
+        raise
+    except Exception:
+        return None
+
+
+def _page_has_text(page):
+    """Whether a page has fonts and draws text (a scanned page only draws images)"""
+    fonts = resolve1(page.resources.get('Font')) if page.resources else None
+    if not fonts:
+        return False
+    for stream in page.contents:
+        stream = resolve1(stream)
+        if isinstance(stream, PDFStream) and re.search(rb'T[jJ*"\']', stream.get_data()):
+            return True
+    return False
+
+
+def preflight_pdf(pdf_path, max_pages=None, probe_pages=PREFLIGHT_PROBE_PAGES):
+    """
+    Cheap checks before extraction: only the document trailer, the page tree count and
+    the content streams of the first pages are read.
     
     Args:
         pdf_path (str): Path to the PDF file
+        max_pages (int, optional): Page budget. Defaults to INSPECTOR_MAX_PAGES
+        probe_pages (int): Number of leading pages probed for a text layer
     
     Returns:
-        str: Plain text content of the PDF with proper spacing
+        dict: {'page_count', 'metadata', 'encrypted', 'text_pages_probed', 'warnings', 'elapsed'}
+    
+    Raises:
+        PDFRejected: If the PDF is unreadable, password protected, over the page budget
+                     or has no text layer
+    """
+    start = time.perf_counter()
+    if max_pages is None:
+        max_pages = default_max_pages()
+    result = {'page_count': 0, 'metadata': {}, 'encrypted': False, 'text_pages_probed': 0, 'warnings': []}
+    
+    with open(pdf_path, 'rb') as pdf_file:
+        try:
+            document = PDFDocument(PDFParser(pdf_file))
+        except (PDFPasswordIncorrect, PDFEncryptionError) as e:
+            raise PDFRejected('encrypted', f"El PDF está protegido con contraseña: {str(e) or type(e).__name__}")
+        except MemoryError:
+            raise
+        except Exception as e:
+            raise PDFRejected('unreadable', f"No se pudo leer el PDF: {str(e) or type(e).__name__}")
+        
+        # Encrypted with an empty user password: readable, but worth a warning
+        if document.encryption:
+            result['encrypted'] = True
+            result['warnings'].append("El PDF está cifrado (se puede leer sin contraseña)")
+        
+        result['metadata'] = _document_metadata(document)
+        
+        page_count = _page_tree_count(document)
+        if page_count is None:
+            page_count = sum(1 for _ in PDFPage.create_pages(document))
+        result['page_count'] = page_count
+        if max_pages and page_count > max_pages:
+            raise PDFRejected('too_many_pages',
+                              f"El PDF tiene {page_count} páginas (máximo {max_pages})",
+                              limit=max_pages, value=page_count)
+        
+        # Text-layer probe of the first pages
+        probed = text_pages = 0
+        for page in PDFPage.create_pages(document):
+            if probed >= probe_pages:
+                break
+            probed += 1
+            text_pages += _page_has_text(page)
+        result['text_pages_probed'] = text_pages
+        if probed and not text_pages:
+            if probed >= page_count:
+                raise PDFRejected('no_text_layer',
+                                  "El PDF no tiene capa de texto (¿es un documento escaneado?)")
+            result['warnings'].append(f"Las primeras {probed} páginas no tienen capa de texto")
+    
+    result['elapsed'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def extract_pdf_pages(pdf_path, profile=DEFAULT_PROFILE, max_pages=None, time_budget=None, cancel_event=None):
+    """
+    Extract the text of each page of a PDF file using pdfminer.six.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        profile (str): Extraction profile ('accurate', 'fast' or 'raw')
+        max_pages (int, optional): Maximum number of pages to extract (no limit if None)
+        time_budget (float, optional): Maximum extraction time in seconds, checked between
+                                       pages (no limit if None)
+        cancel_event (Event, optional): Stops the extraction before the next page when set
+    
+    Returns:
+        list: Text of each page, ending with a form feed. Empty if the PDF could not be read
+    
+    Raises:
+        BudgetExceeded: If the document goes over the page or time budget
+        OperationCancelled: If cancel_event was set
     """
     try:
-        print(f"[DEBUG] convert_pdf_to_text: Inicio de procesamiento para {pdf_path}")
+        print(f"[DEBUG] extract_pdf_pages: Inicio de procesamiento para {pdf_path}")
         
         # Check if file exists
         if not os.path.exists(pdf_path):
-            print(f"[ERROR] convert_pdf_to_text: El archivo {pdf_path} no existe")
-            return ""
+            print(f"[ERROR] extract_pdf_pages: El archivo {pdf_path} no existe")
+            return []
         
         # Check if file is a PDF
         if not pdf_path.lower().endswith('.pdf'):
-            print(f"[ERROR] convert_pdf_to_text: El archivo {pdf_path} no es un PDF")
-            return ""
+            print(f"[ERROR] extract_pdf_pages: El archivo {pdf_path} no es un PDF")
+            return []
         
         print(f"[INFO] Processing PDF: {pdf_path}")
-        print(f"[DEBUG] convert_pdf_to_text: Tamaño del archivo: {os.path.getsize(pdf_path)} bytes")
+        print(f"[DEBUG] extract_pdf_pages: Tamaño del archivo: {os.path.getsize(pdf_path)} bytes")
         
-        # Create a string buffer for the extracted text
-        output_string = StringIO()
+        # Text of each page, taken from the page cache or extracted
+        page_texts = []
+        cache_hits = 0
         
-        # Create resource manager
-        resource_manager = PDFResourceManager()
+        # Create resource manager (fonts are shared with previous documents)
+        resource_manager = SharedFontResourceManager()
         
-        # Configure layout analysis parameters for better text extraction
-        laparams = LAParams(
-            line_margin=0.5,       # Valor moderado para mantener párrafos juntos
-            word_margin=0.1,       # Valor estándar para espaciado entre palabras
-            char_margin=7.0,       # Valor más alto para no unir demasiado los caracteres
-            boxes_flow=0.5,        # Valor estándar para el flujo de texto
-            detect_vertical=False,  # Detectar texto vertical
-            all_texts=True         # Incluir todo el texto, incluso en figuras
-        )
+        # Configure layout analysis parameters for the selected profile
+        laparams = get_laparams(profile)
         
-        # Create a text converter
-        device = TextConverter(resource_manager, output_string, laparams=laparams)
+        # Create a text converter (the raw profile rebuilds spacing without layout analysis)
+        converter = TextConverter if laparams is not None else RawTextConverter
+        device = converter(resource_manager, StringIO(), laparams=laparams)
         
         # Create a PDF interpreter
         interpreter = PDFPageInterpreter(resource_manager, device)
         
-        # Process each page
+        # Process each page, reusing the text of pages already seen in other documents
+        deadline = time.monotonic() + time_budget if time_budget else None
         with open(pdf_path, 'rb') as pdf_file:
             for page in PDFPage.get_pages(pdf_file):
-                interpreter.process_page(page)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled(f"Extracción cancelada tras {len(page_texts)} páginas")
+                if max_pages and len(page_texts) >= max_pages:
+                    raise BudgetExceeded('pages', max_pages, len(page_texts) + 1)
+                if deadline is not None and time.monotonic() > deadline:
+                    raise BudgetExceeded('time', time_budget, round(time.monotonic() - deadline + time_budget, 2))
+                fingerprint = page_fingerprint(page, profile) if page_cache.max_size > 0 else None
+                page_text = page_cache.get(fingerprint)
+                if page_text is not None:
+                    cache_hits += 1
+                else:
+                    device.outfp = StringIO()
+                    interpreter.process_page(page)
+                    page_text = device.outfp.getvalue()
+                    page_cache.put(fingerprint, page_text)
+                page_texts.append(page_text)
         
         # Close the converter
         device.close()
         
-        # Get the text from the string buffer
-        text = output_string.getvalue()
-        
-        print(f"[INFO] Successfully extracted {len(text)} characters of text.")
-        print(f"[DEBUG] convert_pdf_to_text: Primeros 100 caracteres: {text[:100].replace(chr(10), '\\n')}")
+        text_length = sum(len(page_text) for page_text in page_texts)
+        print(f"[INFO] Successfully extracted {text_length} characters of text.")
+        if page_cache.max_size > 0:
+            print(f"[DEBUG] extract_pdf_pages: {cache_hits} de {len(page_texts)} páginas obtenidas de la caché")
+        fonts = font_cache.stats()
+        print(f"[DEBUG] extract_pdf_pages: Caché de fuentes: {fonts['entries']} fuentes, tasa de aciertos {fonts['hit_rate']:.0%}")
+        if page_texts:
+            print(f"[DEBUG] extract_pdf_pages: Primeros 100 caracteres: {page_texts[0][:100]!r}")
         
-        if len(text) == 0:
-            print(f"[WARNING] convert_pdf_to_text: No se extrajo ningún texto del PDF")
+        if text_length == 0:
+            print(f"[WARNING] extract_pdf_pages: No se extrajo ningún texto del PDF")
         
-        return text
+        return page_texts
     
+    except (BudgetExceeded, OperationCancelled) as e:
+        print(f"[WARNING] extract_pdf_pages: {str(e)}")
+        raise
+    except MemoryError:
+        # Let the caller (for example a worker with a memory limit) handle it
+        raise
     except Exception as e:
         import traceback
-        print(f"[ERROR] convert_pdf_to_text: Error procesando PDF: {str(e)}")
+        print(f"[ERROR] extract_pdf_pages: Error procesando PDF: {str(e)}")
         print(f"[DEBUG] {traceback.format_exc()}")
-        return ""
+        return []
+
+
+def convert_pdf_to_text(pdf_path, profile=DEFAULT_PROFILE):
+    """
+    Convert a PDF file to plain text using pdfminer.six.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        profile (str): Extraction profile ('accurate', 'fast' or 'raw')
+    
+    Returns:
+        str: Plain text content of the PDF with proper spacing, pages separated by form feeds
+    """
+    return ''.join(extract_pdf_pages(pdf_path, profile))
 
 
 def save_text_to_file(text, output_path):
@@ -139,6 +672,23 @@ def compare_preview(text, max_length=200):
     print(f"Preview: {preview}...")
 
 
+def _document_metadata(document):
+    """Document info dictionary of a PDF, with the values as strings"""
+    metadata = {}
+    if document.info:
+        for info in document.info:
+            for key, value in info.items():
+                if isinstance(value, bytes):
+                    try:
+                        # Try to decode as UTF-8
+                        metadata[key] = value.decode('utf-8', errors='ignore')
+                    except:
+                        metadata[key] = str(value)
+                else:
+                    metadata[key] = str(value)
+    return metadata
+
+
 def get_pdf_info(pdf_path):
     """
     Extract metadata and page count from a PDF file.
@@ -166,17 +716,7 @@ def get_pdf_info(pdf_path):
             document = PDFDocument(parser)
             
             # Get document info (metadata)
-            if document.info:
-                for info in document.info:
-                    for key, value in info.items():
-                        if isinstance(value, bytes):
-                            try:
-                                # Try to decode as UTF-8
-                                metadata[key] = value.decode('utf-8', errors='ignore')
-                            except:
-                                metadata[key] = str(value)
-                        else:
-                            metadata[key] = str(value)
+            metadata = _document_metadata(document)
             
             # Count the pages
             page_count = sum(1 for _ in PDFPage.create_pages(document))
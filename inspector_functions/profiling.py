@@ -0,0 +1,137 @@
+"""
+Profiling
+
+Este módulo perfila un análisis concreto bajo demanda. Mientras dura el análisis se ejecutan
+a la vez cProfile (tiempos por función, guardados como .pstats) y un muestreador de pilas
+(pilas completas, guardadas en formato "collapsed" para generar un flamegraph con
+flamegraph.pl o speedscope). Los archivos se nombran con el identificador del trabajo y la
+huella del PDF. Si el perfilado no se pide, no se instala ningún perfilador.
+"""
+import collections
+import cProfile
+import hashlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Directorio de los perfiles (configurable con INSPECTOR_PROFILE_DIR)
+DEFAULT_PROFILE_DIR = os.path.join(Path(__file__).parent.parent, "profiles")
+
+# Intervalo entre muestras de pila, en segundos
+SAMPLE_INTERVAL = 0.005
+
+# Cabecera HTTP que activa el perfilado de una petición
+PROFILE_HEADER = 'X-Inspector-Profile'
+
+
+def profiling_enabled():
+    """Indica si la variable de entorno INSPECTOR_PROFILE pide perfilar todos los análisis"""
+    return os.environ.get('INSPECTOR_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def profile_dir():
+    """Directorio donde se guardan los perfiles"""
+    return os.environ.get('INSPECTOR_PROFILE_DIR') or DEFAULT_PROFILE_DIR
+
+
+def content_hash(path):
+    """Huella SHA-1 del contenido de un archivo (12 caracteres), o None si no se puede leer"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:12]
+
+
+def _frame_label(frame):
+    """Nombre de un marco de pila en las pilas "collapsed" (archivo:función)"""
+    code = frame.f_code
+    label = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    return label.replace(';', ':').replace(' ', '_')
+
+
+class StackSampler(threading.Thread):
+    """
+    Muestrea periódicamente la pila de un hilo y cuenta cuántas veces aparece cada pila.
+
+    Attributes:
+        thread_id (int): Hilo muestreado
+        interval (float): Segundos entre muestras
+        stacks (Counter): Pila (marcos de la raíz a la hoja separados por ';') -> número de muestras
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def stop(self):
+        """Detiene el muestreo y espera a que termine el hilo"""
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        """Guarda las pilas en formato "collapsed" (una línea "pila muestras" por pila)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_job(job_id, input_pdf=None, output_dir=None):
+    """
+    Perfila el bloque (en el hilo actual) y guarda el perfil al salir, aunque el bloque falle.
+
+    Args:
+        job_id (str): Identificador del trabajo, para el nombre de los archivos
+        input_pdf (str, optional): PDF analizado, para la huella del nombre de los archivos
+        output_dir (str, optional): Directorio de los perfiles (por defecto profile_dir())
+
+    Yields:
+        dict: Descripción del perfil, que se completa al salir del bloque:
+              {'job_id', 'content_hash', 'pstats', 'collapsed', 'samples', 'elapsed'}
+    """
+    output_dir = output_dir or profile_dir()
+    info = {'job_id': job_id, 'content_hash': content_hash(input_pdf) if input_pdf else None}
+    name = '-'.join(part for part in (job_id, info['content_hash']) if part)
+
+    sampler = StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield info
+    finally:
+        profiler.disable()
+        sampler.stop()
+        info['elapsed'] = round(time.perf_counter() - start, 3)
+        info['samples'] = sum(sampler.stacks.values())
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            info['pstats'] = os.path.join(output_dir, f"{name}.pstats")
+            info['collapsed'] = os.path.join(output_dir, f"{name}.collapsed")
+            profiler.dump_stats(info['pstats'])
+            sampler.write_collapsed(info['collapsed'])
+            print(f"[INFO] profiling: Perfil de {job_id} guardado en {info['pstats']} y {info['collapsed']}")
+        except OSError as e:
+            info['pstats'] = info['collapsed'] = None
+            print(f"[WARNING] profiling: No se pudo guardar el perfil de {job_id}: {str(e)}")
@@ -0,0 +1,183 @@
+"""
+Resource Limits
+
+Este módulo limita la memoria y el tiempo de CPU de los procesos trabajadores de análisis
+con resource.setrlimit, de modo que un PDF malformado que dispare la memoria o deje el
+intérprete en un bucle falle con un error estructurado en el reporte en lugar de dejar sin
+recursos a la máquina. En sistemas sin el módulo resource (Windows) los límites no se aplican.
+"""
+import os
+import signal
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Límites por defecto (configurables con INSPECTOR_MEMORY_LIMIT_MB e INSPECTOR_CPU_LIMIT; 0 los desactiva)
+DEFAULT_MEMORY_LIMIT_MB = 1024
+DEFAULT_CPU_LIMIT = 180
+
+
+class ResourceLimitExceeded(BaseException):
+    """
+    El trabajo superó un límite de recursos.
+
+    Hereda de BaseException para que los bloques "except Exception" de los analizadores
+    no la confundan con un error del análisis y la dejen pasar hasta el trabajador.
+
+    Attributes:
+        resource_name (str): 'memory' o 'cpu'
+        limit (float): Límite superado (MB o segundos de CPU)
+    """
+
+    def __init__(self, resource_name, limit):
+        units = 'MB' if resource_name == 'memory' else 's de CPU'
+        label = 'memoria' if resource_name == 'memory' else 'tiempo de CPU'
+        super().__init__(f"Se superó el límite de {label} del análisis ({limit:g} {units})")
+        self.resource_name = resource_name
+        self.limit = limit
+
+    def to_dict(self):
+        """Forma estructurada del error, para el reporte"""
+        return {'code': 'resource_limit', 'message': str(self),
+                'resource': self.resource_name, 'limit': self.limit}
+
+
+def _env_number(name, default):
+    """Lee un número de una variable de entorno, con valor por defecto"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def limits_supported():
+    """Indica si el sistema permite limitar los recursos de los procesos"""
+    return resource is not None
+
+
+def configured_limits():
+    """
+    Devuelve los límites configurados.
+
+    Returns:
+        dict: {'memory_mb': MB de espacio de direcciones o None, 'cpu_seconds': segundos de CPU por trabajo o None}
+    """
+    return {
+        'memory_mb': _env_number('INSPECTOR_MEMORY_LIMIT_MB', DEFAULT_MEMORY_LIMIT_MB) or None,
+        'cpu_seconds': _env_number('INSPECTOR_CPU_LIMIT', DEFAULT_CPU_LIMIT) or None,
+    }
+
+
+def apply_memory_limit(memory_mb):
+    """
+    Limita el espacio de direcciones del proceso actual. Al superarlo, las reservas de
+    memoria fallan con MemoryError.
+
+    Args:
+        memory_mb (float): Límite en MB, o None para no limitar
+
+    Returns:
+        bool: True si se aplicó el límite
+    """
+    if resource is None or not memory_mb:
+        return False
+    limit = int(memory_mb * 1024 * 1024)
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return True
+
+
+def _cpu_time_used():
+    """Segundos de CPU consumidos por el proceso actual"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def cpu_limit(seconds):
+    """
+    Limita el tiempo de CPU del bloque. El límite de RLIMIT_CPU es acumulado para todo el
+    proceso, así que se fija en el consumo actual más `seconds` y se retira al salir.
+    Al superarlo, el sistema envía SIGXCPU y el bloque se interrumpe con ResourceLimitExceeded.
+
+    Solo funciona en el hilo principal del proceso (el de los trabajadores de análisis).
+
+    Args:
+        seconds (float): Segundos de CPU, o None para no limitar
+    """
+    if resource is None or not seconds or not hasattr(signal, 'SIGXCPU'):
+        yield
+        return
+
+    def on_cpu_limit(signum, frame):
+        raise ResourceLimitExceeded('cpu', seconds)
+
+    previous_handler = signal.signal(signal.SIGXCPU, on_cpu_limit)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(_cpu_time_used() + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        signal.signal(signal.SIGXCPU, previous_handler)
+
+
+def process_rss_mb(pid=None):
+    """
+    Memoria residente (RSS) de un proceso. Usa psutil si está instalado y, si no, /proc (Linux).
+
+    Args:
+        pid (int, optional): Proceso a medir. Si es None, el proceso actual
+
+    Returns:
+        float: RSS en MB, o None si no se puede medir en este sistema
+    """
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def failed_report_result(error, kwargs):
+    """
+    Resultado de un trabajo de reporte que superó un límite de recursos, con la misma
+    forma que run_report_job.
+
+    Args:
+        error (ResourceLimitExceeded): Límite superado
+        kwargs (dict): Argumentos del trabajo
+
+    Returns:
+        dict: {'report': reporte con el error estructurado en "failure", 'html': None}
+    """
+    report = {
+        "input_file": os.path.basename(kwargs.get('input_pdf', '')),
+        "status": "error",
+        "statistics": {},
+        "paragraph_analysis": {},
+        "warnings": [],
+        "errors": [str(error)],
+        "failure": error.to_dict(),
+    }
+    return {'report': report, 'html': None}
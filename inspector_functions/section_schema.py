@@ -0,0 +1,245 @@
+"""
+Contract Section Schemas
+
+This module describes contract layouts as data. A schema is a dict with a name and an
+ordered list of sections; each section has:
+
+    name      Section name (output files are written as output_<name>.txt)
+    start     Regex of the heading that opens the section (None = start of the document).
+              The section starts at the first occurrence of the heading
+    end       Regex of the heading that closes the section (not included). The section ends
+              at the first occurrence after its own heading; None = end of the document
+    to_end    If the end heading is not found, run to the end of the document instead of
+              dropping the section (default False)
+    required  Whether a well-formed contract must contain the section (default True)
+    split     Optional terminator rule {'at': regex, 'occurrence': n, 'section': name}:
+              the section ends at the n-th match of 'at' counted from the section start,
+              and the rest of the document becomes the section 'section'
+
+A template set can carry its own schema in a sections.json file (see template_store).
+Each schema is compiled once into a SchemaMatcher that finds every heading of the
+document in a single scan and then resolves the sections with binary searches.
+"""
+import json
+import re
+import threading
+from bisect import bisect_left
+
+# Layout of the contracts in template/
+DEFAULT_SCHEMA = {
+    'name': 'default',
+    'sections': [
+        {'name': 'title', 'start': None, 'end': r'Between:'},
+        {'name': 'between', 'start': r'Between:', 'end': r'And:'},
+        {'name': 'and', 'start': r'And:', 'end': r'Preamble'},
+        {'name': 'preamble', 'start': r'Preamble', 'end': r'Article\s+1\s*:'},
+    ] + [
+        {'name': f'article_{i}', 'start': rf'Article\s*{i}\s*:', 'end': rf'Article\s*{i + 1}\s*:', 'to_end': True}
+        for i in range(1, 15)
+    ] + [
+        # Article 15 ends at the second "Date:" after its heading (the signature block);
+        # everything after that is "furthermore"
+        {'name': 'article_15', 'start': r'Article\s*15\s*:', 'end': None,
+         'split': {'at': r'Date\s*:', 'occurrence': 2, 'section': 'furthermore'}},
+    ],
+}
+
+# Known schemas, by name
+SCHEMAS = {
+    DEFAULT_SCHEMA['name']: DEFAULT_SCHEMA,
+}
+
+# Compiled schemas, by name
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def strip_span(text, start, end):
+    """Return the (start, end) offsets of text[start:end] without surrounding whitespace"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class SchemaError(ValueError):
+    """The section schema is not valid"""
+
+
+class SchemaMatcher:
+    """
+    Compiled form of a section schema.
+
+    Attributes:
+        name (str): Schema name
+        sections (list): Section definitions, in document order
+        expected (list): Names of the required sections, in document order
+        patterns (list): Distinct heading regexes used by the schema
+    """
+
+    def __init__(self, schema):
+        self.name = schema.get('name', 'custom')
+        self.sections = [dict(section) for section in schema.get('sections', [])]
+        if not self.sections:
+            raise SchemaError(f"Schema '{self.name}' has no sections")
+
+        self.expected = [section['name'] for section in self.sections if section.get('required', True)]
+
+        # Every distinct heading pattern gets an index; the scanner looks for all of them at once
+        self.patterns = []
+        for section in self.sections:
+            for pattern in (section.get('start'), section.get('end'), section.get('split', {}).get('at')):
+                if pattern is not None and pattern not in self.patterns:
+                    self.patterns.append(pattern)
+        try:
+            self._compiled = [re.compile(pattern) for pattern in self.patterns]
+            # One regex for all the headings; every hit is then checked against each pattern
+            self._scanner = re.compile('|'.join(f'(?:{pattern})' for pattern in self.patterns))
+        except re.error as e:
+            raise SchemaError(f"Invalid heading pattern in schema '{self.name}': {str(e)}")
+
+    def scan(self, text):
+        """
+        Find every heading of the schema in a single pass.
+
+        Returns:
+            list: For each pattern, a list of (start, end) of its matches in document order
+        """
+        starts = [[] for _ in self.patterns]
+        ends = [[] for _ in self.patterns]
+        candidate = self._scanner.search(text)
+        while candidate:
+            position = candidate.start()
+            for index, pattern in enumerate(self._compiled):
+                match = pattern.match(text, position)
+                if match:
+                    starts[index].append(position)
+                    ends[index].append(match.end())
+            # Resume right after the start of the hit, so overlapping headings are not missed
+            candidate = self._scanner.search(text, position + 1)
+        return starts, ends
+
+    def find_sections(self, text):
+        """
+        Find the sections of a document.
+
+        Args:
+            text (str): Full text of the document
+
+        Returns:
+            dict: Section name -> (start, end) offsets of the section text, without the
+                  surrounding whitespace
+        """
+        starts, ends = self.scan(text)
+        index = {pattern: i for i, pattern in enumerate(self.patterns)}
+
+        def first_at_or_after(pattern, position):
+            positions = starts[index[pattern]]
+            i = bisect_left(positions, position)
+            return i if i < len(positions) else None
+
+        sections = {}
+        for section in self.sections:
+            # Start of the section (first occurrence of its heading)
+            if section.get('start') is None:
+                start = heading_end = 0
+            else:
+                positions = starts[index[section['start']]]
+                if not positions:
+                    continue
+                start = positions[0]
+                heading_end = ends[index[section['start']]][0]
+
+            # Terminator rule: the n-th match after the section start closes it
+            split = section.get('split')
+            if split:
+                i = first_at_or_after(split['at'], start)
+                occurrence = split.get('occurrence', 1)
+                if i is not None and i + occurrence - 1 < len(starts[index[split['at']]]):
+                    split_position = starts[index[split['at']]][i + occurrence - 1]
+                    sections[section['name']] = strip_span(text, start, split_position)
+                    sections[split['section']] = strip_span(text, split_position, len(text))
+                    continue
+
+            # End of the section (first end heading after its own heading)
+            if section.get('end') is None:
+                end = len(text)
+            else:
+                i = first_at_or_after(section['end'], heading_end)
+                if i is not None:
+                    # Leave out the whitespace before the end heading, but not the heading itself
+                    end = starts[index[section['end']]][i]
+                    while end > heading_end and text[end - 1].isspace():
+                        end -= 1
+                elif section.get('to_end'):
+                    end = len(text)
+                else:
+                    continue
+            sections[section['name']] = strip_span(text, start, end)
+
+        return sections
+
+
+def register_schema(schema):
+    """
+    Add (or replace) a schema in SCHEMAS and compile it.
+
+    Args:
+        schema (dict): Schema definition
+
+    Returns:
+        SchemaMatcher: The compiled schema
+    """
+    matcher = SchemaMatcher(schema)
+    with _matchers_lock:
+        SCHEMAS[matcher.name] = schema
+        _matchers[matcher.name] = matcher
+    return matcher
+
+
+def load_schema(path):
+    """
+    Load and compile a schema from a JSON file (for example the sections.json of a
+    template set). The schema is not added to SCHEMAS.
+
+    Args:
+        path (str): Path to the JSON file
+
+    Returns:
+        SchemaMatcher: The compiled schema
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            schema = json.load(f)
+        except ValueError as e:
+            raise SchemaError(f"Invalid schema file {path}: {str(e)}")
+    if not isinstance(schema, dict):
+        raise SchemaError(f"Invalid schema file {path}: expected a JSON object")
+    return SchemaMatcher(schema)
+
+
+def get_matcher(schema=None):
+    """
+    Return the compiled matcher of a schema, compiling it the first time.
+
+    Args:
+        schema (str, dict or SchemaMatcher, optional): Schema name, definition or matcher.
+                                                       None means the default schema
+
+    Returns:
+        SchemaMatcher: The compiled schema
+    """
+    if isinstance(schema, SchemaMatcher):
+        return schema
+    if isinstance(schema, dict):
+        return SchemaMatcher(schema)
+
+    name = schema or DEFAULT_SCHEMA['name']
+    matcher = _matchers.get(name)
+    if matcher is None:
+        if name not in SCHEMAS:
+            raise SchemaError(f"Unknown section schema: {name}")
+        with _matchers_lock:
+            matcher = _matchers.setdefault(name, SchemaMatcher(SCHEMAS[name]))
+    return matcher
@@ -0,0 +1,429 @@
+"""
+Template Store
+
+Este módulo carga una sola vez los archivos de plantilla de un directorio y
+precalcula los datos que necesitan los analizadores (estadísticas de texto y
+número de párrafos), de modo que cada análisis no tenga que volver a leer ni
+analizar las plantillas.
+
+Además de las plantillas por defecto (template/), puede haber varios conjuntos de
+plantillas con nombre, uno por subdirectorio de template_sets/. Cada contrato se
+asigna al conjunto cuyo título y preámbulo se parecen más a los suyos.
+
+Un hilo vigila los directorios ya cargados (start_watcher): cuando cambia una plantilla,
+el conjunto se vuelve a compilar en segundo plano y se sustituye de una sola vez. Cada
+análisis obtiene su TemplateSet al empezar y lo conserva hasta el final, así que los
+análisis en curso no ven cambios a medias.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Plantillas por defecto y directorio de los conjuntos de plantillas con nombre
+# (configurable con INSPECTOR_TEMPLATE_SETS_DIR)
+DEFAULT_TEMPLATE_DIR = os.path.join(Path(__file__).parent.parent, "template")
+DEFAULT_TEMPLATE_SETS_DIR = os.path.join(Path(__file__).parent.parent, "template_sets")
+DEFAULT_SET_NAME = 'default'
+
+# Secciones que se usan para elegir el conjunto de plantillas: (peso en la puntuación,
+# número de palabras de cada secuencia de la firma). El título es corto y se compara palabra a palabra
+SIGNATURE_SECTIONS = {
+    'title': (0.4, 1),
+    'preamble': (0.6, 3),
+}
+
+# Plantillas ya compiladas, indexadas por directorio absoluto
+_template_sets = {}
+_template_sets_lock = threading.Lock()
+
+# Índice de firmas de los conjuntos de plantillas, indexado por directorio de conjuntos
+_template_indexes = {}
+
+# Últimas versiones compiladas de las plantillas, indexadas por versión, para generar el
+# HTML de un reporte con las mismas plantillas que sus estadísticas aunque se hayan recargado
+MAX_TEMPLATE_SNAPSHOTS = 16
+_snapshots = OrderedDict()
+
+# Intervalo (en segundos) con el que se buscan cambios en las plantillas cargadas
+# (configurable con INSPECTOR_TEMPLATE_RELOAD_INTERVAL; 0 desactiva la recarga)
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# Hilo que vigila las plantillas en este proceso (ver start_watcher)
+_watcher = None
+
+# Archivo opcional con el esquema de secciones de un conjunto de plantillas (ver section_schema)
+SCHEMA_FILE = 'sections.json'
+
+# Algunos archivos de plantilla no siguen el nombre de la sección
+SECTION_ALIASES = {
+    'tittle': 'title',
+}
+
+
+def section_name_for_file(filename):
+    """
+    Devuelve el nombre de sección correspondiente a un archivo de plantilla.
+
+    Args:
+        filename (str): Nombre del archivo (por ejemplo "template_article_1.txt")
+
+    Returns:
+        str: Nombre de la sección (por ejemplo "article_1") o None si no es una plantilla
+    """
+    if not filename.startswith('template_') or not filename.endswith('.txt'):
+        return None
+    section = filename[len('template_'):-len('.txt')]
+    return SECTION_ALIASES.get(section, section)
+
+
+def directory_signature(template_dir):
+    """
+    Calcula una firma barata del directorio de plantillas (nombres, tamaños y fechas
+    de modificación) para detectar cambios sin leer el contenido.
+
+    Args:
+        template_dir (str): Directorio de plantillas
+
+    Returns:
+        tuple: Firma del directorio
+    """
+    if not os.path.isdir(template_dir):
+        return ()
+    signature = []
+    for filename in sorted(os.listdir(template_dir)):
+        path = os.path.join(template_dir, filename)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            signature.append((filename, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+class TemplateSet:
+    """
+    Datos precalculados de un directorio de plantillas.
+
+    Attributes:
+        directory (str): Directorio de las plantillas
+        signature (tuple): Firma del directorio en el momento de la carga
+        texts (dict): Sección -> texto de la plantilla
+        stats (dict): Sección -> conteos de inspector_statistics.analyze_string()
+        paragraphs (dict): Sección -> número de párrafos
+        paragraph_hashes (dict): Sección -> huella de cada párrafo
+        signatures (dict): Sección -> firma (ver text_signature) del título y el preámbulo
+        schema (SchemaMatcher): Esquema de secciones propio del conjunto, o None si usa el de por defecto
+        version (str): Huella del contenido de las plantillas y del esquema; cambia solo si cambia el contenido
+    """
+
+    def __init__(self, directory):
+        # Importación diferida para evitar la importación circular con los analizadores
+        try:
+            from inspector_functions.inspector_statistics import analyze_string
+            from inspector_functions.inspector_thermodynamics import paragraph_hashes
+            from inspector_functions.section_schema import load_schema
+        except ImportError:
+            from inspector_statistics import analyze_string
+            from inspector_thermodynamics import paragraph_hashes
+            from section_schema import load_schema
+
+        self.directory = directory
+        self.signature = directory_signature(directory)
+        self.texts = {}
+        self.stats = {}
+        self.paragraphs = {}
+        self.paragraph_hashes = {}
+        self.signatures = {}
+        self.schema = None
+        content_hash = hashlib.sha1()
+
+        for filename, _, _ in self.signature:
+            section = section_name_for_file(filename)
+            if section is None:
+                continue
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            content_hash.update(f'{section}\0{text}\0'.encode('utf-8'))
+            self.texts[section] = text
+            self.stats[section] = analyze_string(text)
+            self.paragraph_hashes[section] = paragraph_hashes(text)
+            self.paragraphs[section] = len(self.paragraph_hashes[section])
+            if section in SIGNATURE_SECTIONS:
+                self.signatures[section] = text_signature(text, SIGNATURE_SECTIONS[section][1])
+
+        schema_path = os.path.join(directory, SCHEMA_FILE)
+        if os.path.isfile(schema_path):
+            self.schema = load_schema(schema_path)
+            with open(schema_path, 'rb') as f:
+                content_hash.update(f.read())
+        self.version = content_hash.hexdigest()[:12]
+
+
+def get_template_set(template_dir):
+    """
+    Devuelve las plantillas compiladas de un directorio, cargándolas la primera vez.
+
+    Args:
+        template_dir (str or TemplateSet): Directorio de plantillas. Si ya es un TemplateSet
+                                           (la copia de un análisis en curso), se devuelve tal cual
+
+    Returns:
+        TemplateSet: Plantillas compiladas
+    """
+    if isinstance(template_dir, TemplateSet):
+        return template_dir
+    template_dir = os.path.abspath(str(template_dir))
+    template_set = _template_sets.get(template_dir)
+    if template_set is not None:
+        return template_set
+
+    with _template_sets_lock:
+        template_set = _template_sets.get(template_dir)
+        if template_set is None:
+            template_set = TemplateSet(template_dir)
+            _template_sets[template_dir] = template_set
+            _remember_snapshot(template_set)
+            print(f"[INFO] template_store: {len(template_set.texts)} plantillas cargadas desde {template_dir}")
+    return template_set
+
+
+def _remember_snapshot(template_set):
+    """Guarda una versión compilada entre las últimas MAX_TEMPLATE_SNAPSHOTS (con el cerrojo tomado)"""
+    _snapshots[template_set.version] = template_set
+    _snapshots.move_to_end(template_set.version)
+    while len(_snapshots) > MAX_TEMPLATE_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+
+
+def get_template_snapshot(version):
+    """
+    Devuelve las plantillas compiladas de una versión (ver TemplateSet.version), aunque ya se
+    hayan sustituido por una versión más reciente.
+
+    Args:
+        version (str): Versión de las plantillas, como se guarda en report["template_set"]
+
+    Returns:
+        TemplateSet: Plantillas de esa versión, o None si no está entre las últimas compiladas
+    """
+    with _template_sets_lock:
+        return _snapshots.get(version)
+
+
+def text_signature(text, size=3):
+    """
+    Firma de un texto para comparar contratos con plantillas: el conjunto de sus
+    secuencias de `size` palabras consecutivas (o de sus palabras, si es más corto).
+
+    Args:
+        text (str): Texto (título o preámbulo)
+        size (int): Número de palabras de cada secuencia
+
+    Returns:
+        frozenset: Firma del texto
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < size or size == 1:
+        return frozenset(words)
+    return frozenset(zip(*(words[i:] for i in range(size))))
+
+
+def _similarity(first, second):
+    """Índice de Jaccard de dos firmas"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def template_sets_dir():
+    """Directorio de los conjuntos de plantillas (variable de entorno INSPECTOR_TEMPLATE_SETS_DIR)"""
+    return os.environ.get('INSPECTOR_TEMPLATE_SETS_DIR') or DEFAULT_TEMPLATE_SETS_DIR
+
+
+def list_template_sets(sets_dir=None):
+    """
+    Devuelve los conjuntos de plantillas disponibles.
+
+    Args:
+        sets_dir (str, optional): Directorio de los conjuntos. Si es None, usa el configurado
+
+    Returns:
+        dict: Nombre del conjunto -> directorio. "default" es siempre template/
+    """
+    sets_dir = sets_dir or template_sets_dir()
+    template_sets = {DEFAULT_SET_NAME: os.path.abspath(DEFAULT_TEMPLATE_DIR)}
+    if os.path.isdir(sets_dir):
+        for name in sorted(os.listdir(sets_dir)):
+            path = os.path.join(sets_dir, name)
+            if os.path.isdir(path) and name != DEFAULT_SET_NAME:
+                template_sets[name] = os.path.abspath(path)
+    return template_sets
+
+
+def template_set_directory(name, sets_dir=None):
+    """
+    Devuelve el directorio de un conjunto de plantillas por su nombre.
+
+    Raises:
+        ValueError: Si el conjunto no existe
+    """
+    template_sets = list_template_sets(sets_dir)
+    if name not in template_sets:
+        raise ValueError(f"Conjunto de plantillas desconocido: {name}")
+    return template_sets[name]
+
+
+class TemplateIndex:
+    """
+    Firmas del título y el preámbulo de todos los conjuntos de plantillas.
+
+    Attributes:
+        directories (dict): Nombre del conjunto -> directorio
+        signatures (dict): Nombre del conjunto -> sección -> firma
+    """
+
+    def __init__(self, sets_dir=None):
+        self.directories = list_template_sets(sets_dir)
+        self.signatures = {
+            name: get_template_set(directory).signatures
+            for name, directory in self.directories.items()
+        }
+
+    def route(self, section_texts):
+        """
+        Elige el conjunto de plantillas que mejor se ajusta a un contrato.
+
+        Args:
+            section_texts (dict): Sección -> texto del contrato (al menos título y preámbulo)
+
+        Returns:
+            dict: {'name': conjunto elegido, 'confidence': puntuación entre 0 y 1,
+                   'scores': puntuación de cada conjunto}
+        """
+        contract_signatures = {
+            section: text_signature(section_texts[section], size)
+            for section, (_, size) in SIGNATURE_SECTIONS.items() if section_texts.get(section)
+        }
+
+        scores = {}
+        for name, signatures in self.signatures.items():
+            weighted = total_weight = 0.0
+            for section, (weight, _) in SIGNATURE_SECTIONS.items():
+                if section in signatures and section in contract_signatures:
+                    weighted += weight * _similarity(signatures[section], contract_signatures[section])
+                    total_weight += weight
+            scores[name] = round(weighted / total_weight, 3) if total_weight else 0.0
+
+        # En caso de empate (o sin coincidencias) se queda el conjunto por defecto
+        best = max(scores, key=lambda name: (scores[name], name == DEFAULT_SET_NAME))
+        return {'name': best, 'confidence': scores[best], 'scores': scores}
+
+
+def get_template_index(sets_dir=None):
+    """
+    Devuelve el índice de firmas de los conjuntos de plantillas, compilándolo la primera vez.
+
+    Args:
+        sets_dir (str, optional): Directorio de los conjuntos. Si es None, usa el configurado
+
+    Returns:
+        TemplateIndex: Índice de firmas
+    """
+    sets_dir = os.path.abspath(sets_dir or template_sets_dir())
+    index = _template_indexes.get(sets_dir)
+    if index is None:
+        index = TemplateIndex(sets_dir)
+        with _template_sets_lock:
+            _template_indexes.setdefault(sets_dir, index)
+        print(f"[INFO] template_store: {len(index.directories)} conjuntos de plantillas indexados")
+    return _template_indexes[sets_dir]
+
+
+def reload_changed_templates():
+    """
+    Vuelve a compilar los conjuntos de plantillas cuyos archivos han cambiado y los sustituye.
+    Solo se invalida lo que depende de lo que cambió: el resto de conjuntos se conservan, y el
+    índice de firmas solo se reconstruye si cambian los conjuntos disponibles o sus títulos o
+    preámbulos. Si la nueva versión no se puede compilar (por ejemplo, un sections.json con
+    errores), se mantiene la anterior.
+
+    Returns:
+        list: Directorios que se han vuelto a compilar
+    """
+    reloaded = []
+    for directory, template_set in list(_template_sets.items()):
+        if directory_signature(directory) == template_set.signature:
+            continue
+        try:
+            new_set = TemplateSet(directory)
+        except Exception as e:
+            print(f"[WARNING] template_store: No se pudieron recargar las plantillas de {directory}: {str(e)}")
+            continue
+        with _template_sets_lock:
+            _template_sets[directory] = new_set
+            _remember_snapshot(new_set)
+        reloaded.append(directory)
+        print(f"[INFO] template_store: Plantillas recargadas desde {directory} "
+              f"(versión {template_set.version} -> {new_set.version})")
+
+    for sets_dir, index in list(_template_indexes.items()):
+        directories = list_template_sets(sets_dir)
+        if directories == index.directories and all(
+                get_template_set(directory).signatures == index.signatures[name]
+                for name, directory in directories.items()):
+            continue
+        new_index = TemplateIndex(sets_dir)
+        with _template_sets_lock:
+            _template_indexes[sets_dir] = new_index
+        print(f"[INFO] template_store: Índice de conjuntos de plantillas reconstruido "
+              f"({len(new_index.directories)} conjuntos)")
+    return reloaded
+
+
+def reload_interval():
+    """Intervalo de recarga configurado (variable de entorno INSPECTOR_TEMPLATE_RELOAD_INTERVAL)"""
+    try:
+        return float(os.environ.get('INSPECTOR_TEMPLATE_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL))
+    except ValueError:
+        return DEFAULT_RELOAD_INTERVAL
+
+
+class TemplateWatcher(threading.Thread):
+    """Hilo que busca cambios en las plantillas cargadas cada `interval` segundos"""
+
+    def __init__(self, interval):
+        super().__init__(name='inspector-template-watcher', daemon=True)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                reload_changed_templates()
+            except Exception as e:
+                print(f"[WARNING] template_store: Error al buscar cambios en las plantillas: {str(e)}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_watcher(interval=None):
+    """
+    Arranca, una sola vez por proceso, el hilo que recarga las plantillas modificadas.
+
+    Args:
+        interval (float, optional): Segundos entre comprobaciones. Si es None, usa el configurado
+
+    Returns:
+        TemplateWatcher: El hilo, o None si la recarga está desactivada
+    """
+    global _watcher
+    interval = reload_interval() if interval is None else interval
+    if interval <= 0:
+        return None
+    with _template_sets_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = TemplateWatcher(interval)
+            _watcher.start()
+    return _watcher
@@ -7,6 +7,215 @@ particularly focusing on handling special page break characters.
 import os
 import re
 import sys
+from array import array
+from bisect import bisect_right
+
+# Marker that replaces every page break in the cleaned text
+PAGE_BREAK_TEXT = '===PAGE_BREAK==='
+PAGE_BREAK_MARKER = f'\n{PAGE_BREAK_TEXT}\n'
+
+# Page break markers, as they can appear depending on the PDF extraction tool used:
+# form feed (ASCII 12, also written '\x0c', '\u000C' and chr(12)), vertical tab, the
+# Unicode symbol for form feed, a common "FF" marker, and the escaped sequences
+# "\u000c" and "\f". No two of them can overlap, so one alternation finds them all.
+PAGE_BREAK_CHARS = {
+    '\f': 'form_feed',
+    '\v': 'vertical_tab',
+}
+PAGE_BREAK_TOKENS = ['\u240C', 'FF', '\\u000c', '\\f']
+_MARKER = '|'.join(re.escape(marker) for marker in list(PAGE_BREAK_CHARS) + PAGE_BREAK_TOKENS)
+
+# Five newlines in a row also indicate a page break
+NEWLINE_RUN = 5
+
+# One pass over the text finds clusters of page break markers together with the newlines
+# around them, so that newline runs that touch a marker are handled together with it,
+# and runs of NEWLINE_RUN or more newlines
+_NORMALIZE_PATTERN = re.compile(rf'\n*(?:(?:{_MARKER})\n*)+|\n{{{NEWLINE_RUN},}}')
+_MARKER_PATTERN = re.compile(_MARKER)
+_NEWLINE_RUN_PATTERN = re.compile(rf'\n{{{NEWLINE_RUN},}}')
+
+# Text at the end of a chunk that may still be extended by the next chunk: newlines
+# and an incomplete "FF" or escaped marker
+_PENDING_TAIL_PATTERN = re.compile(r'\n*(?:F|\\(?:u0{0,3})?)?\Z')
+
+# Patterns that are only counted, on the normalized text with its markers: lines with
+# just a number (potential page numbers), and a number line followed by a title, which
+# often starts a new page in legal documents
+_PAGE_NUMBER_LINE_PATTERN = re.compile(r'\n\s*\d+\s*\n')
+_UNUSUAL_BREAK_PATTERN = re.compile(r'\n\s*\d+\s*\n[A-Z\s]{5,}')
+
+
+def _new_counts():
+    return {'form_feed': 0, 'vertical_tab': 0, 'other_markers': 0}
+
+
+def _replace_newline_run(match, counts):
+    # Each group of NEWLINE_RUN newlines becomes a marker; the remaining newlines are kept
+    pages, rest = divmod(len(match.group(0)), NEWLINE_RUN)
+    counts['other_markers'] += pages
+    return PAGE_BREAK_MARKER * pages + '\n' * rest
+
+
+def _normalize_cluster(cluster, counts, keep_markers):
+    def replace_marker(match):
+        kind = PAGE_BREAK_CHARS.get(match.group(0), 'other_markers')
+        counts[kind] += 1
+        return PAGE_BREAK_MARKER
+
+    cluster = _MARKER_PATTERN.sub(replace_marker, cluster)
+    cluster = _NEWLINE_RUN_PATTERN.sub(lambda match: _replace_newline_run(match, counts), cluster)
+    return cluster if keep_markers else cluster.replace(PAGE_BREAK_TEXT, '')
+
+
+def _normalize(text, counts, keep_markers=True):
+    return _NORMALIZE_PATTERN.sub(lambda match: _normalize_cluster(match.group(0), counts, keep_markers), text)
+
+
+def count_page_numbers(normalized_text):
+    """
+    Count the patterns that suggest a page break without a marker, as the original
+    standardize_page_breaks did after replacing the markers.
+    
+    Args:
+        normalized_text (str): Normalized text, with its "===PAGE_BREAK===" markers
+    
+    Returns:
+        dict: Number of potential page number lines and of unusual page break patterns
+    """
+    return {
+        'page_number_lines': sum(1 for _ in _PAGE_NUMBER_LINE_PATTERN.finditer(normalized_text)),
+        'unusual_breaks': sum(1 for _ in _UNUSUAL_BREAK_PATTERN.finditer(normalized_text)),
+    }
+
+
+def normalize_text(text, keep_markers=True):
+    """
+    Replace every page break marker with PAGE_BREAK_MARKER in a single pass.
+    
+    The result is the same as replacing each kind of marker in turn (form feeds, vertical
+    tabs, the other markers and finally every five newlines).
+    
+    Args:
+        text (str): Text extracted from a PDF
+        keep_markers (bool): If False, the "===PAGE_BREAK===" text is left out and only
+                             the newlines around it remain
+    
+    Returns:
+        tuple: (normalized text, dict with the number of form feeds, vertical tabs and
+               other markers found, plus the counts of count_page_numbers)
+    """
+    counts = _new_counts()
+    normalized = _normalize(text, counts)
+    counts.update(count_page_numbers(normalized))
+    if not keep_markers:
+        normalized = normalized.replace(PAGE_BREAK_TEXT, '')
+    return normalized, counts
+
+
+class PageBreakNormalizer:
+    """
+    Incremental version of normalize_text for text that arrives in chunks (for example,
+    page by page during extraction).
+    
+    The end of each chunk that could still be extended by the next one (newlines, a
+    trailing marker or an incomplete "FF") is held back, so concatenating the output of
+    feed() and close() gives exactly normalize_text() of the whole text.
+    
+    Attributes:
+        counts (dict): Markers found so far, as returned by normalize_text (the page
+                       number patterns can span chunks, see count_page_numbers)
+    """
+    
+    def __init__(self, keep_markers=True):
+        self.counts = _new_counts()
+        self.keep_markers = keep_markers
+        self._pending = ''
+    
+    def feed(self, chunk):
+        """
+        Normalize a chunk of text.
+        
+        Args:
+            chunk (str): Next chunk of text
+        
+        Returns:
+            str: Normalized text that can already be written
+        """
+        text = self._pending + chunk
+        hold = _PENDING_TAIL_PATTERN.search(text).start()
+        
+        # A cluster that reaches the held text may continue in the next chunk
+        last_cluster = None
+        for match in _NORMALIZE_PATTERN.finditer(text):
+            last_cluster = match
+        if last_cluster is not None and last_cluster.end() >= hold:
+            hold = last_cluster.start()
+        
+        self._pending = text[hold:]
+        return _normalize(text[:hold], self.counts, self.keep_markers)
+    
+    def close(self):
+        """
+        Normalize the text held back by the last call to feed().
+        
+        Returns:
+            str: Remaining normalized text
+        """
+        text, self._pending = self._pending, ''
+        return _normalize(text, self.counts, self.keep_markers)
+
+
+def clean_pages(page_texts):
+    """
+    Normalize the text of each page and join the pages into one clean text, without
+    page break markers, plus the offset where each page starts.
+    
+    The clean text is the normalized text with the "===PAGE_BREAK===" markers removed,
+    so the analyzers can use it directly. The page number patterns are counted before
+    the markers are removed, so the counts are those of normalize_text.
+    
+    Args:
+        page_texts (list): Text of each page, as returned by extract_pdf_pages
+    
+    Returns:
+        tuple: (clean text, array with the start offset of each page, counts as returned
+               by normalize_text)
+    """
+    normalizer = PageBreakNormalizer()
+    parts = []
+    length = 0
+    page_starts = array('L')
+    for page_text in page_texts:
+        # The break between two pages is held back by the normalizer, so a page starts
+        # where the whitespace left by the previous break starts
+        page_starts.append(length)
+        part = normalizer.feed(page_text)
+        parts.append(part)
+        length += len(part) - part.count(PAGE_BREAK_TEXT) * len(PAGE_BREAK_TEXT)
+    parts.append(normalizer.close())
+    
+    normalized = ''.join(parts)
+    counts = dict(normalizer.counts, **count_page_numbers(normalized))
+    return normalized.replace(PAGE_BREAK_TEXT, ''), page_starts, counts
+
+
+def page_span(page_starts, start, end):
+    """
+    Find the pages covered by a range of the clean text.
+    
+    Args:
+        page_starts (array): Start offset of each page, as returned by clean_pages
+        start (int): Start offset of the range
+        end (int): End offset of the range (exclusive)
+    
+    Returns:
+        tuple: (first page, last page), numbered from 1
+    """
+    first_page = max(bisect_right(page_starts, start), 1)
+    last_page = max(bisect_right(page_starts, max(end - 1, start)), first_page)
+    return first_page, last_page
+
 
 def standardize_page_breaks(input_path, output_path=None):
     """
@@ -35,66 +244,24 @@ def standardize_page_breaks(input_path, output_path=None):
     
     print(f"Read {len(content)} characters from {input_path}")
     
-    # Find and replace special page break characters
-    # These can appear differently depending on the PDF extraction tool used
-    
-    # Common page break characters:
-    # 1. Form feed character (ASCII 12, \f)
-    # 2. Special Unicode characters
-    # 3. Custom sequences like "FF", "^L", etc.
-    
-    # Pattern to look for: sequence of FF characters, form feed chars, or other special markers
-    cleaned_content = content
-    
-    # Replace form feed character
-    form_feed_count = cleaned_content.count('\f')
-    cleaned_content = cleaned_content.replace('\f', '\n===PAGE_BREAK===\n')
-    
-    # Replace vertical tab
-    vtab_count = cleaned_content.count('\v')
-    cleaned_content = cleaned_content.replace('\v', '\n===PAGE_BREAK===\n')
-    
-    # Replace common PDF page break markers
-    markers = [
-        '\x0c',                          # Form feed character
-        '\u000C',                        # Unicode form feed
-        '\u240C',                        # Unicode symbol for form feed
-        chr(12),                         # ASCII 12
-        'FF',                            # Common FF marker
-        '\\u000c',                       # Escaped unicode
-        '\\f',                           # Escaped form feed
-        '\n\n\n\n\n',                    # Multiple newlines (often indicates page break)
-    ]
-    
-    replacement_count = 0
-    for marker in markers:
-        count = cleaned_content.count(marker)
-        if count > 0:
-            cleaned_content = cleaned_content.replace(marker, '\n===PAGE_BREAK===\n')
-            replacement_count += count
-            print(f"Replaced {count} occurrences of page break marker")
-    
-    # Look for unusual patterns that often indicate page breaks
-    # For example, a line number followed by a title (common in legal documents)
-    unusual_breaks = re.findall(r'\n\s*\d+\s*\n[A-Z\s]{5,}', cleaned_content)
-    if unusual_breaks:
-        print(f"Found {len(unusual_breaks)} potential unusual page break patterns")
-    
-    # Look for patterns in the text that might indicate page breaks
-    # Scan the content for patterns like a line with just numbers (page numbers)
-    # or a line with dashes or other separators
-    page_number_lines = re.findall(r'\n\s*\d+\s*\n', cleaned_content)
-    if page_number_lines:
-        print(f"Found {len(page_number_lines)} potential page number lines")
+    # Replace every page break marker in a single pass
+    cleaned_content, counts = normalize_text(content)
+    
+    # Look for patterns that often indicate page breaks: a line number followed by a title
+    # (common in legal documents), and lines with just a number (page numbers)
+    if counts['unusual_breaks']:
+        print(f"Found {counts['unusual_breaks']} potential unusual page break patterns")
+    if counts['page_number_lines']:
+        print(f"Found {counts['page_number_lines']} potential page number lines")
     
     # Write cleaned content to output file
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(cleaned_content)
     
     print(f"Processed file and found:")
-    print(f"- Form feed characters: {form_feed_count}")
-    print(f"- Vertical tab characters: {vtab_count}")
-    print(f"- Other page break markers: {replacement_count}")
+    print(f"- Form feed characters: {counts['form_feed']}")
+    print(f"- Vertical tab characters: {counts['vertical_tab']}")
+    print(f"- Other page break markers: {counts['other_markers']}")
     print(f"Cleaned content written to {output_path}")
     
     return output_path
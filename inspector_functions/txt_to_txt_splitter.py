@@ -5,15 +5,82 @@ This module contains functions to split a contract text file into separate files
 based on specific sections like title, between, and, preamble and articles.
 """
 import os
-import re
+import sys
 
-def split_contract_text(input_file_path, output_dir=None):
+# Make the package importable when this file is run directly
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.append(os.path.dirname(current_dir))
+
+from inspector_functions.section_schema import get_matcher, load_schema
+
+# Sections the splitter is expected to find in a well-formed contract (default schema)
+EXPECTED_SECTIONS = get_matcher().expected
+
+
+def missing_sections(output_files, schema=None):
+    """
+    Return the expected sections that were not found by split_contract_text.
+    
+    Args:
+        output_files (dict): Result of split_contract_text
+        schema (str or dict, optional): Section schema used for the split (default schema if None)
+    
+    Returns:
+        list: Names of the missing sections, in document order
+    """
+    return [section for section in get_matcher(schema).expected if section not in output_files]
+
+
+def find_contract_sections(contract_text, schema=None):
+    """
+    Find the sections of a contract text (title, between, and, preamble and articles).
+    
+    Args:
+        contract_text (str): Full text of the contract
+        schema (str or dict, optional): Section schema (see section_schema). Default schema if None
+    
+    Returns:
+        dict: Section name -> (start, end) offsets of the section text in contract_text,
+              without the surrounding whitespace
+    """
+    return get_matcher(schema).find_sections(contract_text)
+
+
+def write_contract_sections(contract_text, sections, output_dir):
+    """
+    Write each non-empty section found by find_contract_sections to its own file.
+    
+    Args:
+        contract_text (str): Full text of the contract
+        sections (dict): Section name -> (start, end) offsets
+        output_dir (str): Directory to save output files
+    
+    Returns:
+        dict: Dictionary containing paths of created output files
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    
+    output_files = {}
+    for section_name, (start, end) in sections.items():
+        if end > start:
+            output_file_path = os.path.join(output_dir, f'output_{section_name}.txt')
+            with open(output_file_path, 'w', encoding='utf-8') as f:
+                f.write(contract_text[start:end])
+            output_files[section_name] = output_file_path
+    
+    return output_files
+
+
+def split_contract_text(input_file_path, output_dir=None, schema=None):
     """
     Splits a contract text file into separate files for different sections.
     
     Args:
         input_file_path (str): Path to the input text file containing the contract
         output_dir (str, optional): Directory to save output files. If None, will save in the same directory as input file
+        schema (str or dict, optional): Section schema (see section_schema). Default schema if None
     
     Returns:
         dict: Dictionary containing paths of created output files
@@ -22,9 +89,6 @@ def split_contract_text(input_file_path, output_dir=None):
     if output_dir is None:
         output_dir = os.path.dirname(input_file_path)
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    
     # Validate input file path
     if not os.path.isfile(input_file_path):
         raise FileNotFoundError(f"Input file not found: {input_file_path}")
@@ -33,78 +97,8 @@ def split_contract_text(input_file_path, output_dir=None):
     with open(input_file_path, 'r', encoding='utf-8') as f:
         contract_text = f.read()
     
-    # Dictionary to store the extracted content
-    sections = {}
-    output_files = {}
-    
-    # 1.Extract the title (first line) - from beginning to "Between:" (not including)
-    title_match = re.search(r'^(.*?)(?=\s*Between:)', contract_text, re.DOTALL)
-    if title_match:
-        sections['title'] = title_match.group(1).strip()
-    
-    # 2.Extract 'Between' section - from "Between:" (included) to "And:" (not including)
-    between_match = re.search(r'(Between:.*?)(?=\s*And:)', contract_text, re.DOTALL)
-    if between_match:
-        sections['between'] = between_match.group(1).strip()
-    
-    # 3.Extract 'And' section - from "And:" (included) to "Preamble" (not including)
-    and_match = re.search(r'(And:.*?)(?=\s*Preamble)', contract_text, re.DOTALL)
-    if and_match:
-        sections['and'] = and_match.group(1).strip()
-    
-    # 4.Extract 'Preamble' section - if present
-    preamble_match = re.search(r'(Preamble.*?)(?=\s*Article\s+1\s*:)', contract_text, re.DOTALL)
-    if preamble_match:
-        sections['preamble'] = preamble_match.group(1).strip()
-    
-    # 5.Extract Articles 1 to 14
-    for i in range(1, 15):  # Articles 1 to 14
-        article_pattern = f"(Article\\s*{i}\\s*:.*?)(?=\\s*Article\\s*{i+1}\\s*:|$)"
-        article_match = re.search(article_pattern, contract_text, re.DOTALL)
-        if article_match:
-            sections[f'article_{i}'] = article_match.group(1).strip()
-    
-    # 6. Extract Article 15 - from "Article 15:" to the second occurrence of "Date:" AFTER Article 15
-    
-    # Find the position of Article 15 start
-    article_15_start_match = re.search(r'Article\s*15\s*:', contract_text)
-    
-    if article_15_start_match:
-        article_15_start_pos = article_15_start_match.start()
-        
-        # Find all occurrences of "Date:" in the text AFTER Article 15
-        date_positions_after_article15 = [m.start() for m in re.finditer(r'Date\s*:', contract_text[article_15_start_pos:])]
-        # Adjust positions to be relative to the start of the document
-        date_positions_after_article15 = [pos + article_15_start_pos for pos in date_positions_after_article15]
-        
-        # We need the second occurrence of "Date:" AFTER Article 15
-        # If there are fewer than 2 "Date:" occurrences after Article 15, use whatever we have
-        if len(date_positions_after_article15) >= 2:
-            # Get the position of the second Date: after Article 15
-            second_date_pos = date_positions_after_article15[1]
-            
-            # Article 15 ends at the second Date: position
-            article_15_text = contract_text[article_15_start_pos:second_date_pos].strip()
-            sections['article_15'] = article_15_text
-            
-            # Everything after the second Date: until the end is "furthermore"
-            furthermore_text = contract_text[second_date_pos:].strip()
-            if furthermore_text:
-                sections['furthermore'] = furthermore_text
-        else:
-            # No Date: found after Article 15 - Article 15 goes to the end of the document
-            article_15_text = contract_text[article_15_start_pos:].strip()
-            sections['article_15'] = article_15_text
-    
-    # Write sections to separate files
-    for section_name, content in sections.items():
-        if content:
-            output_file_path = os.path.join(output_dir, f'output_{section_name}.txt')
-            with open(output_file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            output_files[section_name] = output_file_path
-    
-    return output_files
+    sections = find_contract_sections(contract_text, schema)
+    return write_contract_sections(contract_text, sections, output_dir)
 
 
 def main():
@@ -117,6 +111,7 @@ def main():
     parser.add_argument('input_file', help='Path to the input contract text file')
     parser.add_argument('--output_dir', help='Directory to save output files', default='output_split')
     parser.add_argument('--verbose', '-v', action='store_true', help='Print detailed information about extracted sections')
+    parser.add_argument('--schema', help='JSON file with a section schema (see section_schema). Default layout if omitted')
     
     args = parser.parse_args()
     
@@ -134,7 +129,8 @@ def main():
     
     print(f"Processing contract file: {input_file}")
     try:
-        output_files = split_contract_text(input_file, output_dir)
+        schema = load_schema(args.schema) if args.schema else None
+        output_files = split_contract_text(input_file, output_dir, schema)
         
         print(f"\nContract successfully split into {len(output_files)} files in '{os.path.relpath(os.path.dirname(list(output_files.values())[0]), os.getcwd())}':")
         for section, file_path in sorted(output_files.items()):
@@ -1,15 +1,20 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
 import json
+import time
+import queue
+import threading
 
 # Añadir el directorio actual al path para poder importar inspector_functions
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
 # Importar la función para crear reportes
-from inspector_functions.create_report import create_report, get_report_html
+from inspector_functions.create_report import create_report, get_report_html, get_report_fragments
+from inspector_functions import baseline_store
+from inspector_functions import template_store
 
 app = Flask(__name__, static_url_path='', static_folder='./')
 
@@ -92,6 +97,18 @@ def upload_file():
         
         print(f"[INFO] server.py: Archivo guardado correctamente")
         
+        # Con analyze=0 solo se guarda el archivo: el cliente lo analiza después con /analyze/stream
+        if request.form.get('analyze') == '0':
+            # El reporte en caché corresponde al archivo anterior
+            report_path = os.path.join(current_dir, 'contract_report.json')
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            return jsonify({
+                'success': True,
+                'message': 'Archivo guardado correctamente',
+                'file_path': file_path
+            })
+        
         # Iniciar análisis automáticamente
         print(f"[INFO] server.py: Iniciando análisis automático")
         
@@ -103,6 +120,9 @@ def upload_file():
             report = create_report(file_path, output_dir)
             print(f"[INFO] server.py: Reporte generado con estado: {report['status']}")
             
+            # Añadir el contrato a la línea base del corpus
+            baseline_store.record_report(report)
+            
             # Convertir reporte a HTML
             html_content = get_report_html(report)
             
@@ -111,6 +131,7 @@ def upload_file():
                 'message': 'Archivo guardado y analizado correctamente',
                 'file_path': file_path,
                 'html': html_content,
+                'report': report,
                 'report_status': report['status']
             })
         except Exception as e:
@@ -132,6 +153,136 @@ def upload_file():
             'error': str(e)
         }), 500
 
+def templates_changed(report):
+    """Indica si las plantillas con las que se generó un reporte han cambiado desde entonces"""
+    cached_set = report.get('template_set', {})
+    try:
+        directory = template_store.template_set_directory(cached_set.get('name', template_store.DEFAULT_SET_NAME))
+        return template_store.get_template_set(directory).version != cached_set.get('version')
+    except ValueError:
+        return True
+
+def load_cached_report(report_path):
+    """Devuelve el reporte guardado de input.pdf si está completo y sus plantillas no han cambiado, o None"""
+    if not os.path.exists(report_path):
+        return None
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report['status'] == 'complete' and 'input_file' in report and report['input_file'] == 'input.pdf':
+            if templates_changed(report):
+                print(f"[INFO] server.py: Las plantillas han cambiado; el reporte en caché no se usa")
+                return None
+            print(f"[INFO] server.py: Usando reporte en caché desde {report_path}")
+            return report
+    except Exception as e:
+        print(f"[WARNING] server.py: Error al leer reporte en caché: {str(e)}")
+    return None
+
+def save_cached_report(report, report_path):
+    """Guarda el reporte para uso futuro"""
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[INFO] server.py: Reporte guardado en {report_path}")
+    except Exception as e:
+        print(f"[WARNING] server.py: Error al guardar reporte: {str(e)}")
+
+def report_stages(report):
+    """Pasos de un reporte ya generado, con los mismos datos que envía create_report(on_stage=...)"""
+    yield 'document', {k: report[k] for k in ('input_file', 'date', 'page_count', 'standard_page_ratio', 'metadata')
+                       if k in report}
+    yield 'sections', {'sections': list(report.get('section_pages', {})),
+                       'section_pages': report.get('section_pages', {}),
+                       'extraction_profile': report.get('extraction_profile'),
+                       'template_set': report.get('template_set')}
+    for section, data in report.get('statistics', {}).items():
+        yield 'section_statistics', {'section': section, 'statistics': data}
+    yield 'paragraph_analysis', {'paragraph_analysis': report.get('paragraph_analysis', {})}
+
+@app.route('/analyze/stream', methods=['GET'])
+def analyze_contract_stream():
+    """
+    Variante de /analyze que envía el análisis por partes, un registro NDJSON por paso en
+    cuanto está disponible: "document" (páginas y metadatos), "sections", "section_statistics"
+    (uno por artículo), "paragraph_analysis", "report" (estado, errores y advertencias),
+    "fragment" (uno por fragmento del HTML, en orden) y "done". Si algo falla, se envía un
+    registro "error".
+    """
+    print(f"[INFO] server.py: Recibida solicitud de análisis por partes")
+    
+    file_path = os.path.join(current_dir, 'input.pdf')
+    if not os.path.exists(file_path):
+        print(f"[ERROR] server.py: No existe el archivo {file_path}")
+        return jsonify({
+            'success': False,
+            'error': 'No se ha subido ningún archivo para analizar'
+        }), 400
+    
+    output_dir = os.path.join(current_dir, 'output_split')
+    report_path = os.path.join(current_dir, 'contract_report.json')
+    
+    def generate():
+        started = time.perf_counter()
+        
+        def record(stage, data):
+            return json.dumps({'stage': stage, **data, 'elapsed': round(time.perf_counter() - started, 3)},
+                              ensure_ascii=False) + '\n'
+        
+        report = load_cached_report(report_path)
+        if report is not None:
+            for stage, data in report_stages(report):
+                yield record(stage, data)
+        else:
+            # El análisis se ejecuta en otro hilo y cada paso llega por la cola en cuanto termina
+            stages = queue.Queue()
+            cancel_event = threading.Event()
+            outcome = {}
+            
+            def run():
+                try:
+                    outcome['report'] = create_report(file_path, output_dir, cancel_event=cancel_event,
+                                                      on_stage=lambda stage, data: stages.put((stage, data)))
+                except Exception as e:
+                    outcome['error'] = e
+                finally:
+                    stages.put(None)
+            
+            threading.Thread(target=run, name='analyze-stream', daemon=True).start()
+            finished = False
+            try:
+                while True:
+                    item = stages.get()
+                    if item is None:
+                        finished = True
+                        break
+                    yield record(*item)
+            finally:
+                # El cliente cerró la conexión antes de terminar: detener el análisis
+                if not finished:
+                    print(f"[INFO] server.py: Cliente desconectado; cancelando el análisis")
+                    cancel_event.set()
+            
+            if 'error' in outcome:
+                print(f"[ERROR] server.py: Error en análisis: {str(outcome['error'])}")
+                yield record('error', {'error': str(outcome['error'])})
+                return
+            report = outcome['report']
+            print(f"[INFO] server.py: Reporte generado con estado: {report['status']}")
+            save_cached_report(report, report_path)
+        
+        yield record('report', {k: report.get(k) for k in ('status', 'warnings', 'errors', 'failure') if k in report})
+        try:
+            for name, html in get_report_fragments(report, output_dir):
+                yield record('fragment', {'name': name, 'html': html})
+        except Exception as e:
+            print(f"[ERROR] server.py: Error al generar el HTML: {str(e)}")
+            yield record('error', {'error': str(e)})
+            return
+        yield record('done', {'status': report['status']})
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/analyze', methods=['GET'])
 def analyze_contract():
     try:
@@ -154,31 +305,16 @@ def analyze_contract():
         
         # Verificar si existe el archivo de reporte
         report_path = os.path.join(current_dir, 'contract_report.json')
-        use_cached_report = False
-        
-        if os.path.exists(report_path):
-            try:
-                with open(report_path, 'r', encoding='utf-8') as f:
-                    report = json.load(f)
-                    if report['status'] == 'complete' and 'input_file' in report and report['input_file'] == 'input.pdf':
-                        use_cached_report = True
-                        print(f"[INFO] server.py: Usando reporte en caché desde {report_path}")
-            except Exception as e:
-                print(f"[WARNING] server.py: Error al leer reporte en caché: {str(e)}")
+        report = load_cached_report(report_path)
                 
         # Generar reporte si no existe o no es válido
-        if not use_cached_report:
+        if report is None:
             print(f"[INFO] server.py: Iniciando generación de reporte")
             report = create_report(file_path, output_dir)
             print(f"[INFO] server.py: Reporte generado con estado: {report['status']}")
             
             # Guardar el reporte para uso futuro
-            try:
-                with open(report_path, 'w', encoding='utf-8') as f:
-                    json.dump(report, f, ensure_ascii=False, indent=2)
-                print(f"[INFO] server.py: Reporte guardado en {report_path}")
-            except Exception as e:
-                print(f"[WARNING] server.py: Error al guardar reporte: {str(e)}")
+            save_cached_report(report, report_path)
         
         # Convertir reporte a HTML si se solicita
         format_type = request.args.get('format', 'json')
@@ -222,4 +358,6 @@ port = int(os.environ.get("PORT", 5000))
 debug_mode = os.environ.get("DEBUG_MODE", "True").lower() == "true"
 
 if __name__ == '__main__':
+    # Recargar las plantillas modificadas sin reiniciar el servidor
+    template_store.start_watcher()
     app.run(debug=debug_mode, port=port, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Las pruebas importan los módulos como lo hace la aplicación (inspector_functions.*)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+SAMPLES_DIR = os.path.join(ROOT_DIR, 'samples_input')
@@ -0,0 +1,98 @@
+"""Invariantes de la alineación de párrafos por huellas"""
+import random
+
+import pytest
+
+from inspector_functions import inspector_thermodynamics
+from inspector_functions.inspector_thermodynamics import align_paragraphs
+
+
+def common_length(template, output):
+    """Longitud de la subsecuencia común más larga (referencia cuadrática, solo para las pruebas)"""
+    previous = [0] * (len(output) + 1)
+    for t in template:
+        current = [0]
+        for j, o in enumerate(output):
+            current.append(previous[j] + 1 if t == o else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def check_alignment(template, output):
+    alignment = align_paragraphs(template, output)
+    modified = alignment['modified']
+
+    # Cada párrafo de la plantilla y del contrato se cuenta exactamente una vez
+    assert alignment['unchanged'] + len(modified) + len(alignment['deleted']) == len(template)
+    assert alignment['unchanged'] + len(modified) + len(alignment['inserted']) == len(output)
+    assert len(set(alignment['deleted']) | {t for t, _ in modified}) == len(alignment['deleted']) + len(modified)
+    assert len(set(alignment['inserted']) | {o for _, o in modified}) == len(alignment['inserted']) + len(modified)
+
+    # Los pares modificados respetan el orden y nunca son párrafos iguales
+    assert modified == sorted(modified)
+    assert [o for _, o in modified] == sorted(o for _, o in modified)
+    for t, o in modified:
+        assert template[t - 1] != output[o - 1]
+
+    # No se emparejan más párrafos iguales de los que admite el orden de ambos textos
+    assert alignment['unchanged'] <= common_length(template, output)
+    return alignment
+
+
+def test_equal_paragraphs_between_anchors_are_unchanged():
+    alignment = check_alignment(['e', 'f', 'c', 'd', 'e', 'd'], ['b', 'f', 'e', 'c', 'f', 'f', 'e'])
+    assert alignment == {'inserted': [3, 6], 'deleted': [6], 'modified': [[1, 1], [4, 5]], 'unchanged': 3}
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_alignment_counts(seed):
+    rng = random.Random(seed)
+    alphabet = 'abcdefgh'[:rng.randint(1, 8)]
+    template = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+    output = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+    check_alignment(template, output)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_alignment_counts_without_nested_anchors(seed, monkeypatch):
+    # Sin anclas anidadas: los huecos entre las anclas de la sección se emparejan por posición
+    monkeypatch.setattr(inspector_thermodynamics, 'MAX_ANCHOR_DEPTH', 0)
+    rng = random.Random(seed)
+    template = [rng.choice('abcd') for _ in range(rng.randint(0, 30))]
+    output = [rng.choice('abcd') for _ in range(rng.randint(0, 30))]
+    check_alignment(template, output)
+
+
+def count_examined(monkeypatch):
+    """Cuenta los párrafos que recorre la búsqueda de anclas"""
+    examined = []
+    unique_anchors = inspector_thermodynamics._unique_anchors
+
+    def counting(template, output, t_start, t_end, o_start, o_end):
+        examined.append((t_end - t_start) + (o_end - o_start))
+        return unique_anchors(template, output, t_start, t_end, o_start, o_end)
+
+    monkeypatch.setattr(inspector_thermodynamics, '_unique_anchors', counting)
+    return examined
+
+
+@pytest.mark.parametrize('template, output', [
+    # Todos los párrafos únicos pero en orden inverso: cada nivel solo encuentra un ancla por hueco
+    ([f'p{i}' for i in range(20000)], [f'p{i}' for i in reversed(range(20000))]),
+    # Un hueco enorme sin anclas: párrafos repetidos
+    (['a', 'b'] * 10000, ['b', 'a'] * 10000 + ['c']),
+    # Anclas separadas por huecos grandes con repeticiones
+    ([h for i in range(200) for h in [f'u{i}'] + ['x', 'y'] * 50],
+     [h for i in range(200) for h in [f'u{i}'] + ['y', 'x', 'z'] * 40]),
+])
+def test_large_gaps_stay_within_the_bound(monkeypatch, template, output):
+    examined = count_examined(monkeypatch)
+    check_alignment(template[:600], output[:600])
+    examined.clear()
+
+    alignment = align_paragraphs(template, output)
+    # Cada nivel de anclas recorre cada párrafo una vez como mucho
+    bound = (inspector_thermodynamics.MAX_ANCHOR_DEPTH + 1) * (len(template) + len(output))
+    assert sum(examined) <= bound
+    assert alignment['unchanged'] + len(alignment['modified']) + len(alignment['deleted']) == len(template)
+    assert alignment['unchanged'] + len(alignment['modified']) + len(alignment['inserted']) == len(output)
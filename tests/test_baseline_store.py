@@ -0,0 +1,101 @@
+"""Línea base del corpus: media y varianza de Welford, contratos repetidos y muestras por sección"""
+import json
+import math
+import os
+import random
+import statistics
+
+import pytest
+
+from tests.conftest import SAMPLES_DIR
+from inspector_functions import baseline_store
+from inspector_functions.create_report import create_report
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_welford_matches_statistics(tmp_path, seed):
+    rng = random.Random(seed)
+    values = {metric: [rng.uniform(0, 5000) for _ in range(rng.randint(1, 60))] for metric in ('words', 'lines')}
+    path = str(tmp_path / 'baseline.json')
+    store = baseline_store.BaselineStore(path)
+    for metric, metric_values in values.items():
+        for value in metric_values:
+            store.update({'article_1': {metric: value}})
+    store.save()
+    # Los valores acumulados sobreviven a guardar y volver a cargar la línea base
+    store = baseline_store.BaselineStore(path).load()
+
+    for metric, metric_values in values.items():
+        n, mean, m2 = store.sections['article_1'][metric]
+        assert n == len(metric_values)
+        assert mean == pytest.approx(statistics.mean(metric_values), rel=1e-12)
+        if n > 1:
+            assert m2 / (n - 1) == pytest.approx(statistics.variance(metric_values), rel=1e-9)
+        value = metric_values[0]
+        z = store.z_score('article_1', metric, value)
+        if n < baseline_store.MIN_SAMPLES:
+            assert z is None
+        else:
+            expected = (value - statistics.mean(metric_values)) / math.sqrt(statistics.variance(metric_values))
+            assert z == pytest.approx(expected, rel=1e-9)
+
+
+def complete_report(input_hash, words):
+    return {
+        'status': 'complete',
+        'errors': [],
+        'extraction_profile': 'accurate',
+        'input_hash': input_hash,
+        'statistics': {'article_1': {'output_stats': {'words': words}}},
+    }
+
+
+def test_same_pdf_is_recorded_once(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+
+    assert baseline_store.record_report(complete_report('a' * 40, 400), path)
+    assert not baseline_store.record_report(complete_report('a' * 40, 400), path)
+    assert baseline_store.record_report(complete_report('b' * 40, 420), path)
+
+    # Las huellas se guardan aparte, una línea por contrato; la línea base solo tiene los conteos
+    with open(path, 'r', encoding='utf-8') as f:
+        assert set(json.load(f)) == {'version', 'sections'}
+    with open(path + baseline_store.RECORDED_SUFFIX, 'r', encoding='ascii') as f:
+        assert f.read().split() == ['a' * 40, 'b' * 40]
+    reloaded = baseline_store.BaselineStore(path).load()
+    assert reloaded.recorded == {'a' * 40, 'b' * 40}
+    assert reloaded.samples('article_1') == 2
+
+
+def test_recorded_hashes_are_read_incrementally(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    store = baseline_store.BaselineStore(path).load()
+    store.update({'article_1': {'words': 400}}, 'a' * 40)
+    store.save()
+
+    # Otro proceso añade un contrato: al recargar solo se leen las líneas nuevas
+    other = baseline_store.BaselineStore(path).load()
+    other.update({'article_1': {'words': 420}}, 'b' * 40)
+    other.save()
+    offset = store._recorded_offset
+    store.load()
+    assert store.recorded == {'a' * 40, 'b' * 40}
+    assert store._recorded_offset == os.path.getsize(path + baseline_store.RECORDED_SUFFIX) > offset
+    assert not store.update({'article_1': {'words': 420}}, 'b' * 40)
+
+
+def test_report_counts_samples_per_section(tmp_path, monkeypatch):
+    monkeypatch.setenv('INSPECTOR_BASELINE_FILE', str(tmp_path / 'baseline.json'))
+    input_pdf = os.path.join(SAMPLES_DIR, 'input_1.pdf')
+
+    first = create_report(input_pdf, str(tmp_path / 'output_split'), work_dir=str(tmp_path))
+    assert baseline_store.record_report(first)
+    second = create_report(input_pdf, str(tmp_path / 'output_split'), work_dir=str(tmp_path))
+    assert not baseline_store.record_report(second)
+
+    assert second['input_hash'] == first['input_hash']
+    assert 'baseline_samples' not in second
+    sections = [data for data in second['statistics'].values() if 'z_scores' in data]
+    assert sections
+    for data in sections:
+        assert data['baseline_samples'] == 1
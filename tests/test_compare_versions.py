@@ -0,0 +1,41 @@
+"""Un PDF ya analizado se reconoce por la huella guardada en su reporte"""
+import json
+import os
+
+from tests.conftest import SAMPLES_DIR
+from inspector_functions.compare_versions import file_hash, find_job_for_pdf, load_version
+
+SAMPLE_PDF = os.path.join(SAMPLES_DIR, 'input_1.pdf')
+
+
+def make_job(jobs_dir, job_id, status, input_hash):
+    job_dir = os.path.join(jobs_dir, job_id)
+    os.makedirs(os.path.join(job_dir, 'output_split'))
+    with open(os.path.join(job_dir, 'contract_report.json'), 'w', encoding='utf-8') as f:
+        json.dump({'status': status, 'input_file': 'input.pdf', 'input_hash': input_hash}, f)
+    with open(os.path.join(job_dir, 'output_split', 'output_article_1.txt'), 'w', encoding='utf-8') as f:
+        f.write('Article 1: Definitions')
+    return job_dir
+
+
+def test_pruned_complete_job_is_found_by_report_hash(tmp_path):
+    jobs_dir = str(tmp_path)
+    make_job(jobs_dir, 'other', 'complete', '0' * 40)
+    make_job(jobs_dir, 'failed', 'error', file_hash(SAMPLE_PDF))
+    # Trabajo limpiado: sin input.pdf, solo el reporte y las secciones
+    pruned = make_job(jobs_dir, 'pruned', 'complete', file_hash(SAMPLE_PDF))
+
+    assert find_job_for_pdf(SAMPLE_PDF, jobs_dir) == pruned
+
+
+def test_failed_job_is_not_reused(tmp_path, monkeypatch):
+    monkeypatch.setenv('INSPECTOR_BASELINE_FILE', str(tmp_path / 'baseline.json'))
+    jobs_dir = str(tmp_path / 'jobs')
+    make_job(jobs_dir, 'cancelled', 'cancelled', file_hash(SAMPLE_PDF))
+    assert find_job_for_pdf(SAMPLE_PDF, jobs_dir) is None
+
+    # Desde la línea de comandos, el PDF se vuelve a analizar en lugar de fallar
+    version = load_version(SAMPLE_PDF, jobs_dir)
+    assert not version['cached'] and version['job_id'] != 'cancelled'
+    assert version['report']['status'] == 'complete'
+    assert find_job_for_pdf(SAMPLE_PDF, jobs_dir) == os.path.join(jobs_dir, version['job_id'])
@@ -0,0 +1,74 @@
+"""El perfil raw conserva palabras y párrafos, y cada perfil tiene su propia línea base"""
+import os
+
+import pytest
+
+from tests.conftest import SAMPLES_DIR
+from inspector_functions import baseline_store
+from inspector_functions.pdf_to_txt_pdfminer import extract_pdf_pages
+from inspector_functions.inspector_thermodynamics import split_paragraphs
+from inspector_functions.txt_cleaner import clean_pages
+from inspector_functions.txt_to_txt_splitter import find_contract_sections
+
+
+def article_1(pdf_name, profile):
+    text = clean_pages(extract_pdf_pages(os.path.join(SAMPLES_DIR, pdf_name), profile))[0]
+    start, end = find_contract_sections(text)['article_1']
+    return text[start:end]
+
+
+@pytest.mark.parametrize('pdf_name', ['input_1.pdf', 'input_3.pdf'])
+def test_raw_profile_keeps_words_and_paragraphs(pdf_name):
+    accurate = article_1(pdf_name, 'accurate')
+    raw = article_1(pdf_name, 'raw')
+    assert raw.split() == accurate.split()
+    assert len(split_paragraphs(raw)) > len(split_paragraphs(accurate)) // 2
+
+
+@pytest.mark.parametrize('profile, section', [
+    ('accurate', 'article_1'), ('fast', 'article_1@fast'), ('raw', 'article_1@raw')])
+def test_each_profile_has_its_own_baseline(tmp_path, profile, section):
+    report = {
+        'status': 'complete',
+        'errors': [],
+        'extraction_profile': profile,
+        'input_hash': 'a' * 40,
+        'statistics': {'article_1': {'output_stats': {'words': 426}}},
+    }
+    path = str(tmp_path / 'baseline.json')
+    assert baseline_store.record_report(report, path)
+    assert not baseline_store.record_report(report, path)
+    baseline = baseline_store.get_baseline(path)
+    assert list(baseline.sections) == [section]
+    assert baseline.samples(section) == 1
+
+
+def test_same_pdf_enters_each_profile_baseline_once(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    for profile in ('fast', 'accurate', 'fast', 'accurate'):
+        baseline_store.record_report({
+            'status': 'complete', 'errors': [], 'extraction_profile': profile, 'input_hash': 'a' * 40,
+            'statistics': {'article_1': {'output_stats': {'words': 426}}},
+        }, path)
+    baseline = baseline_store.get_baseline(path)
+    assert baseline.samples('article_1') == baseline.samples('article_1@fast') == 1
+
+
+def test_auto_profile_report_is_scored_against_its_profile(tmp_path, monkeypatch):
+    # En modo auto el contrato se extrae con el perfil rápido: entra en su línea base y se
+    # puntúa con ella
+    monkeypatch.setenv('INSPECTOR_BASELINE_FILE', str(tmp_path / 'baseline.json'))
+    from inspector_functions.create_report import create_report
+
+    reports = []
+    for name in ('input_1.pdf', 'input_3.pdf', 'input_check.pdf', 'input_1.pdf'):
+        report = create_report(os.path.join(SAMPLES_DIR, name), str(tmp_path / 'output_split'),
+                               work_dir=str(tmp_path), extraction_profile='auto')
+        assert report['extraction_profile'] == 'fast'
+        baseline_store.record_report(report)
+        reports.append(report)
+
+    assert baseline_store.get_baseline().samples('article_1@fast') == 3
+    assert baseline_store.get_baseline().samples('article_1') == 0
+    assert reports[-1]['statistics']['article_1']['baseline_samples'] == 3
+    assert any(z is not None for z in reports[-1]['statistics']['article_1']['z_scores'].values())
@@ -0,0 +1,102 @@
+"""La matriz de comparación da los mismos cocientes, desviaciones y alertas que inspector_statistics"""
+import math
+
+import pytest
+
+from inspector_functions import inspector_matrix
+from inspector_functions.inspector_matrix import ComparisonMatrix, DEFAULT_TOLERANCE
+from inspector_functions.inspector_statistics import STAT_KEYS, compare_files_with_templates
+
+TEMPLATES = {
+    'article_1': 'Article 1: Definitions. The Buyer, the Seller and the Goods.',
+    'article_2': 'Article 2: Price, paid in full.',
+    # Sin comas ni puntos: el contrato puede tener cocientes infinitos o 1
+    'article_3': 'Article 3 Term',
+}
+
+CONTRACTS = {
+    'igual': dict(TEMPLATES),
+    'distinto': {
+        'article_1': 'Article 1: Definitions. The Buyer, the Seller, the Agent, the Goods and the Services.',
+        'article_2': 'Article 2.',
+        'article_3': 'Article 3, Term. Renewal.',
+    },
+    # Secciones que faltan: quedan como NaN y no se marcan
+    'incompleto': {'article_2': 'Article 2: Price, paid in full, in advance.'},
+}
+
+
+def build_reports(tmp_path):
+    template_dir = tmp_path / 'template'
+    template_dir.mkdir()
+    for section, text in TEMPLATES.items():
+        (template_dir / f'template_{section}.txt').write_text(text, encoding='utf-8')
+
+    reports = {}
+    for contract, sections in CONTRACTS.items():
+        output_dir = tmp_path / contract
+        output_dir.mkdir()
+        for section, text in sections.items():
+            (output_dir / f'output_{section}.txt').write_text(text, encoding='utf-8')
+        reports[contract] = {'statistics': compare_files_with_templates(str(output_dir), str(template_dir))}
+    return reports
+
+
+def same_value(actual, expected):
+    if math.isnan(expected):
+        return math.isnan(actual)
+    return actual == pytest.approx(expected)
+
+
+def check_parity(reports, tolerance=DEFAULT_TOLERANCE):
+    matrix = ComparisonMatrix.from_reports(reports)
+    ratios = matrix.ratios()
+    deviations = matrix.deviations(ratios)
+    flags = matrix.flags(tolerance, deviations)
+
+    for contract_index, report in enumerate(reports.values()):
+        for section_index, section in enumerate(matrix.sections):
+            expected_ratios = report['statistics'].get(section, {}).get('ratios')
+            for metric_index, key in enumerate(STAT_KEYS):
+                expected = expected_ratios[key] if expected_ratios else math.nan
+                position = (contract_index, section_index, metric_index)
+                assert same_value(matrix._value(ratios, *position), expected)
+                assert same_value(matrix._value(deviations, *position), expected - 1.0)
+                assert bool(matrix._value(flags, *position)) == (abs(expected - 1.0) > tolerance)
+    return matrix
+
+
+def test_array_backend_matches_statistics(tmp_path, monkeypatch):
+    monkeypatch.setattr(inspector_matrix, 'np', None)
+    reports = build_reports(tmp_path)
+
+    matrix = check_parity(reports)
+    assert matrix.backend == 'array'
+    # Los casos especiales aparecen en los reportes que se comparan
+    ratios = reports['distinto']['statistics']['article_3']['ratios']
+    assert ratios['comma_count'] == math.inf
+    assert reports['igual']['statistics']['article_3']['ratios']['comma_count'] == 1.0
+    check_parity(reports, tolerance=0.0)
+
+
+def test_numpy_backend_matches_statistics(tmp_path, monkeypatch):
+    numpy = pytest.importorskip('numpy')
+    monkeypatch.setattr(inspector_matrix, 'np', numpy)
+    reports = build_reports(tmp_path)
+
+    assert check_parity(reports).backend == 'numpy'
+    check_parity(reports, tolerance=0.0)
+
+
+def test_rows_skip_missing_sections(tmp_path, monkeypatch):
+    monkeypatch.setattr(inspector_matrix, 'np', None)
+    matrix = ComparisonMatrix.from_reports(build_reports(tmp_path))
+
+    rows = matrix.to_rows()
+    assert [row[:2] for row in rows] == [
+        ['igual', 'article_1'], ['igual', 'article_2'], ['igual', 'article_3'],
+        ['distinto', 'article_1'], ['distinto', 'article_2'], ['distinto', 'article_3'],
+        ['incompleto', 'article_2'],
+    ]
+    assert all(row[-1] == 0 for row in rows[:3])
+    assert [row[:2] for row in matrix.to_rows(only_flagged=True)] == [row[:2] for row in rows[3:]]
@@ -0,0 +1,46 @@
+"""La limpieza de jobs/ conserva lo que /compare necesita de los análisis completos"""
+import json
+import os
+
+from inspector_functions.analysis_pool import JOBS_DIR_NAME, prune_job_directories
+from inspector_functions.compare_versions import load_job_version
+
+
+def make_job(base_dir, job_id, age, status='complete'):
+    job_dir = os.path.join(base_dir, JOBS_DIR_NAME, job_id)
+    os.makedirs(os.path.join(job_dir, 'output_split'))
+    with open(os.path.join(job_dir, 'contract_report.json'), 'w', encoding='utf-8') as f:
+        json.dump({'status': status, 'input_file': 'input.pdf'}, f)
+    for name in ('input.pdf', 'output.txt', os.path.join('output_split', 'output_article_1.txt')):
+        with open(os.path.join(job_dir, name), 'w', encoding='utf-8') as f:
+            f.write('Article 1: Definitions')
+    os.utime(os.path.join(job_dir, 'contract_report.json'), (1000 - age, 1000 - age))
+    return job_dir
+
+
+def test_old_complete_jobs_keep_report_and_sections(tmp_path):
+    base_dir = str(tmp_path)
+    jobs = [make_job(base_dir, f'job{age}', age) for age in range(6)]
+    failed = make_job(base_dir, 'failed', 3, status='error')
+
+    prune_job_directories(base_dir, keep=2, keep_reports=4)
+    # Limpiar de nuevo no cambia nada: el orden no depende de la fecha del directorio
+    prune_job_directories(base_dir, keep=2, keep_reports=4)
+
+    for job_dir in jobs[:2]:
+        assert sorted(os.listdir(job_dir)) == ['contract_report.json', 'input.pdf', 'output.txt', 'output_split']
+    for job_dir in jobs[2:4]:
+        assert sorted(os.listdir(job_dir)) == ['contract_report.json', 'output_split']
+        assert load_job_version(job_dir)['sections'] == {'article_1': 'Article 1: Definitions'}
+    for job_dir in jobs[4:] + [failed]:
+        assert not os.path.exists(job_dir)
+
+
+def test_active_jobs_are_not_pruned(tmp_path):
+    base_dir = str(tmp_path)
+    jobs = [make_job(base_dir, f'job{age}', age, status='processing') for age in range(3)]
+
+    prune_job_directories(base_dir, keep=1, active={'job2'})
+
+    assert os.path.exists(jobs[0]) and os.path.exists(jobs[2])
+    assert not os.path.exists(jobs[1])
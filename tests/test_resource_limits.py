@@ -0,0 +1,51 @@
+"""Un MemoryError en cualquier paso del análisis llega al trabajador como límite de recursos"""
+import os
+
+import pytest
+
+from tests.conftest import SAMPLES_DIR
+from inspector_functions import analysis_pool, inspector_statistics, inspector_thermodynamics, template_store
+
+SAMPLE_PDF = os.path.join(SAMPLES_DIR, 'input_3.pdf')
+
+
+def raise_memory_error(*args, **kwargs):
+    raise MemoryError()
+
+
+def run_limited_report(tmp_path):
+    kwargs = {
+        'input_pdf': SAMPLE_PDF,
+        'output_dir': str(tmp_path / 'output_split'),
+        'work_dir': str(tmp_path),
+    }
+    limits = {'memory_mb': 1024, 'cpu_seconds': None}
+    return analysis_pool._run_limited_job('report', kwargs, None, limits)
+
+
+@pytest.mark.parametrize('module, name', [
+    (inspector_statistics, 'analyze_string'),
+    (inspector_thermodynamics, 'split_paragraphs'),
+])
+def test_memory_error_in_analyzer_is_a_resource_limit(tmp_path, monkeypatch, module, name):
+    # Las plantillas ya compiladas, para que el error salte al analizar el contrato
+    template_store.get_template_set(template_store.DEFAULT_TEMPLATE_DIR)
+    monkeypatch.setattr(module, name, raise_memory_error)
+
+    result, retire = run_limited_report(tmp_path)
+
+    assert result['report']['status'] == 'error'
+    assert result['report']['failure']['code'] == 'resource_limit'
+    assert result['report']['failure']['resource'] == 'memory'
+    assert result['html'] is None
+    assert retire is True
+
+
+def test_memory_error_in_split_is_a_resource_limit(tmp_path, monkeypatch):
+    from inspector_functions import create_report
+    monkeypatch.setattr(create_report, 'find_contract_sections', raise_memory_error)
+
+    result, retire = run_limited_report(tmp_path)
+
+    assert result['report']['failure']['code'] == 'resource_limit'
+    assert retire is True
@@ -0,0 +1,76 @@
+"""find_contract_sections encuentra las mismas secciones que el divisor original por expresiones regulares"""
+import os
+import random
+import re
+
+import pytest
+
+from tests.conftest import SAMPLES_DIR
+from benchmarks.synthetic_contracts import contract_text, generate_contract
+from inspector_functions.pdf_to_txt_pdfminer import extract_pdf_pages
+from inspector_functions.txt_cleaner import clean_pages, normalize_text
+from inspector_functions.txt_to_txt_splitter import find_contract_sections
+
+
+def regex_split(contract_text):
+    """Secciones del split_contract_text original (una búsqueda con expresión regular por sección)"""
+    sections = {}
+    title_match = re.search(r'^(.*?)(?=\s*Between:)', contract_text, re.DOTALL)
+    if title_match:
+        sections['title'] = title_match.group(1).strip()
+    between_match = re.search(r'(Between:.*?)(?=\s*And:)', contract_text, re.DOTALL)
+    if between_match:
+        sections['between'] = between_match.group(1).strip()
+    and_match = re.search(r'(And:.*?)(?=\s*Preamble)', contract_text, re.DOTALL)
+    if and_match:
+        sections['and'] = and_match.group(1).strip()
+    preamble_match = re.search(r'(Preamble.*?)(?=\s*Article\s+1\s*:)', contract_text, re.DOTALL)
+    if preamble_match:
+        sections['preamble'] = preamble_match.group(1).strip()
+    for i in range(1, 15):
+        article_pattern = f"(Article\\s*{i}\\s*:.*?)(?=\\s*Article\\s*{i+1}\\s*:|$)"
+        article_match = re.search(article_pattern, contract_text, re.DOTALL)
+        if article_match:
+            sections[f'article_{i}'] = article_match.group(1).strip()
+    article_15_start_match = re.search(r'Article\s*15\s*:', contract_text)
+    if article_15_start_match:
+        start = article_15_start_match.start()
+        dates = [m.start() + start for m in re.finditer(r'Date\s*:', contract_text[start:])]
+        if len(dates) >= 2:
+            sections['article_15'] = contract_text[start:dates[1]].strip()
+            furthermore_text = contract_text[dates[1]:].strip()
+            if furthermore_text:
+                sections['furthermore'] = furthermore_text
+        else:
+            sections['article_15'] = contract_text[start:].strip()
+    return {name: text for name, text in sections.items() if text}
+
+
+def check_sections(text):
+    sections = find_contract_sections(text)
+    found = {name: text[start:end] for name, (start, end) in sections.items() if end > start}
+    assert found == regex_split(text)
+
+
+@pytest.mark.parametrize('name', sorted(os.listdir(SAMPLES_DIR)))
+def test_sample_contracts(name):
+    pages = extract_pdf_pages(os.path.join(SAMPLES_DIR, name))
+    check_sections(clean_pages(pages)[0])
+    # El texto con marcadores de salto de página, como lo dividía la versión original
+    check_sections(normalize_text(''.join(pages))[0])
+
+
+@pytest.mark.parametrize('articles', [1, 10, 15, 18])
+def test_synthetic_contracts(articles):
+    check_sections(contract_text(generate_contract(pages=20, articles=articles, edit_rate=0.05, seed=articles)))
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_missing_and_repeated_headings(seed):
+    # Encabezados que faltan, se repiten o aparecen fuera de orden
+    rng = random.Random(seed)
+    lines = contract_text(generate_contract(pages=10, seed=seed)).split('\n')
+    headings = [i for i, line in enumerate(lines) if re.match(r'(Article\s*\d+\s*:|Between:|And:|Preamble|Date\s*:)', line)]
+    for i in rng.sample(headings, rng.randint(1, 6)):
+        lines[i] = rng.choice(['', lines[rng.choice(headings)], lines[i].replace(':', '')])
+    check_sections('\n'.join(lines))
@@ -0,0 +1,38 @@
+"""El HTML de un reporte muestra las plantillas con las que se calcularon sus estadísticas"""
+import os
+import shutil
+
+from tests.conftest import ROOT_DIR, SAMPLES_DIR
+from inspector_functions import template_store
+from inspector_functions.create_report import create_report, get_report_html
+
+
+def test_report_html_keeps_template_snapshot(tmp_path, monkeypatch):
+    template_dir = str(tmp_path / 'template')
+    shutil.copytree(os.path.join(ROOT_DIR, 'template'), template_dir)
+    os.makedirs(tmp_path / 'template_sets')
+    monkeypatch.setattr(template_store, 'DEFAULT_TEMPLATE_DIR', template_dir)
+    monkeypatch.setenv('INSPECTOR_TEMPLATE_SETS_DIR', str(tmp_path / 'template_sets'))
+    monkeypatch.setenv('INSPECTOR_BASELINE_FILE', str(tmp_path / 'baseline.json'))
+
+    # Texto propio de esta copia, distinto del de template/
+    article_path = os.path.join(template_dir, 'template_article_1.txt')
+    with open(article_path, 'r', encoding='utf-8') as f:
+        old_text = f.read().replace('Article 1: Definitions', 'Article 1: Definitions (snapshot)', 1)
+    with open(article_path, 'w', encoding='utf-8') as f:
+        f.write(old_text)
+    output_dir = str(tmp_path / 'output_split')
+    report = create_report(os.path.join(SAMPLES_DIR, 'input_1.pdf'), output_dir, work_dir=str(tmp_path))
+    version = report['template_set']['version']
+    assert template_store.get_template_set(template_dir).version == version
+
+    # El vigilante recarga las plantillas entre el análisis y la generación del HTML
+    new_text = 'Article 1: Definitions\n\nPlantilla recargada durante el análisis.\n'
+    with open(article_path, 'w', encoding='utf-8') as f:
+        f.write(new_text)
+    assert template_store.reload_changed_templates() == [os.path.abspath(template_dir)]
+    assert template_store.get_template_set(template_dir).version != version
+
+    html = get_report_html(report, output_dir)
+    assert old_text.strip() in html
+    assert 'Plantilla recargada durante el análisis.' not in html
@@ -0,0 +1,106 @@
+"""normalize_text y PageBreakNormalizer dan lo mismo que la cadena de replace() original"""
+import os
+import random
+import re
+
+import pytest
+
+from tests.conftest import SAMPLES_DIR
+from inspector_functions.pdf_to_txt_pdfminer import extract_pdf_pages
+from inspector_functions.txt_cleaner import PAGE_BREAK_TEXT, PageBreakNormalizer, clean_pages, normalize_text
+
+PAGE_BREAK_MARKER = '\n===PAGE_BREAK===\n'
+
+
+def replace_chain(content):
+    """Normalización original de standardize_page_breaks: un replace() por marcador"""
+    counts = {'form_feed': content.count('\f')}
+    content = content.replace('\f', PAGE_BREAK_MARKER)
+    counts['vertical_tab'] = content.count('\v')
+    content = content.replace('\v', PAGE_BREAK_MARKER)
+    counts['other_markers'] = 0
+    for marker in ['\x0c', '\u000C', '␌', chr(12), 'FF', '\\u000c', '\\f', '\n\n\n\n\n']:
+        counts['other_markers'] += content.count(marker)
+        content = content.replace(marker, PAGE_BREAK_MARKER)
+    counts['unusual_breaks'] = len(re.findall(r'\n\s*\d+\s*\n[A-Z\s]{5,}', content))
+    counts['page_number_lines'] = len(re.findall(r'\n\s*\d+\s*\n', content))
+    return content, counts
+
+
+# Fragmentos con los que se construyen textos que combinan todos los marcadores
+PIECES = ['Article 1: Definitions', 'OFFICE', 'ARTICLE ONE', 'F', 'FF', 'FFF', '\f', '\v', '␌', '\\u000c', '\\f',
+          '\\u00', '\\', '\n', '\n\n', '\n\n\n', '\n\n\n\n\n', '\n\n\n\n\n\n\n', '  12  ', '3', ' ', 'text']
+
+
+def random_text(rng):
+    return ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 60)))
+
+
+def sample_texts():
+    return [''.join(extract_pdf_pages(os.path.join(SAMPLES_DIR, name)))
+            for name in ('input_1.pdf', 'input_3.pdf')]
+
+
+def check_normalize(text):
+    expected, expected_counts = replace_chain(text)
+    normalized, counts = normalize_text(text)
+    assert normalized == expected
+    assert counts == expected_counts
+    assert normalize_text(text, keep_markers=False) == (expected.replace(PAGE_BREAK_TEXT, ''), expected_counts)
+    return normalized, counts
+
+
+def check_chunked(text, chunks):
+    expected, expected_counts = normalize_text(text)
+    normalizer = PageBreakNormalizer()
+    output = ''.join(normalizer.feed(chunk) for chunk in chunks) + normalizer.close()
+    assert output == expected
+    assert normalizer.counts == {k: expected_counts[k] for k in ('form_feed', 'vertical_tab', 'other_markers')}
+    # clean_pages cuenta los números de página sobre el texto completo
+    text, _, counts = clean_pages(chunks)
+    assert (text, counts) == (expected.replace(PAGE_BREAK_TEXT, ''), expected_counts)
+
+
+@pytest.mark.parametrize('text, page_number_lines, unusual_breaks', [
+    ('a\n1\nb', 1, 0),
+    # Los números seguidos se cuentan una vez: la búsqueda consume el salto de línea final
+    ('a\n1\n2\nb', 1, 0),
+    ('a\n 12 \n\n\n3\nb', 1, 0),
+    # El título se lleva el salto de línea que abre la segunda línea con un número
+    ('a\n7\nARTICLE ONE\n8\nTERM', 2, 1),
+    # Se cuenta sobre el texto con marcadores, como en el original
+    ('a\n3\fARTICLE ONE', 1, 0),
+])
+def test_page_number_counts(text, page_number_lines, unusual_breaks):
+    counts = check_normalize(text)[1]
+    assert (counts['page_number_lines'], counts['unusual_breaks']) == (page_number_lines, unusual_breaks)
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_normalize_text_matches_replace_chain(seed):
+    check_normalize(random_text(random.Random(seed)))
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_chunked_normalizer_matches_normalize_text(seed):
+    rng = random.Random(seed)
+    text = random_text(rng)
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 8)))
+    check_chunked(text, [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])])
+
+
+def test_sample_contracts():
+    for text in sample_texts():
+        check_normalize(text)
+        # Un carácter por fragmento: cada corte posible a la vez
+        check_chunked(text[:5000], list(text[:5000]))
+
+
+def test_clean_pages_matches_normalized_text_without_markers():
+    for name in ('input_1.pdf', 'input_3.pdf'):
+        pages = extract_pdf_pages(os.path.join(SAMPLES_DIR, name))
+        text, page_starts, counts = clean_pages(pages)
+        expected, expected_counts = replace_chain(''.join(pages))
+        assert text == expected.replace(PAGE_BREAK_TEXT, '')
+        assert counts == expected_counts
+        assert len(page_starts) == len(pages) and list(page_starts) == sorted(page_starts)